@@ -0,0 +1,44 @@
+# angular_velocity.py
+
+from datetime import datetime
+import argparse
+
+import numpy as np
+
+from ephemeris import get_ephemeris
+from utility import to_jd, calculate_ecliptic_velocity, get_planet_object
+
+# Samples per longitude_rate call; bounds the memory of long ranges
+SPEED_CHUNK_SAMPLES = 20000
+
+def speed_profiles(bodies, jd):
+    """
+    Ecliptic longitude rates of several bodies over a time grid, for shading
+    retrograde and stationary phases.
+
+    Parameters:
+    - bodies: lowercase body names
+    - jd: array of TT Julian dates
+
+    Returns:
+    - {body: float32 array of degrees per day, negative while retrograde}
+    """
+    ephemeris = get_ephemeris()
+    profiles = {}
+    for name in bodies:
+        body = ephemeris.body(name)
+        # One batched rate evaluation per body and chunk instead of a call per instant
+        profiles[name] = np.concatenate([ephemeris.longitude_rate(body, jd[first:first + SPEED_CHUNK_SAMPLES])
+                                         for first in range(0, len(jd), SPEED_CHUNK_SAMPLES)]).astype(np.float32)
+    return profiles
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Print a body's ecliptic longitude rate and speed across the sky.")
+    parser.add_argument('body', nargs='?', default='jupiter')
+    parser.add_argument('date', nargs='?', default='2025-03-05', help="YYYY-MM-DD (UTC midnight)")
+    args = parser.parse_args()
+
+    jd = to_jd(datetime.strptime(args.date, '%Y-%m-%d'))
+    body = get_planet_object(args.body)
+    print(f"{args.body.capitalize()}'s angular velocity: {float(get_ephemeris().angular_speed(body, jd)):.15f}° per day")
+    print(f"Ecliptic longitude rate: {float(calculate_ecliptic_velocity(body, jd)):.15f}° per day")
@@ -0,0 +1,418 @@
+# aspects.py
+
+import numpy as np
+
+from ephemeris import get_ephemeris
+from utility import get_planet_object, to_jd, format_datetime, time_grid, MINUTE, HOUR
+
+# Spacing of the fine aspect scan, in days; the coarse scan of a pair uses
+# SCAN_STEP times a power of two, up to MAX_SCAN_STEP
+SCAN_STEP = 4 * HOUR
+MAX_SCAN_STEP = 30
+
+# Upper bounds of the geocentric ecliptic longitude speeds, in degrees per day
+MAX_SPEEDS = {
+    'moon': 15.4,
+    'mercury': 2.25,
+    'venus': 1.27,
+    'sun': 1.02,
+    'mars': 0.8,
+    'jupiter': 0.25,
+    'saturn': 0.14,
+    'uranus': 0.07,
+    'neptune': 0.04,
+    'pluto': 0.04
+}
+
+def pair_speed(planet1, planet2):
+    """Upper bound of how fast the separation of two planets changes, in degrees per day"""
+    fastest = max(MAX_SPEEDS.values())
+    return MAX_SPEEDS.get(planet1, fastest) + MAX_SPEEDS.get(planet2, fastest)
+
+def scan_step(planet1, planet2, orb):
+    """
+    Coarse scan step of a pair: the largest SCAN_STEP * 2**k (up to MAX_SCAN_STEP)
+    in which the separation moves by at most the orb, and never less than SCAN_STEP.
+    Powers of two keep the number of distinct grids small, so pairs share them.
+    """
+    limit = min(orb / pair_speed(planet1, planet2), MAX_SCAN_STEP)
+    return SCAN_STEP * 2.0 ** max(np.floor(np.log2(limit / SCAN_STEP)), 0)
+
+def angular_separation(lon1, lon2):
+    """Angular distance between two longitudes (scalars or arrays), folded into 0-180 degrees"""
+    angle = (lon1 - lon2) % 360
+    return np.minimum(angle, 360 - angle)
+
+def angle_between(planet1_obj, planet2_obj, jd):
+    """Angular distance between two planets at a Julian date or array of Julian dates"""
+    pos1, pos2 = get_ephemeris().ecliptic_longitudes([planet1_obj, planet2_obj], jd)
+    return angular_separation(pos1, pos2)
+
+# Function to calculate the aspects between two planets
+def find_aspect_periods(planet1, planet2, aspect_angle, orb, start_date, end_date):
+    """
+    Find periods when two planets are in a specific aspect within given orb.
+    
+    Parameters:
+    - planet1, planet2: planet names
+    - aspect_angle: desired angle in degrees
+    - orb: maximum deviation from exact aspect in degrees
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    
+    Returns:
+    - List of dictionaries with aspect periods and exact aspect times (TT Julian dates)
+    """
+    return find_all_aspect_periods([planet1, planet2], [aspect_angle], orb, start_date, end_date)
+
+def remove_duplicate_aspects(aspect_periods):
+    """Remove duplicate aspects (same planets, same aspect, within 24 hours)"""
+    cleaned_periods = []
+    seen_aspects = set()
+    
+    print("Removing potential duplicates...")
+    for period in sorted(aspect_periods, key=lambda x: x['exact_time']):
+        aspect_key = (period['planet1'], period['planet2'], period['aspect'])
+        exact_time = period['exact_time']
+        
+        # Check if we've seen this aspect recently
+        is_duplicate = False
+        for prev_time in seen_aspects:
+            if aspect_key == prev_time[0] and abs(exact_time - prev_time[1]) < 1:
+                is_duplicate = True
+                break
+        
+        if not is_duplicate:
+            cleaned_periods.append(period)
+            seen_aspects.add((aspect_key, exact_time))
+    
+    return cleaned_periods
+
+def ecliptic_longitudes(planets, jd):
+    """
+    Ecliptic longitudes of several planets at once.
+    
+    Parameters:
+    - planets: planet names
+    - jd: array of TT Julian dates
+    
+    Returns:
+    - array of shape (planets, times) in degrees
+    """
+    return get_ephemeris().ecliptic_longitudes([get_planet_object(planet) for planet in planets], jd)
+
+def find_all_aspect_periods(planets, aspect_angles, orb, start_date, end_date, pairs=None):
+    """
+    Find the aspect periods of many planet pairs and aspects in one pass.
+    
+    Each pair is scanned at its own step (scan_step), so slow pairs such as
+    Neptune-Pluto take a sample every few weeks while pairs with the Moon stay
+    dense. Pairs with the same step share one grid: the longitudes of their
+    planets are computed once as a (planets, times) matrix, the separations of
+    all pairs are taken by broadcasting into a (pairs, times) matrix, and the
+    candidate windows of every pair and aspect are found with array operations.
+    
+    No entry into the orb is missed: every time lies within half a step of a
+    sample, over which the separation changes by at most
+    pair_speed * step / 2, so candidates are taken within the orb widened by
+    that margin. Candidates from coarse grids are rescanned at SCAN_STEP
+    around the window before the exact time of each is refined individually.
+    
+    Parameters:
+    - planets: planet names
+    - aspect_angles: desired angles in degrees
+    - orb: maximum deviation from exact aspect in degrees
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    - pairs: (planet1, planet2) names to check; all pairs of planets by default
+    
+    Returns:
+    - List of dictionaries with the planets, aspect, start_time, end_time and
+      exact_time (TT Julian dates) of every period, for all pairs and aspects
+    """
+    if pairs is None:
+        pairs = [(planet1, planet2) for i, planet1 in enumerate(planets) for planet2 in planets[i+1:]]
+    print(f"Detecting aspects of {len(pairs)} pairs within {orb}° of {', '.join(f'{angle}°' for angle in aspect_angles)}")
+    
+    start_jd = to_jd(start_date)
+    end_jd = to_jd(end_date)
+    if end_jd <= start_jd:
+        return []
+    
+    # Group the pairs by their scan step
+    step_pairs = {}
+    for pair in pairs:
+        step_pairs.setdefault(scan_step(*pair, orb), []).append(pair)
+    
+    aspect_periods = []
+    for step, group in sorted(step_pairs.items()):
+        # The ends of the range are sampled too, so every time is within half a step of a sample
+        times = time_grid(start_jd, end_jd, step)
+        group_planets = [planet for planet in planets if any(planet in pair for pair in group)]
+        print(f"Scanning {len(group)} pairs every {step * 24:g} hours ({len(times)} samples)")
+        
+        longitudes = ecliptic_longitudes(group_planets, times)
+        index = {planet: i for i, planet in enumerate(group_planets)}
+        first = np.array([index[planet1] for planet1, _ in group])
+        second = np.array([index[planet2] for _, planet2 in group])
+        
+        # Angular distance of every pair at every time, folded into 0-180
+        separations = angular_separation(longitudes[first], longitudes[second])
+        margins = np.array([pair_speed(*pair) * step / 2 for pair in group])[:, None]
+        
+        for aspect_angle in aspect_angles:
+            deviation = np.abs(separations - aspect_angle)
+            
+            # Window edges: +1 where a pair enters the widened orb, -1 one step after it leaves
+            in_orb = np.pad(deviation <= orb + margins, ((0, 0), (1, 1))).astype(np.int8)
+            edges = np.diff(in_orb, axis=1)
+            window_pairs, window_starts = np.nonzero(edges == 1)
+            _, window_ends = np.nonzero(edges == -1)
+            
+            for pair, start_idx, end_idx in zip(window_pairs, window_starts, window_ends):
+                planet1, planet2 = group[pair]
+                planet1_obj, planet2_obj = get_planet_object(planet1), get_planet_object(planet2)
+                window_times = times[start_idx:end_idx]
+                window_deviation = deviation[pair, start_idx:end_idx]
+                if step > SCAN_STEP:
+                    # The orb can be entered up to half a step outside the window's samples
+                    window_start = max(window_times[0] - step / 2, start_jd)
+                    window_end = min(window_times[-1] + step / 2, end_jd)
+                    window_times = time_grid(window_start, window_end, SCAN_STEP)
+                    window_deviation = np.abs(angle_between(planet1_obj, planet2_obj, window_times) - aspect_angle)
+                
+                # A coarse window can hold several passes through the orb (around a station); split it
+                # where the fine samples leave the orb. A pass that only shows within the margin
+                # of the fine samples is still kept as one.
+                in_pass = window_deviation <= orb
+                if not in_pass.any():
+                    in_pass = window_deviation <= orb + pair_speed(planet1, planet2) * min(step, SCAN_STEP) / 2
+                edges = np.diff(np.pad(in_pass, 1).astype(np.int8))
+                pass_starts = np.nonzero(edges == 1)[0]
+                pass_ends = np.nonzero(edges == -1)[0]
+                
+                # A pass that perfects more than once without leaving the orb is split where the
+                # deviation peaks between the perfections
+                passes = []
+                for pass_start, pass_end in zip(pass_starts, pass_ends):
+                    deviation_slice = window_deviation[pass_start:pass_end]
+                    peaks = np.nonzero((deviation_slice[1:-1] > deviation_slice[:-2]) &
+                                       (deviation_slice[1:-1] >= deviation_slice[2:]))[0] + 1
+                    passes.extend(zip(np.split(window_times[pass_start:pass_end], peaks), np.split(deviation_slice, peaks)))
+                
+                for pass_times, pass_deviation in passes:
+                    in_window = pass_times[pass_deviation <= orb]
+                    closest_time = pass_times[np.argmin(pass_deviation)]
+                    print(f"Calculating exact {get_aspect_name(aspect_angle)} of {planet1.capitalize()} and {planet2.capitalize()} close to {format_datetime(closest_time)}...")
+                    exact_time = find_exact_aspect_time(planet1_obj, planet2_obj, closest_time, aspect_angle)
+                    if exact_time is None:
+                        print(f"Exact aspect time calculation failed for {planet1.capitalize()} and {planet2.capitalize()}, skipping...")
+                        continue
+                    
+                    aspect_periods.append({
+                        'start_time': in_window[0] if len(in_window) else closest_time,
+                        'end_time': in_window[-1] if len(in_window) else closest_time,
+                        'exact_time': exact_time,
+                        'planet1': planet1,
+                        'planet2': planet2,
+                        'angle': aspect_angle,
+                        'aspect': get_aspect_name(aspect_angle)
+                    })
+    
+    cleaned_periods = remove_duplicate_aspects(aspect_periods)
+    print("Finished aspect detection!")
+    return cleaned_periods
+
+def calculate_optimal_window(planet1_obj, planet2_obj, reference_time):
+    """
+    Calculate the optimal search window size based on the rate of angle change
+    between two planets at a specific time.
+    
+    Parameters:
+    - planet1_obj, planet2_obj: skyfield planet objects
+    - reference_time: TT Julian date for when to measure the rate of change
+    
+    Returns:
+    - window_hours: optimal window size in hours
+    """
+    # Angle at reference time and 1 hour later
+    angle_ref, angle_later = angle_between(planet1_obj, planet2_obj, np.array([reference_time, reference_time + HOUR]))
+    print(f"Angle at reference time: {angle_ref:.4f}°")
+    
+    # Calculate rate of change in degrees per hour
+    rate_of_change = abs(angle_later - angle_ref)
+    
+    # Handle cases where the angle crosses 0/180 boundary
+    if rate_of_change > 180:
+        rate_of_change = 360 - rate_of_change
+    
+    print(f"Rate of angle change: {rate_of_change:.4f}° per hour")
+    
+    # Determine window size based on rate of change
+    # Slower rate = larger window, faster rate = smaller window
+    if rate_of_change < 0.01:
+        window_hours = 168  # Very slow: 7 days
+    elif rate_of_change < 0.05:
+        window_hours = 120  # Slow: 5 days
+    elif rate_of_change < 0.1:
+        window_hours = 96   # Moderately slow: 4 days
+    elif rate_of_change < 0.5:
+        window_hours = 72   # Medium slow: 3 days
+    elif rate_of_change < 1:
+        window_hours = 48   # Medium: 2 days
+    elif rate_of_change < 5:
+        window_hours = 24   # Medium fast: 1 day
+    elif rate_of_change < 10:
+        window_hours = 12   # Fast: 12 hours
+    else:
+        window_hours = 6    # Very fast: 6 hours
+    
+    # Ensure minimum window size
+    window_hours = max(window_hours, 6)
+    
+    print(f"Optimal window size: {window_hours} hours")
+    return window_hours
+
+def refine_aspect_time_with_interpolation(planet1_obj, planet2_obj, best_time, aspect_angle, hours_range=3):
+    """
+    Refine the aspect time using polynomial interpolation.
+    
+    Parameters:
+    - planet1_obj, planet2_obj: skyfield planet objects
+    - best_time: best approximation from binary search, as a TT Julian date
+    - aspect_angle: the desired aspect angle in degrees
+    - hours_range: range of hours to sample around best_time
+    
+    Returns:
+    - refined TT Julian date with more precise aspect time
+    """
+    print(f"Refining aspect time with polynomial interpolation...")
+    
+    # 7 sample points centered around best_time, computed in one call
+    offsets = np.array([-1, -1/2, -1/4, 0, 1/4, 1/2, 1]) * hours_range * HOUR
+    sample_angles = angle_between(planet1_obj, planet2_obj, best_time + offsets)
+    
+    # Fit a polynomial of degree 3 (cubic) in days from the first sample,
+    # which keeps the x values small for numerical stability
+    x = offsets - offsets[0]
+    poly = np.poly1d(np.polyfit(x, sample_angles, 3))
+    
+    # Find the point where the polynomial is closest to the aspect angle on a fine grid
+    grid_points = np.linspace(0, x[-1], 1000)
+    best_x = grid_points[np.argmin(np.abs(poly(grid_points) - aspect_angle))]
+    refined_time = best_time + offsets[0] + best_x
+    
+    # Calculate the actual angle at this time for verification
+    actual_angle = angle_between(planet1_obj, planet2_obj, refined_time)
+    print(f"Interpolation found time: {format_datetime(refined_time)}")
+    print(f"Angle at interpolated time: {actual_angle:.6f}°")
+    print(f"Interpolation angle difference: {abs(actual_angle - aspect_angle):.6f}°")
+    return refined_time
+
+def find_exact_aspect_time(planet1_obj, planet2_obj, approx_time, aspect_angle):
+    """
+    Find the exact time when two planets form the specified aspect angle.
+    Uses binary search to find the precise time down to the minute.
+    
+    Parameters:
+    - planet1_obj, planet2_obj: skyfield planet objects
+    - approx_time: approximate time when the aspect occurs, as a TT Julian date
+    - aspect_angle: the desired aspect angle in degrees
+    
+    Returns:
+    - TT Julian date of the exact aspect, or None if no aspect was found
+    """
+    print(f"Finding exact aspect time for two planets aspect...")
+    print(f"Approximate time: {format_datetime(approx_time)}, aspect angle: {aspect_angle}")
+
+    window = calculate_optimal_window(planet1_obj, planet2_obj, approx_time) * HOUR
+    
+    def get_angle_at_time(t):
+        return angle_between(planet1_obj, planet2_obj, t)
+    
+    # Calculate angles at window boundaries and midpoint
+    start_time = approx_time - window / 2
+    end_time = approx_time + window / 2
+    angle_start, angle_mid, angle_end = get_angle_at_time(np.array([start_time, approx_time, end_time]))
+    
+    # Check if we need to expand the window by looking at angle progression
+    if abs(angle_mid - aspect_angle) > abs(angle_start - aspect_angle) and \
+       abs(angle_mid - aspect_angle) > abs(angle_end - aspect_angle):
+        print(f"Expanding search window as aspect appears to be outside initial window...")
+        start_time = approx_time - window
+        end_time = approx_time + window
+        # Recalculate boundary angles for expanded window
+        angle_start, angle_end = get_angle_at_time(np.array([start_time, end_time]))
+    
+    # If the initial approximation is extremely close (within 0.001 degrees),
+    # still perform binary search but with a smaller window to refine the result
+    if abs(angle_mid - aspect_angle) < 0.001:
+        print(f"Initial approximation is extremely close to exact aspect ({abs(angle_mid - aspect_angle):.6f}°)")
+        # Use a smaller window centered on the approximate time
+        start_time = approx_time - 3 * HOUR
+        end_time = approx_time + 3 * HOUR
+        angle_start, angle_end = get_angle_at_time(np.array([start_time, end_time]))
+    
+    # Track best approximation
+    best_time = approx_time  # Initialize with approximate time instead of None
+    min_angle_diff = abs(angle_mid - aspect_angle)
+    
+    # Determine if angles increase or decrease from start to end
+    angles_increasing = angle_end > angle_start
+    
+    # Binary search down to minute precision
+    print("Starting binary search phase...")
+    
+    while end_time - start_time > MINUTE:  # Stop at 1-minute precision
+        mid_time = (start_time + end_time) / 2
+        angle = get_angle_at_time(mid_time)
+        
+        # Track best approximation
+        angle_diff = abs(angle - aspect_angle)
+        if angle_diff < min_angle_diff:
+            min_angle_diff = angle_diff
+            best_time = mid_time
+        
+        if (angles_increasing and angle < aspect_angle) or (not angles_increasing and angle > aspect_angle):
+            # If angles increase and current < target, search right half
+            # If angles decrease and current > target, search right half
+            start_time = mid_time
+        else:
+            # Otherwise search left half
+            end_time = mid_time
+    
+    print(f"End of binary search, best approximation: {format_datetime(best_time)}")
+    print(f"Final angle difference: {min_angle_diff:.6f}°")
+
+    refined_time = refine_aspect_time_with_interpolation(planet1_obj, planet2_obj, best_time, aspect_angle)
+    refined_diff = abs(get_angle_at_time(refined_time) - aspect_angle)
+
+    if refined_diff > 1 and min_angle_diff > 1:
+        print(f"Aspect rejected: angle difference is too large: {refined_diff:.6f}° > 1°")
+        return None
+
+    if refined_diff < min_angle_diff:
+        final_time = refined_time
+        print(f"Using interpolation refined time: {format_datetime(final_time)}")
+    else:
+        final_time = best_time
+        print(f"Using binary search best approximation: {format_datetime(final_time)}")
+        
+    return float(final_time)
+
+def get_aspect_name(angle):
+    """Convert aspect angle to named aspect"""
+    aspects = {
+        0: "Conjunction",
+        60: "Sextile",
+        90: "Square",
+        120: "Trine",
+        180: "Opposition"
+    }
+    
+    # Find the closest standard aspect
+    closest_aspect = min(aspects.keys(), key=lambda x: abs(x - angle))
+    
+    # Return the aspect name if it's within 1 degree of standard angle
+    if abs(closest_aspect - angle) <= 1:
+        return aspects[closest_aspect]
+    else:
+        return f"{angle}° Aspect"
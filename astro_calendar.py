@@ -0,0 +1,203 @@
+# astro_calendar.py
+
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from functools import partial
+import argparse
+import json
+from ephemeris import get_ephemeris, use_ephemeris, EPHEMERIS_BACKENDS, DEFAULT_EPHEMERIS
+from retrograde import find_retrograde_periods, PLANET_VELOCITY_THRESHOLDS, PLANET_STEP_SIZES as RETROGRADE_STEP_SIZES
+from signs import get_planet_sign, get_sign_changes, PLANET_STEP_SIZES as SIGN_STEP_SIZES
+from aspects import find_all_aspect_periods
+from moon import get_moon_events
+from events import (aspect_record, ingress_record, station_record, phase_record,
+                    lunar_day_record, merge_periods, sort_records, clip_records, parse_epoch, local_day_feeds,
+                    BODIES, BODY_IDS, NO_BODY, ASPECT, INGRESS, STATION, PHASE, LUNAR_DAY)
+from detector_cache import DetectorCache
+from event_store import EventStore
+from shards import run_sharded, SHARD_OVERLAP
+from cost_estimate import estimate_calendar, benchmark, print_estimate
+
+# Cached sub-ranges are computed this far past their ends. The exact-time search of
+# an aspect reaches up to 7 days from its first estimate; stations are bracketed by
+# velocity samples on both sides.
+ASPECT_PADDING = timedelta(days=8)
+STATION_PADDING = timedelta(days=1)
+
+# IANA timezones whose local days get a Moon feed in moon_events_by_day.json
+FEED_ZONES = ['UTC', 'Europe/London', 'America/New_York']
+
+# Detectors as functions of a time range returning EventRecords, so results can be cached per range
+def detect_stations(planet, start_date, end_date):
+    retrograde_periods = find_retrograde_periods(planet, start_date, end_date)
+    return [station_record(event) for event in retrograde_periods if "stationary_point" in event]
+
+def detect_ingresses(planet, start_date, end_date):
+    sign_change_points = get_sign_changes(planet, start_date, end_date)
+    return [ingress_record(planet, event['new_sign'], event['datetime']) for event in sign_change_points]
+
+def detect_aspects(planets, aspect_angles, orb, start_date, end_date):
+    aspect_periods = find_all_aspect_periods(planets, aspect_angles, orb, start_date, end_date)
+    return [aspect_record(period['planet1'], period['planet2'], period['angle'], period['exact_time']) for period in aspect_periods]
+
+def detect_moon_events(start_date, end_date):
+    moon_events = get_moon_events(start_date, end_date)
+    records = [lunar_day_record(lunar_day) for lunar_day in moon_events['lunar_days']]
+    records.extend(ingress_record('moon', change['new_sign'], change['exact_time']) for change in moon_events['sign_changes'])
+    records.extend(aspect_record(aspect['planet1'], aspect['planet2'], aspect['angle'], aspect['exact_time']) for aspect in moon_events['aspects'])
+    records.extend(phase_record(phase['phase'], phase['time']) for phase in moon_events['phases'])
+    return records
+
+def detector_scope(detector, bodies):
+    """(kind, body1, body2) of every event a detector reports for bodies, which a stored re-run replaces"""
+    ids = [BODY_IDS[body] for body in bodies]
+    if detector == 'stations':
+        return [(STATION, body, NO_BODY) for body in ids]
+    if detector == 'ingresses':
+        return [(INGRESS, body, NO_BODY) for body in ids]
+    if detector == 'aspects':
+        return [(ASPECT, body1, body2) for body1 in ids for body2 in ids if body1 != body2]
+    # The Moon's lunar days, phases, sign changes and aspects with every other body
+    moon = BODY_IDS['moon']
+    others = [BODY_IDS[body] for body in BODIES if body != 'moon']
+    return ([(kind, moon, NO_BODY) for kind in (LUNAR_DAY, PHASE, INGRESS)]
+            + [(ASPECT, moon, other) for other in others] + [(ASPECT, other, moon) for other in others])
+
+# Define calendar class
+class Calendar:
+    def __init__(self, start_date, end_date, orb=5, cache=None, store=None, shard_days=None, workers=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.orb = orb
+        # Optional DetectorCache; with one, only the parts of the range not cached yet are computed
+        self.cache = cache
+        # Optional EventStore every detector result is upserted into
+        self.store = store
+        # With shard_days, every detector runs as time shards of that many days on `workers` processes
+        self.shard_days = shard_days
+        self.workers = workers
+        self.planets = ['mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto', 'sun']
+        self.aspects = [(0, "Conjunction"), (60, "Sextile"), (90, "Square"), (120, "Trine"), (180, "Opposition")]
+        # EventRecord lists; times are parsed once when the detector results come in
+        self.events = []
+        self.moon_events = []
+
+    def shard_overlap(self, detector, planet=None):
+        """
+        How far the shards of a detector are computed past their ends: at least its
+        padding, and for stations and ingresses a scan step of the planet on either side.
+        estimate_calendar counts the work of the overlaps from the same values.
+        """
+        if detector == 'stations':
+            return max(STATION_PADDING, timedelta(days=2 * RETROGRADE_STEP_SIZES.get(planet, 30)))
+        if detector == 'ingresses':
+            return max(SHARD_OVERLAP, timedelta(days=SIGN_STEP_SIZES.get(planet, 1)))
+        if detector == 'aspects':
+            return max(SHARD_OVERLAP, ASPECT_PADDING)
+        return SHARD_OVERLAP
+
+    def detect(self, detector, bodies, params, compute, padding=timedelta(0), overlap=SHARD_OVERLAP):
+        """
+        Run compute(start, end) for the calendar range, through the cache when one is set,
+        as time shards overlapping by the larger of padding and overlap when shard_days is set.
+        Every path returns the records of [start_date, end_date) only.
+        """
+        if self.shard_days is not None:
+            compute = partial(run_sharded, compute, shard_days=self.shard_days,
+                              overlap=max(padding, overlap), workers=self.workers)
+        if self.cache is None:
+            # Detectors report events found in their scan's padding too
+            records = clip_records(compute(self.start_date, self.end_date),
+                                   parse_epoch(self.start_date), parse_epoch(self.end_date))
+        else:
+            records = self.cache.fetch(detector, bodies, params, self.start_date, self.end_date, compute, padding)
+        if self.store is not None:
+            self.store.upsert(records, self.start_date, self.end_date, detector_scope(detector, bodies))
+        return records
+
+    def add_retrogrades(self):
+        for planet in self.planets:
+            params = {'thresholds': PLANET_VELOCITY_THRESHOLDS.get(planet), 'step_days': RETROGRADE_STEP_SIZES.get(planet)}
+            self.events.extend(self.detect('stations', [planet], params, partial(detect_stations, planet),
+                                           padding=STATION_PADDING, overlap=self.shard_overlap('stations', planet)))
+
+    def add_sign_changes(self):
+        for planet in self.planets:
+            params = {'step_days': SIGN_STEP_SIZES.get(planet)}
+            self.events.extend(self.detect('ingresses', [planet], params, partial(detect_ingresses, planet),
+                                           overlap=self.shard_overlap('ingresses', planet)))
+
+    def add_aspects(self):
+        aspect_angles = [angle for angle, name in self.aspects]
+        params = {'angles': aspect_angles, 'orb': self.orb}
+        self.events.extend(self.detect('aspects', self.planets, params,
+                                       partial(detect_aspects, self.planets, aspect_angles, self.orb),
+                                       padding=ASPECT_PADDING, overlap=self.shard_overlap('aspects')))
+
+    def add_moon_events(self):
+        self.moon_events.extend(self.detect('moon', ['moon'], {}, detect_moon_events, overlap=self.shard_overlap('moon')))
+
+    # The function, that outputs all events from self.events in the format
+    # of continuous feed without days separation (only time) in chronological order
+    def events_feed(self):
+        if len(self.events) == 0:
+            return None
+        # {"type": "point", "datetime": <YYYY-MM-DD HH:MM:SS+00:00>, "description": <description of the event>}
+        return [event.to_feed() for event in sort_records(self.events)]
+
+    def moon_events_feed(self):
+        if len(self.moon_events) == 0:
+            return None
+        # Lunar days are split at cached range boundaries; join the pieces back together
+        return [event.to_feed() for event in sort_records(merge_periods(self.moon_events))]
+
+    # Moon events bucketed by the local calendar days of several IANA timezones,
+    # computed from the same timezone-neutral events
+    def moon_events_by_day(self, zones):
+        return local_day_feeds(merge_periods(self.moon_events), zones)
+        
+
+# --- Main execution ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Detect the calendar events and write the feeds.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="only estimate ephemeris evaluations, time and memory per stage (cached results are not considered)")
+    parser.add_argument('--shard-days', type=int, help="run every detector as time shards of this many days")
+    parser.add_argument('--workers', type=int, help="worker processes for the shards, all CPUs by default")
+    parser.add_argument('--ephemeris', choices=EPHEMERIS_BACKENDS,
+                        help="position backend; 'analytic' gives an instant draft without the JPL kernel")
+    args = parser.parse_args()
+    if args.ephemeris:
+        use_ephemeris(args.ephemeris)
+
+    start_date = datetime(2024, 12, 1)
+    end_date = datetime(2026, 2, 1)
+
+    if args.dry_run:
+        # Evaluations from the step tables, timed with a micro-benchmark on this machine
+        calendar = Calendar(start_date, end_date, shard_days=args.shard_days, workers=args.workers)
+        stages, parallel = estimate_calendar(calendar)
+        print_estimate(stages, benchmark(), parallel)
+        raise SystemExit
+
+    # Moving the end date only computes the new months; see `python detector_cache.py inspect`
+    # Events are also written to events.sqlite; query it with `python event_store.py 2025-01-06 2025-01-12`
+    # Drafts from other backends stay out of the database
+    with EventStore() if get_ephemeris().name == DEFAULT_EPHEMERIS else nullcontext() as store:
+        calendar = Calendar(start_date, end_date, cache=DetectorCache(), store=store,
+                            shard_days=args.shard_days, workers=args.workers)
+        calendar.add_moon_events()
+        calendar.add_retrogrades()
+        calendar.add_aspects()
+        calendar.add_sign_changes()
+
+    with open('events_feed.json', 'w') as f:
+        json.dump(calendar.events_feed(), f)
+
+    # Save moon events in separate files
+    with open('moon_events_feed.json', 'w') as f:
+        json.dump(calendar.moon_events_feed(), f)
+
+    # Moon events by local day for the timezones of the sites
+    with open('moon_events_by_day.json', 'w') as f:
+        json.dump(calendar.moon_events_by_day(FEED_ZONES), f)
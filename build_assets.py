@@ -0,0 +1,201 @@
+# build_assets.py
+
+"""
+Build the deployable widget assets into dist/.
+
+Every data file and static file is written under a content-hashed name
+(positions.3f9c2a1b7e.json), JSON is minified, and a pre-gzipped .gz variant is
+written next to each compressible file. asset-manifest.json maps the logical
+names to the hashed ones; it and index.html are the only files that must be
+revalidated, everything else can be served as immutable.
+"""
+
+from hashlib import sha256
+import argparse
+import gzip
+import json
+import os
+import shutil
+
+# Generated and checked-in data files, in dependency order: a JSON file can
+# reference files listed before it through "file" entries. Files in DATA_DIRS
+# (progressive loading pieces) come first; their logical names keep the directory.
+DATA_DIRS = ['tiers', 'events', 'density']
+DATA_FILES = ['glyphs.svg', 'glyphs.json', 'orbits.bin', 'speeds.bin', 'positions.bin', 'positions.json', 'positions_manifest.json', 'events_feed.json', 'moon_events_feed.json']
+STATIC_DIR = 'static'
+TEMPLATE = os.path.join('templates', 'index.html')
+
+# Glyph atlas: every planet, sign and aspect symbol in one texture, drawn by a
+# single instanced mesh in main.js. Names are the lower-cased feed names.
+GLYPHS = {
+    'sun': '\u2609', 'moon': '\u263d', 'mercury': '\u263f', 'venus': '\u2640', 'mars': '\u2642',
+    'jupiter': '\u2643', 'saturn': '\u2644', 'uranus': '\u2645', 'neptune': '\u2646', 'pluto': '\u2647',
+    'aries': '\u2648', 'taurus': '\u2649', 'gemini': '\u264a', 'cancer': '\u264b', 'leo': '\u264c', 'virgo': '\u264d',
+    'libra': '\u264e', 'scorpio': '\u264f', 'sagittarius': '\u2650', 'capricorn': '\u2651', 'aquarius': '\u2652', 'pisces': '\u2653',
+    'conjunction': '\u260c', 'sextile': '\u26b9', 'square': '\u25a1', 'trine': '\u25b3', 'opposition': '\u260d',
+    'retrograde': '\u211e', 'direct': 'D'
+}
+GLYPH_SVG = 'glyphs.svg'
+GLYPH_JSON = 'glyphs.json'
+GLYPH_CELL = 64  # Pixels per glyph
+GLYPH_COLUMNS = 8
+GLYPH_FONT = "'Segoe UI Symbol', 'Noto Sans Symbols', 'Noto Sans Symbols 2', 'DejaVu Sans', sans-serif"
+TEXT_PRESENTATION = '\ufe0e'  # Keeps zodiac signs from rendering as colour emoji
+
+COMPRESSIBLE = {'.json', '.js', '.css', '.bin', '.html', '.svg'}
+HASH_LENGTH = 10
+
+HTACCESS = """# Generated by build_assets.py
+<IfModule mod_headers.c>
+    <FilesMatch "\\.[0-9a-f]{%d}\\.">
+        Header set Cache-Control "public, max-age=31536000, immutable"
+    </FilesMatch>
+    <FilesMatch "^(asset-manifest\\.json|index\\.html)">
+        Header set Cache-Control "no-cache"
+    </FilesMatch>
+</IfModule>
+<IfModule mod_rewrite.c>
+    RewriteEngine On
+    RewriteCond %%{HTTP:Accept-Encoding} gzip
+    RewriteCond %%{REQUEST_FILENAME}.gz -f
+    RewriteRule ^(.+)$ $1.gz [L]
+    <FilesMatch "\\.json\\.gz$">
+        ForceType application/json
+        Header set Content-Encoding gzip
+        Header append Vary Accept-Encoding
+    </FilesMatch>
+    <FilesMatch "\\.js\\.gz$">
+        ForceType application/javascript
+        Header set Content-Encoding gzip
+        Header append Vary Accept-Encoding
+    </FilesMatch>
+    <FilesMatch "\\.(bin|svg|css|html)\\.gz$">
+        Header set Content-Encoding gzip
+        Header append Vary Accept-Encoding
+    </FilesMatch>
+</IfModule>
+""" % HASH_LENGTH
+
+def minify_json(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def rewrite_references(data, assets):
+    """Replace {"file": "<logical name>"} entries with the hashed name, anywhere in a JSON document."""
+    if isinstance(data, dict):
+        return {key: assets.get(value, value) if key == 'file' and isinstance(value, str)
+                else rewrite_references(value, assets) for key, value in data.items()}
+    if isinstance(data, list):
+        return [rewrite_references(value, assets) for value in data]
+    return data
+
+def hashed_name(name, content):
+    base, ext = os.path.splitext(os.path.basename(name))
+    return f"{base}.{sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+def write_asset(out_dir, name, content):
+    """Write content and, if it helps, a gzip variant; returns the size of both."""
+    path = os.path.join(out_dir, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    if os.path.splitext(name)[1] not in COMPRESSIBLE:
+        return len(content), None
+    # mtime=0 keeps the .gz bytes identical between builds of the same content
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) >= len(content):
+        return len(content), None
+    with open(path + '.gz', 'wb') as f:
+        f.write(compressed)
+    return len(content), len(compressed)
+
+def power_of_two(n):
+    return 1 << (n - 1).bit_length()
+
+def glyph_atlas():
+    """
+    Lay out GLYPHS on a grid of GLYPH_CELL-sized cells, white on transparent.
+
+    Returns:
+    - svg: the atlas as UTF-8 bytes, sized to powers of two so it can be mipmapped
+    - metadata: {"file", "width", "height", "names", "rects"}, with rects[i] = [u0, v0, u1, v1]
+      of names[i] in texture coordinates (v from the bottom, as WebGL samples an unflipped image)
+    """
+    names = list(GLYPHS)
+    rows = -(-len(names) // GLYPH_COLUMNS)
+    width, height = power_of_two(GLYPH_COLUMNS * GLYPH_CELL), power_of_two(rows * GLYPH_CELL)
+    cells, rects = [], []
+    for index, name in enumerate(names):
+        row, column = divmod(index, GLYPH_COLUMNS)
+        x, y = column * GLYPH_CELL, row * GLYPH_CELL
+        cells.append(f'<text x="{x + GLYPH_CELL // 2}" y="{y + GLYPH_CELL // 2}">{GLYPHS[name]}{TEXT_PRESENTATION}</text>')
+        rects.append([x / width, 1 - (y + GLYPH_CELL) / height, (x + GLYPH_CELL) / width, 1 - y / height])
+    svg = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+           f'<g font-family="{GLYPH_FONT}" font-size="{GLYPH_CELL * 3 // 4}" fill="#fff" text-anchor="middle" dominant-baseline="central">'
+           + ''.join(cells) + '</g></svg>')
+    metadata = {'file': GLYPH_SVG, 'width': width, 'height': height, 'names': names, 'rects': rects}
+    return svg.encode('utf-8'), metadata
+
+def write_glyph_atlas(root='.'):
+    """
+    Write glyphs.svg and glyphs.json into the project root, where the unbuilt tree serves them.
+    Both are build output and ignored by git.
+    """
+    svg, metadata = glyph_atlas()
+    with open(os.path.join(root, GLYPH_SVG), 'wb') as f:
+        f.write(svg)
+    with open(os.path.join(root, GLYPH_JSON), 'w') as f:
+        json.dump(metadata, f, indent=1)
+    print(f"Wrote {len(metadata['names'])} glyphs to {GLYPH_SVG} ({metadata['width']}x{metadata['height']}) and {GLYPH_JSON}")
+
+def build(out_dir='dist'):
+    """
+    Build all assets into out_dir, replacing its previous contents.
+
+    Returns:
+    - assets: {logical name: hashed file name} as written to asset-manifest.json
+    """
+    print(f"Building assets into {out_dir}/...")
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    write_glyph_atlas()
+    assets = {}
+
+    sources = [f"{directory}/{name}" for directory in DATA_DIRS if os.path.isdir(directory)
+               for name in sorted(os.listdir(directory))]
+    sources += [name for name in DATA_FILES if os.path.exists(name)]
+    for name in DATA_DIRS + DATA_FILES:
+        if not os.path.exists(name):
+            print(f"Skipping {name}: not generated yet")
+    static_sources = sorted(os.path.join(STATIC_DIR, name) for name in os.listdir(STATIC_DIR))
+
+    for source in sources + static_sources:
+        with open(source, 'rb') as f:
+            content = f.read()
+        if source.endswith('.json'):
+            content = minify_json(rewrite_references(json.loads(content), assets))
+        # Data files are referenced by their path, static files by name
+        logical = os.path.basename(source) if source in static_sources else source
+        assets[logical] = hashed_name(logical, content)
+        size, compressed = write_asset(out_dir, assets[logical], content)
+        print(f"{source} -> {assets[logical]} ({size} bytes" + (f", {compressed} gzipped)" if compressed else ")"))
+
+    with open(TEMPLATE) as f:
+        page = f.read().replace('/static/main.js', assets['main.js'])
+    write_asset(out_dir, 'index.html', page.encode('utf-8'))
+    write_asset(out_dir, 'asset-manifest.json', minify_json(assets))
+    with open(os.path.join(out_dir, '.htaccess'), 'w') as f:
+        f.write(HTACCESS)
+
+    print(f"Finished building {len(assets)} assets.")
+    return assets
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build content-hashed, precompressed widget assets.")
+    parser.add_argument('--out', default='dist', help="output directory (replaced on every build)")
+    parser.add_argument('--glyphs', action='store_true', help="only write the glyph atlas, for serving the unbuilt tree")
+    args = parser.parse_args()
+
+    if args.glyphs:
+        write_glyph_atlas()
+    else:
+        build(args.out)
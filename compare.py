@@ -0,0 +1,231 @@
+# compare.py
+
+from datetime import datetime
+from time import perf_counter
+import argparse
+import json
+
+import numpy as np
+
+from ephemeris import use_ephemeris, count_evaluations, EPHEMERIS_BACKENDS, DEFAULT_EPHEMERIS
+from events import (record_from_feed, clip_records, merge_periods, sort_records, parse_epoch, format_epoch,
+                    KIND_NAMES, BODY_IDS, ASPECT, INGRESS, STATION)
+from astro_calendar import Calendar
+
+# Checked-in feeds of the default engine, the references a faster engine is held to
+REFERENCE_FEEDS = ['events_feed.json', 'moon_events_feed.json']
+
+# Calendar stages by the kinds they produce
+STAGES = {
+    'aspects': 'add_aspects',
+    'stations': 'add_retrogrades',
+    'ingresses': 'add_sign_changes',
+    'moon': 'add_moon_events'
+}
+
+# Events of the same kind, bodies and code further apart than this are different events
+MATCH_WINDOW = 86400  # Seconds
+
+def record_stage(record):
+    """The STAGES key of the stage that produces a record; everything involving the Moon is 'moon'."""
+    if BODY_IDS['moon'] in (record.body1, record.body2):
+        return 'moon'
+    return {ASPECT: 'aspects', STATION: 'stations', INGRESS: 'ingresses'}[record.kind]
+
+def load_reference(paths, start, end):
+    """EventRecords of feed files inside [start, end) epoch seconds, lunar days joined and clipped."""
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(record_from_feed(entry) for entry in json.load(f))
+    return sort_records(clip_records(merge_periods(records), start, end))
+
+def run_engine(ephemeris, start_date, end_date, stages, orb=5, shard_days=None, workers=None):
+    """
+    Run the Calendar stages with a backend and measure them.
+
+    Returns:
+    - records: EventRecords of all stages
+    - stats: {'seconds', 'calls', 'evaluations'}; the counts are None when shards ran
+      on worker processes, where they cannot be seen
+    """
+    use_ephemeris(ephemeris)
+    calendar = Calendar(start_date, end_date, orb=orb, shard_days=shard_days, workers=workers)
+    with count_evaluations() as counter:
+        started = perf_counter()
+        for stage in stages:
+            getattr(calendar, STAGES[stage])()
+        seconds = perf_counter() - started
+    counted = shard_days is None or workers == 1
+    stats = {
+        'seconds': seconds,
+        'calls': counter.calls if counted else None,
+        'evaluations': counter.evaluations if counted else None
+    }
+    return merge_periods(calendar.events + calendar.moon_events), stats
+
+def event_key(record):
+    return record.kind, record.body1, record.body2, record.code
+
+def match_events(reference, candidate, window=MATCH_WINDOW):
+    """
+    Pair the events of two runs by kind, bodies and code (aspect, sign, direction,
+    phase or lunar day), in time order, when they are at most window seconds apart.
+
+    Returns:
+    - matched: list of (reference record, candidate record, delta seconds), candidate minus reference
+    - missing: reference records without a partner
+    - extra: candidate records without a partner
+    """
+    groups = {}
+    for side, records in enumerate((reference, candidate)):
+        for record in sort_records(records):
+            groups.setdefault(event_key(record), ([], []))[side].append(record)
+    matched, missing, extra = [], [], []
+    for expected, found in groups.values():
+        i = j = 0
+        while i < len(expected) and j < len(found):
+            delta = found[j].time - expected[i].time
+            if abs(delta) <= window:
+                matched.append((expected[i], found[j], delta))
+                i += 1
+                j += 1
+            elif delta > 0:
+                missing.append(expected[i])
+                i += 1
+            else:
+                extra.append(found[j])
+                j += 1
+        missing.extend(expected[i:])
+        extra.extend(found[j:])
+    return matched, sort_records(missing), sort_records(extra)
+
+def summarize(matched, missing, extra):
+    """Counts and absolute time deltas in seconds, per kind and for all kinds ('all')."""
+    summary = {}
+    for name in ['all'] + KIND_NAMES:
+        kind = KIND_NAMES.index(name) if name != 'all' else None
+        deltas = np.abs([delta for record, _, delta in matched if kind is None or record.kind == kind])
+        entry = {
+            'matched': len(deltas),
+            'missing': sum(1 for record in missing if kind is None or record.kind == kind),
+            'extra': sum(1 for record in extra if kind is None or record.kind == kind),
+            'median': float(np.median(deltas)) if len(deltas) else None,
+            'p95': float(np.percentile(deltas, 95)) if len(deltas) else None,
+            'max': float(deltas.max()) if len(deltas) else None
+        }
+        if name == 'all' or entry['matched'] or entry['missing'] or entry['extra']:
+            summary[name] = entry
+    return summary
+
+def compare(engines, start_date, end_date, stages, reference_paths=REFERENCE_FEEDS, orb=5, shard_days=None, workers=None):
+    """
+    Run every engine over the range and match its events to the reference feeds.
+
+    Parameters:
+    - engines: ephemeris backend names, e.g. ['jpl', 'analytic']
+    - stages: keys of STAGES; the reference is restricted to the kinds they produce
+    - reference_paths: feed files written by astro_calendar.py
+
+    Returns:
+    - dict per engine with 'stats' (run_engine), 'summary' (summarize), 'matched', 'missing' and 'extra'
+    """
+    start, end = parse_epoch(start_date), parse_epoch(end_date)
+    reference = [record for record in load_reference(reference_paths, start, end) if record_stage(record) in stages]
+    results = {}
+    for engine in engines:
+        print(f"Running the {engine} engine...")
+        records, stats = run_engine(engine, start_date, end_date, stages, orb, shard_days, workers)
+        matched, missing, extra = match_events(reference, clip_records(records, start, end))
+        results[engine] = {
+            'stats': stats,
+            'summary': summarize(matched, missing, extra),
+            'matched': matched,
+            'missing': missing,
+            'extra': extra
+        }
+    return results
+
+def format_minutes(seconds):
+    return '-' if seconds is None else f"{seconds / 60:.1f}m"
+
+def format_count(value):
+    return '-' if value is None else f"{value:,}"
+
+def print_report(results, details=False, worst=10):
+    """
+    Print the engines side by side: wall time and speedup over the first engine,
+    evaluation counts, and matched, missing and extra events with the absolute
+    time deltas per kind. Then the worst deltas and every missing and extra
+    event per engine, or every delta with details.
+    """
+    engines = list(results)
+    first = results[engines[0]]['stats']['seconds']
+    print(f"\n{'':<24}" + ''.join(f"{engine:>16}" for engine in engines))
+    rows = [
+        ('wall time', lambda r: f"{r['stats']['seconds']:.1f}s"),
+        ('speedup', lambda r: f"{first / r['stats']['seconds']:.1f}x"),
+        ('calls', lambda r: format_count(r['stats']['calls'])),
+        ('evaluations', lambda r: format_count(r['stats']['evaluations']))
+    ]
+    for name in results[engines[0]]['summary']:
+        rows += [
+            (f"{name} matched", lambda r, n=name: format_count(r['summary'].get(n, {}).get('matched'))),
+            (f"{name} missing", lambda r, n=name: format_count(r['summary'].get(n, {}).get('missing'))),
+            (f"{name} extra", lambda r, n=name: format_count(r['summary'].get(n, {}).get('extra'))),
+            (f"{name} |dt| median", lambda r, n=name: format_minutes(r['summary'].get(n, {}).get('median'))),
+            (f"{name} |dt| p95", lambda r, n=name: format_minutes(r['summary'].get(n, {}).get('p95'))),
+            (f"{name} |dt| max", lambda r, n=name: format_minutes(r['summary'].get(n, {}).get('max')))
+        ]
+    for label, value in rows:
+        print(f"{label:<24}" + ''.join(f"{value(results[engine]):>16}" for engine in engines))
+
+    for engine in engines:
+        result = results[engine]
+        deltas = sorted(result['matched'], key=lambda pair: -abs(pair[2]))
+        shown = sorted(deltas, key=lambda pair: pair[0].time) if details else deltas[:worst]
+        print(f"\n{engine}: {'all' if details else 'largest'} time deltas")
+        for record, _, delta in shown:
+            print(f"  {format_epoch(record.time)}  {delta / 60:+8.1f}m  {record.description()}")
+        for label, records in (('missing', result['missing']), ('extra', result['extra'])):
+            print(f"{engine}: {len(records)} {label}")
+            for record in records:
+                print(f"  {format_epoch(record.time)}  {record.description()}")
+
+def to_json(results):
+    """The results in plain JSON form, events as feed entries."""
+    return {engine: {
+        'stats': result['stats'],
+        'summary': result['summary'],
+        'deltas': [dict(record.to_feed(), delta_seconds=delta) for record, _, delta in result['matched']],
+        'missing': [record.to_feed() for record in result['missing']],
+        'extra': [record.to_feed() for record in result['extra']]
+    } for engine, result in results.items()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare engines' events, time and evaluations against the reference feeds.")
+    parser.add_argument('--start', default='2024-12-01', help="start date, YYYY-MM-DD (inside the reference feeds)")
+    parser.add_argument('--end', default='2026-02-01', help="end date, YYYY-MM-DD (exclusive)")
+    parser.add_argument('--ephemeris', nargs='+', choices=EPHEMERIS_BACKENDS, default=[DEFAULT_EPHEMERIS],
+                        help="engines to run; speedups are relative to the first")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"comma-separated stages out of {', '.join(STAGES)}")
+    parser.add_argument('--orb', type=float, default=5)
+    parser.add_argument('--shard-days', type=int, help="run every detector as time shards of this many days")
+    parser.add_argument('--workers', type=int, help="worker processes for the shards; evaluations are only counted with 1")
+    parser.add_argument('--reference', nargs='+', default=REFERENCE_FEEDS, help="feed files to compare against")
+    parser.add_argument('--details', action='store_true', help="print the time delta of every matched event")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    stages = args.stages.split(',')
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    start_date = datetime.strptime(args.start, '%Y-%m-%d')
+    end_date = datetime.strptime(args.end, '%Y-%m-%d')
+
+    results = compare(args.ephemeris, start_date, end_date, stages, args.reference, args.orb, args.shard_days, args.workers)
+    print_report(results, args.details)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(to_json(results), f, indent=1)
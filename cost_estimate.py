@@ -0,0 +1,236 @@
+# cost_estimate.py
+
+from time import perf_counter
+import os
+import tracemalloc
+
+import numpy as np
+
+from utility import get_planet_object, ecliptic_longitude, to_jd, GRID_EPOCH, MINUTE, HOUR
+from signs import PLANET_STEP_SIZES as SIGN_STEP_SIZES
+from aspects import scan_step, SCAN_STEP
+from retrograde import PLANET_STEP_SIZES as RETROGRADE_STEP_SIZES
+from shards import shard_plan
+
+# Mean geocentric motions in degrees per day, for the expected number of events
+MEAN_SPEEDS = {
+    'moon': 13.18,
+    'sun': 0.986,
+    'mercury': 0.986,
+    'venus': 0.986,
+    'mars': 0.524,
+    'jupiter': 0.083,
+    'saturn': 0.034,
+    'uranus': 0.012,
+    'neptune': 0.006,
+    'pluto': 0.004
+}
+
+# Mercury and Venus stay close to the Sun: synodic periods in days (two
+# conjunctions each) and the largest elongation in degrees
+INNER_PLANETS = {'mercury': (115.88, 28), 'venus': (583.92, 47)}
+
+# Stations per year, both directions
+STATIONS_PER_YEAR = {'mercury': 6.3, 'venus': 1.25, 'mars': 0.95, 'jupiter': 1.84,
+                     'saturn': 1.93, 'uranus': 1.99, 'neptune': 1.99, 'pluto': 1.99}
+
+SYNODIC_MONTH = 29.53
+
+# Single-time evaluations per refined aspect: window rate, start/mid/end, about
+# 13 bisection steps and the interpolation check, for each of the two bodies
+ASPECT_REFINE_CALLS = 2 * 18
+
+def bisection_steps(interval, precision=MINUTE):
+    """Iterations of a bisection from interval down to precision (both in days)"""
+    return max(0, int(np.ceil(np.log2(interval / precision))))
+
+def cycles_per_day(planet1, planet2):
+    """How often the separation of two planets goes through all its values"""
+    for inner in INNER_PLANETS:
+        if {planet1, planet2} == {inner, 'sun'}:
+            return 1 / INNER_PLANETS[inner][0]
+    relative = abs(MEAN_SPEEDS.get(planet1, 1) - MEAN_SPEEDS.get(planet2, 1))
+    return max(relative / 360, 1 / 365.25)
+
+def aspect_count(planet1, planet2, angle, days):
+    """Expected exact aspects in days: conjunctions and oppositions once per cycle, other angles twice"""
+    for inner in INNER_PLANETS:
+        if {planet1, planet2} == {inner, 'sun'}:
+            return 2 * days * cycles_per_day(planet1, planet2) if angle <= INNER_PLANETS[inner][1] else 0
+    return days * cycles_per_day(planet1, planet2) * (1 if angle in (0, 180) else 2)
+
+def stage(name, batch, single, peak):
+    """
+    Cost of a stage in ephemeris evaluations of one body at one time.
+    - batch: evaluated in vectorized calls
+    - single: evaluated in scalar calls, one time per call (bisections, refinements)
+    - peak: body-times in the largest vectorized call, which sets the memory use
+    """
+    return {'stage': name, 'batch': int(batch), 'single': int(single), 'peak': int(peak)}
+
+def estimate_aspects(planets, aspect_angles, orb, days, pairs=None, name='aspects'):
+    """Cost of find_all_aspect_periods over days"""
+    if pairs is None:
+        pairs = [(planet1, planet2) for i, planet1 in enumerate(planets) for planet2 in planets[i+1:]]
+    groups = {}
+    for pair in pairs:
+        groups.setdefault(scan_step(*pair, orb), set()).update(pair)
+    batch = peak = single = 0
+    for step, group_planets in groups.items():
+        samples = days / step + 2
+        batch += samples * len(group_planets)
+        peak = max(peak, samples * len(group_planets))
+    for planet1, planet2 in pairs:
+        step = scan_step(planet1, planet2, orb)
+        for angle in aspect_angles:
+            count = aspect_count(planet1, planet2, angle, days)
+            single += count * ASPECT_REFINE_CALLS
+            if step > SCAN_STEP:
+                # Coarse windows are rescanned at SCAN_STEP, over the time spent in the orb
+                in_orb = 2 * orb / 360 / cycles_per_day(planet1, planet2)
+                batch += count * 2 * (in_orb + step) / SCAN_STEP
+    return stage(name, batch, single, peak)
+
+def estimate_ingresses(planet, days):
+    """Cost of get_sign_changes over days"""
+    step = SIGN_STEP_SIZES.get(planet, 1)
+    samples = days / step + 2
+    changes = days * MEAN_SPEEDS.get(planet, 1) / 30
+    return stage(f"ingresses {planet}", samples, changes * bisection_steps(step), samples)
+
+def estimate_stations(planet, days):
+    """Cost of find_retrograde_periods over days"""
+    if planet == 'sun':
+        return stage(f"stations {planet}", 0, 0, 0)
+    step = RETROGRADE_STEP_SIZES.get(planet, 30)
+    samples = days / step + 2
+    stations = days / 365.25 * STATIONS_PER_YEAR.get(planet, 0)
+    # Bisection on three velocities per step over 1.5 steps, a 12-hour interpolation every 5 minutes
+    single = stations * (3 * bisection_steps(1.5 * step) + 2)
+    batch = samples + stations * (12 * HOUR / (5 * MINUTE))
+    return stage(f"stations {planet}", batch, single, samples)
+
+def estimate_moon(days, planets):
+    """Cost of get_moon_events over days; lunar days and phases evaluate the Moon and the Sun"""
+    hourly = days / HOUR + 2
+    lunar_days = stage('moon lunar days', 2 * hourly, 2 * days / SYNODIC_MONTH * 30 * bisection_steps(HOUR), 2 * hourly)
+    three_hourly = days / (3 * HOUR) + 2
+    phases = stage('moon phases', 2 * three_hourly, 2 * days / SYNODIC_MONTH * 4 * bisection_steps(3 * HOUR), 2 * three_hourly)
+    signs = estimate_ingresses('moon', days)
+    signs['stage'] = 'moon sign changes'
+    aspects = estimate_aspects(['moon'] + planets, [0, 60, 90, 120, 180], 2, days,
+                               pairs=[('moon', planet) for planet in planets], name='moon aspects')
+    return [lunar_days, signs, aspects, phases]
+
+def sharded_days(days, shard_days, overlap):
+    """
+    Days a stage computes over days in shards of shard_days overlapping by overlap
+    (a timedelta), and the fraction of them computed by one shard
+    """
+    if shard_days is None:
+        return days, 1
+    shards = len(shard_plan(0, days, shard_days))
+    overlap = overlap.total_seconds() / 86400
+    # Shards next to each other both compute the overlap between them
+    return days + 2 * max(shards - 1, 0) * overlap, min(1, (shard_days + 2 * overlap) / days)
+
+def with_peak(entries, fraction):
+    """Scale the memory of stages to that of the share of their range one call evaluates"""
+    for entry in entries:
+        entry['peak'] = int(entry['peak'] * fraction)
+    return entries
+
+def estimate_calendar(calendar):
+    """
+    Ephemeris evaluations of every Calendar stage for the calendar's range, bodies,
+    aspects and orb, from the detectors' step tables and search precisions.
+
+    With sharding, the overlaps computed twice are included, each stage overlapping
+    by Calendar.shard_overlap, and the memory of a stage is that of one shard.
+
+    Returns:
+    - stages: list of stage() dicts
+    - parallel: number of shards computed at the same time
+    """
+    start, end = to_jd(calendar.start_date), to_jd(calendar.end_date)
+    days = end - start
+    parallel = 1
+    if calendar.shard_days is not None:
+        parallel = min(calendar.workers or os.cpu_count(), len(shard_plan(start, end, calendar.shard_days)))
+    aspect_angles = [angle for angle, name in calendar.aspects]
+
+    def sharded(detector, planet=None):
+        return sharded_days(days, calendar.shard_days, calendar.shard_overlap(detector, planet))
+
+    moon_days, fraction = sharded('moon')
+    stages = with_peak(estimate_moon(moon_days, calendar.planets), fraction)
+    for planet in calendar.planets:
+        planet_days, fraction = sharded('stations', planet)
+        stages += with_peak([estimate_stations(planet, planet_days)], fraction)
+    aspect_days, fraction = sharded('aspects')
+    stages += with_peak([estimate_aspects(calendar.planets, aspect_angles, calendar.orb, aspect_days)], fraction)
+    for planet in calendar.planets:
+        planet_days, fraction = sharded('ingresses', planet)
+        stages += with_peak([estimate_ingresses(planet, planet_days)], fraction)
+    return stages, parallel
+
+def benchmark(samples=5000, single_calls=100):
+    """
+    Time ephemeris evaluations on this machine.
+
+    Returns:
+    - batch_seconds: per body-time in a vectorized call
+    - single_seconds: per scalar call
+    - batch_bytes: peak memory per body-time of a vectorized call
+    """
+    planet_obj = get_planet_object('mars')
+    times = GRID_EPOCH + np.arange(samples) * HOUR
+    ecliptic_longitude(planet_obj, times[:10])  # Warm up the ephemeris segments
+
+    batch_seconds = float('inf')
+    for _ in range(3):
+        started = perf_counter()
+        ecliptic_longitude(planet_obj, times)
+        batch_seconds = min(batch_seconds, (perf_counter() - started) / samples)
+
+    started = perf_counter()
+    for jd in times[:single_calls]:
+        ecliptic_longitude(planet_obj, float(jd))
+    single_seconds = (perf_counter() - started) / single_calls
+
+    tracemalloc.start()
+    ecliptic_longitude(planet_obj, times)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'batch_seconds': batch_seconds, 'single_seconds': single_seconds, 'batch_bytes': peak / samples}
+
+def print_estimate(stages, calibration, workers=1):
+    """
+    Print evaluations, time and memory per stage and in total.
+    The work is spread over workers (parallel shards); every worker holds its own arrays.
+
+    Returns:
+    - estimated seconds of computation, before dividing by workers
+    """
+    print(f"Calibration: {calibration['batch_seconds'] * 1e6:.2f} µs per vectorized evaluation, "
+          f"{calibration['single_seconds'] * 1e3:.2f} ms per scalar call, "
+          f"{calibration['batch_bytes']:.0f} bytes per vectorized evaluation")
+    print(f"{'stage':<22}{'vectorized':>12}{'scalar':>10}{'time':>10}{'memory':>10}")
+    total_seconds = 0
+    peak_bytes = 0
+    for entry in stages:
+        seconds = entry['batch'] * calibration['batch_seconds'] + entry['single'] * calibration['single_seconds']
+        memory = entry['peak'] * calibration['batch_bytes']
+        total_seconds += seconds
+        peak_bytes = max(peak_bytes, memory)
+        print(f"{entry['stage']:<22}{entry['batch']:>12,}{entry['single']:>10,}{format_duration(seconds):>10}{memory / 2**20:>8.1f}MB")
+    print(f"Total: {format_duration(total_seconds)} of computation, about {format_duration(total_seconds / workers)} "
+          f"on {workers} worker(s), peak working memory {peak_bytes * workers / 2**20:.0f} MB")
+    return total_seconds
+
+def format_duration(seconds):
+    if seconds < 120:
+        return f"{seconds:.1f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}min"
+    return f"{seconds / 3600:.1f}h"
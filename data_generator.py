@@ -1,78 +1,695 @@
 # data_generator.py
 
-from skyfield.api import load, load_file, utc
+from skyfield.api import load, utc
 from datetime import datetime, timedelta
+from time import perf_counter
+import argparse
 import json
+import os
+import shutil
+import tracemalloc
 import numpy as np
 
-# Load ephemeris data
+from ephemeris import get_ephemeris, use_ephemeris, EPHEMERIS_BACKENDS
+from angular_velocity import speed_profiles
+from retrograde import PLANET_VELOCITY_THRESHOLDS
+from events import record_from_feed, KIND_NAMES
+
 ts = load.timescale()
-eph = load_file('de442.bsp')
 
 # Define planets and their properties
 PLANETS = {
-    'sun': {'id': 'sun', 'color': 0xffff00, 'size': 20},
-    'mercury': {'id': 'mercury barycenter', 'color': 0x8c8c8c, 'size': 5},
-    'venus': {'id': 'venus barycenter', 'color': 0xffa500, 'size': 8},
-    'earth': {'id': 'earth', 'color': 0x0000ff, 'size': 9},
-    'moon': {'id': 'moon', 'color': 0xd3d3d3, 'size': 2},
-    'mars': {'id': 'mars barycenter', 'color': 0xff4500, 'size': 7},
-    'jupiter': {'id': 'jupiter barycenter', 'color': 0xffd700, 'size': 15},
-    'saturn': {'id': 'saturn barycenter', 'color': 0xf0e68c, 'size': 13},
-    'uranus': {'id': 'uranus barycenter', 'color': 0x00ffff, 'size': 11},
-    'neptune': {'id': 'neptune barycenter', 'color': 0x00008b, 'size': 10},
-    'pluto': {'id': 'pluto barycenter', 'color': 0xa9a9a9, 'size': 3}
+    'sun': {'color': 0xffff00, 'size': 20},
+    'mercury': {'color': 0x8c8c8c, 'size': 5},
+    'venus': {'color': 0xffa500, 'size': 8},
+    'earth': {'color': 0x0000ff, 'size': 9},
+    'moon': {'color': 0xd3d3d3, 'size': 2},
+    'mars': {'color': 0xff4500, 'size': 7},
+    'jupiter': {'color': 0xffd700, 'size': 15},
+    'saturn': {'color': 0xf0e68c, 'size': 13},
+    'uranus': {'color': 0x00ffff, 'size': 11},
+    'neptune': {'color': 0x00008b, 'size': 10},
+    'pluto': {'color': 0xa9a9a9, 'size': 3}
 }
 
-FAST_MOVERS = ['moon', 'mercury', 'venus']
+# Candidate sample spacings in seconds, from 15 minutes up to 16 days.
+# Each body gets the coarsest one whose interpolation error stays in tolerance.
+CANDIDATE_STEPS = [
+    900, 1800, 3600, 2 * 3600, 3 * 3600, 6 * 3600, 12 * 3600,
+    86400, 2 * 86400, 4 * 86400, 8 * 86400, 16 * 86400
+]
+
+# Default accuracy target for the frontend's linear interpolation
+DEFAULT_TOLERANCE_DEG = 0.01
+
+# Length of the time blocks computed and written at once by stream_positions
+CHUNK_DAYS = 30
+
+# Maximum deviation in AU of each orbit path level of detail, finest first
+ORBIT_LOD_TOLERANCES = [0.0001, 0.001, 0.01, 0.1]
+
+# Interpolation tolerance of the finest tier: about 7 seconds of the Moon's mean
+# motion, so interpolated positions are right to the minute
+MINUTE_TOLERANCE_DEG = 0.001
+
+# Progressive loading tiers of the widget, coarsest first, as (name, step_seconds, tolerance_deg).
+# The first tier is one file for the whole range, the others one file per month.
+# Fixed-step tiers are never finer than a body's adaptive cadence, which already
+# meets the generator's tolerance; tolerance tiers choose their own cadence.
+POSITION_TIERS = [('daily', 86400, None), ('hourly', 3600, None), ('minute', None, MINUTE_TOLERANCE_DEG)]
+TIER_DIR = 'tiers'
+
+# Event feeds split into monthly files for the widget, by manifest key
+EVENT_FEEDS = {'events': 'events_feed.json', 'moon_events': 'moon_events_feed.json'}
+EVENTS_DIR = 'events'
+
+# Longitude rate profiles for the widget's retrograde shading: one float32 per
+# body and step. Mercury takes about a day to pass through a station, so six
+# hours resolve the slowdown without making the file noticeably larger.
+SPEED_STEP_SECONDS = 6 * 3600
+SPEEDS_FILE = 'speeds.bin'
+
+# Event density pyramid for the timeline overview: event counts per kind in
+# day, week (from Monday) and month buckets. Buckets are numbered from 1970
+# and grouped into tiles of DENSITY_TILE_BUCKETS, addressed like map tiles by
+# level and tile index, so any zoom level of a view is one or two small fetches.
+DENSITY_LEVELS = ['day', 'week', 'month']
+DENSITY_TILE_BUCKETS = 512
+DENSITY_DIR = 'density'
+
+# Days at the start of the range on which --dry-run probes each body's cadence and
+# tolerance tiers choose theirs; they span an anomalistic month of the Moon, the
+# body whose speed varies most
+PROBE_DAYS = 31
+
+# Bytes held per sample when positions are kept as Python lists of [x, y, z]:
+# the list and its slot in the outer list plus three float objects
+PYTHON_SAMPLE_BYTES = 160
+
+def sample_count(start_date, end_date, step_seconds):
+    """Number of samples from start_date to end_date (inclusive) every step_seconds."""
+    span = (end_date - start_date).total_seconds()
+    return int(np.ceil(span / step_seconds)) + 1
+
+def sample_times(start_date, step_seconds, first, count):
+    """Return a Skyfield Time array for samples first..first+count-1 of the grid starting at start_date."""
+    offsets = (first + np.arange(count)) * float(step_seconds)
+    return ts.utc(start_date.year, start_date.month, start_date.day,
+                  start_date.hour, start_date.minute, start_date.second + offsets)
+
+def chunk_size(step_seconds, chunk_days):
+    """Number of samples per chunk so that a chunk spans about chunk_days."""
+    return max(2, int(chunk_days * 86400 // step_seconds))
+
+def body_positions(name, t):
+    """Geocentric ecliptic [x, y, z] in AU for a body at every time in t, shape (n, 3)."""
+    ephemeris = get_ephemeris()
+    return ephemeris.ecliptic_xyz(ephemeris.body(name), t.tt).T
+
+def iter_position_chunks(name, start_date, step_seconds, count, chunk_days=None):
+    """
+    Yield (first_index, xyz) blocks of a body's samples, at most chunk_days long each.
+    With chunk_days=None all samples come in a single block.
+    """
+    size = count if chunk_days is None else chunk_size(step_seconds, chunk_days)
+    for first in range(0, count, size):
+        t = sample_times(start_date, step_seconds, first, min(size, count - first))
+        yield first, np.round(body_positions(name, t), 6)
+
+def interpolation_error(name, start_date, end_date, step_seconds, chunk_days=None):
+    """
+    Estimate the worst linear interpolation error for a body sampled every step_seconds.
+
+    The body is sampled at half the candidate spacing; the distance between every
+    odd sample and the midpoint of its even neighbours is the error the frontend
+    makes at the middle of each interval, where the path's curvature bends it most.
+    With chunk_days set the range is scanned in blocks that share their boundary sample.
+
+    Returns:
+    - (max error in AU, max error in degrees as seen from Earth)
+    """
+    half_step = step_seconds / 2
+    count = sample_count(start_date, end_date, half_step)
+    if count % 2 == 0:
+        count += 1  # Finish on a full interval past end_date
+    size = count if chunk_days is None else chunk_size(half_step, chunk_days)
+    size += size % 2
+    max_au = max_deg = 0.0
+    for first in range(0, count - 1, size):
+        xyz = body_positions(name, sample_times(start_date, half_step, first, min(size, count - 1 - first) + 1))
+        chord_mid = (xyz[:-2:2] + xyz[2::2]) / 2
+        actual = xyz[1::2]
+        error_au = np.linalg.norm(actual - chord_mid, axis=1)
+        distance = np.linalg.norm(actual, axis=1)
+        error_deg = np.degrees(np.divide(error_au, distance, out=np.zeros_like(error_au), where=distance > 0))
+        max_au = max(max_au, float(error_au.max()))
+        max_deg = max(max_deg, float(error_deg.max()))
+    return max_au, max_deg
+
+def choose_step(name, start_date, end_date, tolerance_au=None, tolerance_deg=None, chunk_days=None):
+    """
+    Pick the coarsest candidate spacing that keeps a body's interpolation error in tolerance.
+
+    Returns:
+    - (step_seconds, max_error_au, max_error_deg)
+    """
+    for step in reversed(CANDIDATE_STEPS):
+        error_au, error_deg = interpolation_error(name, start_date, end_date, step, chunk_days)
+        if tolerance_au is not None and error_au > tolerance_au:
+            continue
+        if tolerance_deg is not None and error_deg > tolerance_deg:
+            continue
+        return step, error_au, error_deg
+    return step, error_au, error_deg
+
+def new_manifest(start_date, end_date, tolerance_au, tolerance_deg):
+    """Manifest header for a generated range; bodies are filled in by plan_body."""
+    return {
+        'start': start_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'end': end_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'tolerance': {'au': tolerance_au, 'deg': tolerance_deg},
+        'ephemeris': get_ephemeris().name,
+        'bodies': {}
+    }
+
+def plan_body(manifest, name, start_date, end_date, tolerance_au, tolerance_deg, chunk_days=None):
+    """Choose a body's cadence and record it in the manifest; returns (step_seconds, count)."""
+    step, error_au, error_deg = choose_step(name, start_date, end_date, tolerance_au, tolerance_deg, chunk_days)
+    count = sample_count(start_date, end_date, step)
+    manifest['bodies'][name] = {
+        'step_seconds': step,
+        'count': count,
+        'max_error_au': error_au,
+        'max_error_deg': error_deg
+    }
+    print(f"Sampling {count} positions for {name} every {timedelta(seconds=step)} "
+          f"(max error {error_au:.2e} AU, {error_deg:.2e} deg)")
+    return step, count
 
-def generate_positions(start_date, end_date):
+def generate_positions(start_date, end_date, tolerance_au=None, tolerance_deg=DEFAULT_TOLERANCE_DEG):
     """
-    Generates planetary positions at hybrid intervals.
-    - Hourly for fast movers (Moon, Mercury, Venus).
-    - Daily for others.
+    Generates planetary positions at an adaptive interval per body.
+    - Each body is sampled at the coarsest spacing whose linear interpolation
+      error stays below tolerance_au (AU) and/or tolerance_deg (degrees from Earth).
+    - Everything is held in memory; use stream_positions for multi-decade ranges.
+
+    Returns:
+    - positions: {body: [[x, y, z], ...]} sampled from start_date every step_seconds
+    - manifest: date range, tolerance and the actual cadence chosen for each body
     """
     print("Generating positional data...")
     positions = {}
+    manifest = new_manifest(start_date, end_date, tolerance_au, tolerance_deg)
 
-    # Daily interval for slow movers
-    current_date = start_date
-    while current_date <= end_date:
-        t = ts.utc(current_date)
-        date_str = current_date.strftime('%Y-%m-%d')
-        positions[date_str] = {}
-        for name, planet in PLANETS.items():
-            if name not in FAST_MOVERS:
-                astro = eph['earth'].at(t).observe(eph[planet['id']])
-                x, y, z = astro.ecliptic_xyz().au
-                positions[date_str][name] = [round(x, 6), round(y, 6), round(z, 6)]
-        current_date += timedelta(days=1)
-        print(f"Generated daily positions for {date_str}")
-
-    # Hourly interval for fast movers
-    current_date = start_date
-    while current_date <= end_date:
-        t = ts.utc(current_date)
-        date_str = current_date.strftime('%Y-%m-%d %H:%M:%S')
-        positions[date_str] = {}
-        for name in FAST_MOVERS:
-            planet = PLANETS[name]
-            astro = eph['earth'].at(t).observe(eph[planet['id']])
-            x, y, z = astro.ecliptic_xyz().au
-            positions[date_str][name] = [round(x, 6), round(y, 6), round(z, 6)]
-        current_date += timedelta(hours=1)
-        print(f"Generated hourly positions for {date_str}")
+    for name in PLANETS:
+        step, count = plan_body(manifest, name, start_date, end_date, tolerance_au, tolerance_deg)
+        _, xyz = next(iter_position_chunks(name, start_date, step, count))
+        positions[name] = xyz.tolist()
 
     print("Finished generating positional data.")
-    return positions
+    return positions, manifest
+
+def stream_positions(start_date, end_date, path, array_path, tolerance_au=None, tolerance_deg=DEFAULT_TOLERANCE_DEG,
+                     chunk_days=CHUNK_DAYS, orbit_tolerances=ORBIT_LOD_TOLERANCES):
+    """
+    Streaming variant of generate_positions for ranges too long to hold in memory.
+
+    Positions are computed in blocks of chunk_days, appended to the JSON file at
+    path (same layout as positions.json) and to the binary asset at array_path
+    (same layout as write_position_arrays), fed to the orbit path decimation and
+    then released, so peak memory does not grow with the length of the range.
+
+    Returns:
+    - manifest: as from generate_positions, with the 'samples' index of array_path
+    - orbit_arrays, orbit_levels: as from generate_orbit_paths
+    """
+    print(f"Streaming positional data to {path} and {array_path} in {chunk_days}-day chunks...")
+    manifest = new_manifest(start_date, end_date, tolerance_au, tolerance_deg)
+    samples = {}
+    paths = {}
+
+    with open(path, 'w') as f, open(array_path, 'wb') as arrays:
+        f.write('{')
+        for i, name in enumerate(PLANETS):
+            step, count = plan_body(manifest, name, start_date, end_date, tolerance_au, tolerance_deg, chunk_days)
+            f.write((', ' if i else '') + json.dumps(name) + ': [')
+            samples[name] = {'offset': align_binary_asset(arrays), 'dtype': 'float64', 'shape': [count, 3]}
+            for first, xyz in iter_position_chunks(name, start_date, step, count, chunk_days):
+                f.write((', ' if first else '') + json.dumps(xyz.tolist())[1:-1])
+                arrays.write(little_endian(xyz.astype(np.float64)).tobytes())
+                if name != 'earth':
+                    times = (first + np.arange(len(xyz))) * float(step)
+                    paths.setdefault(name, [[] for _ in orbit_tolerances])
+                    for blocks, tolerance in zip(paths[name], orbit_tolerances):
+                        extend_orbit_path(blocks, xyz, times, tolerance)
+            f.write(']')
+        f.write('}')
+    manifest['samples'] = {'file': os.path.basename(array_path), 'bodies': samples}
+
+    print("Finished streaming positional data.")
+    return (manifest, *orbit_path_assets(paths, orbit_tolerances))
+
+def simplify_path(points, tolerance):
+    """
+    Douglas-Peucker simplification of a 3D polyline.
+
+    Returns:
+    - indices of the points to keep; no dropped point lies farther than
+      tolerance from the simplified polyline
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a = points[first]
+        ab = points[last] - a
+        inner = points[first + 1:last] - a
+        length_sq = ab @ ab
+        if length_sq > 0:
+            u = np.clip(inner @ ab / length_sq, 0.0, 1.0)
+            inner = inner - u[:, None] * ab
+        distance = np.linalg.norm(inner, axis=1)
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+def little_endian(array):
+    data = np.ascontiguousarray(array)
+    return data.astype(data.dtype.newbyteorder('<'), copy=False)
+
+def align_binary_asset(f):
+    """Pad an open binary asset to the next 8-byte boundary; returns the offset of the next block."""
+    f.write(b'\0' * (-f.tell() % 8))
+    return f.tell()
+
+def write_binary_asset(path, arrays):
+    """
+    Write named arrays back to back into one little-endian binary file.
+
+    Every block starts on an 8-byte boundary so the frontend can view it
+    directly with a typed array (new Float32Array(buffer, offset, length))
+    and Python can map it with numpy (see PositionStore).
+
+    Returns:
+    - index: {name: {'offset', 'dtype', 'shape'}} describing each block
+    """
+    index = {}
+    with open(path, 'wb') as f:
+        for name, array in arrays.items():
+            data = little_endian(array)
+            index[name] = {'offset': align_binary_asset(f), 'dtype': data.dtype.name, 'shape': list(data.shape)}
+            f.write(data.tobytes())
+    return index
+
+def write_position_arrays(path, positions, manifest):
+    """Write each body's samples as an (n, 3) float64 block and record the index as manifest['samples']."""
+    index = write_binary_asset(path, {name: np.asarray(samples, dtype=np.float64) for name, samples in positions.items()})
+    manifest['samples'] = {'file': os.path.basename(path), 'bodies': index}
+
+def extend_orbit_path(blocks, points, times, tolerance):
+    """
+    Append a chunk of samples to a decimated orbit path kept as a list of (n, 4) blocks.
+
+    The chunk is simplified together with the last vertex already in the path,
+    which Douglas-Peucker always keeps, so the error bound holds across chunks.
+    """
+    chunk = np.column_stack([points, times])
+    if blocks:
+        chunk = np.vstack([blocks[-1][-1:], chunk])
+    kept = chunk[simplify_path(chunk[:, :3], tolerance)]
+    blocks.append(kept[1:] if blocks else kept)
+
+def orbit_path_assets(paths, tolerances):
+    """Turn {body: [blocks per level]} into arrays for write_binary_asset and per-body level metadata."""
+    arrays = {}
+    levels = {}
+    for name, body_paths in paths.items():
+        levels[name] = []
+        for level, (blocks, tolerance) in enumerate(zip(body_paths, tolerances)):
+            key = f"{name}/{level}"
+            arrays[key] = np.vstack(blocks).astype(np.float32)
+            levels[name].append({'tolerance_au': tolerance, 'key': key, 'count': len(arrays[key])})
+        print(f"Generated orbit path for {name}: " + ', '.join(str(l['count']) for l in levels[name]) + " vertices")
+    return arrays, levels
+
+def generate_orbit_paths(positions, manifest, tolerances=ORBIT_LOD_TOLERANCES):
+    """
+    Decimate each body's geocentric path into several levels of detail.
+
+    Every vertex is [x, y, z, t] as float32, where t is seconds since the
+    manifest start, so the renderer can limit drawing to a time span.
+
+    Returns:
+    - arrays: {'<body>/<level>': (n, 4) float32 array} for write_binary_asset
+    - levels: {body: [{'tolerance_au', 'key', 'count'}, ...]} finest first
+    """
+    print("Generating orbit paths...")
+    paths = {}
+    for name, samples in positions.items():
+        if name == 'earth':
+            continue  # Geocentric origin, there is no path to draw
+        points = np.asarray(samples, dtype=float)
+        times = np.arange(len(points)) * float(manifest['bodies'][name]['step_seconds'])
+        paths[name] = [[] for _ in tolerances]
+        for blocks, tolerance in zip(paths[name], tolerances):
+            extend_orbit_path(blocks, points, times, tolerance)
+    return orbit_path_assets(paths, tolerances)
+
+def month_pieces(start_date, end_date):
+    """Calendar-month pieces (piece_start, piece_end) from start_date to end_date, clipped to the range."""
+    piece_start = start_date
+    while piece_start <= end_date:
+        year, month = divmod(piece_start.month, 12)
+        piece_end = piece_start.replace(year=piece_start.year + year, month=month + 1, day=1,
+                                        hour=0, minute=0, second=0, microsecond=0)
+        yield piece_start, min(piece_end, end_date)
+        piece_start = piece_end
+
+def reset_dir(path):
+    """Remove files of a previous run so no stale pieces get deployed."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+def generate_position_tiers(start_date, end_date, manifest, out_dir=TIER_DIR, tiers=POSITION_TIERS):
+    """
+    Write the progressive loading tiers and record them as manifest['tiers'].
+
+    Each piece is a binary asset of float32 (n, 3) blocks per body; 'first' is
+    the index of the block's first sample on the tier's grid, which starts at
+    the manifest start. Pieces include the samples just outside their range so
+    they can be interpolated up to both ends. A body is left out of a tier
+    that would not be finer than the previous one. Tolerance tiers choose their
+    cadence on the first PROBE_DAYS, like estimate_positions.
+    """
+    print(f"Generating position tiers in {out_dir}/...")
+    reset_dir(out_dir)
+    probe_end = min(end_date, start_date + timedelta(days=PROBE_DAYS))
+    manifest['tiers'] = []
+    previous_steps = {}
+    for level, (tier, tier_step, tolerance_deg) in enumerate(tiers):
+        steps = {}
+        for name, body in manifest['bodies'].items():
+            if tier_step is not None:
+                step = max(tier_step, body['step_seconds'])
+            else:
+                step, _, _ = choose_step(name, start_date, probe_end, tolerance_deg=tolerance_deg)
+            if step < previous_steps.get(name, float('inf')):
+                steps[name] = step
+        previous_steps.update(steps)
+        if not steps:
+            continue
+
+        entry = {'name': tier, 'steps': steps, 'pieces': []}
+        pieces = [(start_date, end_date)] if level == 0 else month_pieces(start_date, end_date)
+        for piece_start, piece_end in pieces:
+            start_seconds = (piece_start - start_date).total_seconds()
+            end_seconds = (piece_end - start_date).total_seconds()
+            arrays = {}
+            firsts = {}
+            for name, step in steps.items():
+                first = int(start_seconds // step)
+                last = min(sample_count(start_date, end_date, step) - 1, int(np.ceil(end_seconds / step)))
+                t = sample_times(start_date, step, first, last - first + 1)
+                arrays[name] = body_positions(name, t).astype(np.float32)
+                firsts[name] = first
+
+            file = f"{tier}.bin" if level == 0 else f"{tier}-{piece_start:%Y-%m}.bin"
+            index = write_binary_asset(os.path.join(out_dir, file), arrays)
+            for name, block in index.items():
+                block['first'] = firsts[name]
+            entry['pieces'].append({'file': f"{out_dir}/{file}", 'start': start_seconds, 'end': end_seconds, 'bodies': index})
+        manifest['tiers'].append(entry)
+        print(f"Tier {tier}: {len(steps)} bodies in {len(entry['pieces'])} files")
+
+def generate_speed_profiles(start_date, end_date, manifest, path=SPEEDS_FILE, step_seconds=SPEED_STEP_SECONDS):
+    """
+    Write every body's ecliptic longitude rate in degrees per day as a float32
+    block of speeds.bin, sampled every step_seconds from the manifest start, and
+    record it as manifest['speeds']. Planets also get the rate below which the
+    station detector considers them stationary ('stationary', degrees per day).
+    """
+    print("Generating speed profiles...")
+    bodies = [name for name in manifest['bodies'] if name != 'earth']
+    t = sample_times(start_date, step_seconds, 0, sample_count(start_date, end_date, step_seconds))
+    index = write_binary_asset(path, speed_profiles(bodies, t.tt))
+    for name, block in index.items():
+        if name in PLANET_VELOCITY_THRESHOLDS:
+            block['stationary'] = PLANET_VELOCITY_THRESHOLDS[name]['stationary']
+    manifest['speeds'] = {'file': os.path.basename(path), 'step_seconds': step_seconds, 'bodies': index}
+    print(f"Speed profiles: {len(bodies)} bodies x {len(t)} samples")
+
+def split_event_feeds(out_dir=EVENTS_DIR, feeds=EVENT_FEEDS):
+    """
+    Split the event feeds into one JSON file per calendar month.
+
+    Point events go to the month of their time; periods go to every month they
+    overlap, so the widget may see a period in two months. Missing feeds are skipped.
+
+    Returns:
+    - [{'month': 'YYYY-MM', 'file', 'count'}, ...] in chronological order
+    """
+    print(f"Splitting event feeds into {out_dir}/...")
+    reset_dir(out_dir)
+    months = {}
+    for key, path in feeds.items():
+        if not os.path.exists(path):
+            print(f"Skipping {path}: not generated yet")
+            continue
+        with open(path) as f:
+            feed = json.load(f) or []
+        for event in feed:
+            start = datetime.fromisoformat(event.get('datetime_start', event['datetime'])[:19])
+            end = datetime.fromisoformat(event['datetime_end'][:19]) - timedelta(seconds=1) if 'datetime_end' in event else start
+            for piece_start, _ in month_pieces(start, max(start, end)):
+                month = months.setdefault(f"{piece_start:%Y-%m}", {name: [] for name in feeds})
+                month[key].append(event)
+
+    index = []
+    for month in sorted(months):
+        file = f"{month}.json"
+        with open(os.path.join(out_dir, file), 'w') as f:
+            json.dump(months[month], f)
+        index.append({'month': month, 'file': f"{out_dir}/{file}", 'count': sum(map(len, months[month].values()))})
+    print(f"Wrote events for {len(index)} months")
+    return index
+
+def density_buckets(seconds, level):
+    """Global bucket numbers of epoch seconds (an int64 array) at a density level."""
+    if level == 'day':
+        return seconds // 86400
+    if level == 'week':
+        return (seconds - 4 * 86400) // (7 * 86400)  # 1970-01-05 was the first Monday
+    return seconds.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+
+def generate_event_density(out_dir=DENSITY_DIR, feeds=EVENT_FEEDS, levels=DENSITY_LEVELS):
+    """
+    Count the feeds' events per bucket and kind at every level and write the
+    non-empty tiles as (DENSITY_TILE_BUCKETS, kinds) uint16 binary assets.
+    Periods (lunar days) count in the bucket of their start. Missing feeds are skipped.
+
+    Returns:
+    - {'kinds', 'tile_buckets', 'levels': [{'name', 'tiles': [{'index', 'file', 'max'}, ...]}, ...]}
+      where max is the largest event count of a bucket in the tile
+    """
+    print(f"Generating event density tiles in {out_dir}/...")
+    reset_dir(out_dir)
+    records = []
+    for path in feeds.values():
+        if os.path.exists(path):
+            with open(path) as f:
+                records.extend(record_from_feed(event) for event in json.load(f) or [])
+    times = np.array([record.time for record in records], dtype=np.int64)
+    kinds = np.array([record.kind for record in records], dtype=np.int64)
+
+    density = {'kinds': KIND_NAMES, 'tile_buckets': DENSITY_TILE_BUCKETS, 'levels': []}
+    for level in levels:
+        buckets = density_buckets(times, level)
+        tiles = []
+        for tile in np.unique(buckets // DENSITY_TILE_BUCKETS):
+            inside = buckets // DENSITY_TILE_BUCKETS == tile
+            counts = np.zeros((DENSITY_TILE_BUCKETS, len(KIND_NAMES)), dtype=np.uint16)
+            np.add.at(counts, (buckets[inside] - tile * DENSITY_TILE_BUCKETS, kinds[inside]), 1)
+            file = f"{level}-{tile}.bin"
+            write_binary_asset(os.path.join(out_dir, file), {'counts': counts})
+            tiles.append({'index': int(tile), 'file': f"{out_dir}/{file}", 'max': int(counts.sum(axis=1).max())})
+        density['levels'].append({'name': level, 'tiles': tiles})
+        print(f"Density level {level}: {len(tiles)} tiles")
+    return density
+
+def benchmark_positions(samples=5000, calls=50):
+    """
+    Time position evaluations and their JSON serialization on this machine.
+
+    Returns:
+    - sample_seconds: per body-time in a vectorized body_positions call
+    - call_seconds: fixed cost of one body_positions call
+    - write_seconds: per sample written to positions.json
+    - sample_bytes: peak memory per body-time of a vectorized call
+    """
+    start_date = datetime(2000, 1, 1, tzinfo=utc)
+    t = sample_times(start_date, 3600, 0, samples)
+    body_positions('mars', t[:10])  # Warm up the ephemeris segments
+
+    started = perf_counter()
+    for _ in range(calls):
+        body_positions('mars', t[:1])
+    call_seconds = (perf_counter() - started) / calls
+
+    sample_seconds = float('inf')
+    for _ in range(3):
+        started = perf_counter()
+        xyz = body_positions('mars', t)
+        sample_seconds = min(sample_seconds, (perf_counter() - started - call_seconds) / samples)
+
+    started = perf_counter()
+    json.dumps(np.round(xyz, 6).tolist())
+    write_seconds = (perf_counter() - started) / samples
+
+    tracemalloc.start()
+    body_positions('mars', t)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'sample_seconds': sample_seconds, 'call_seconds': call_seconds,
+            'write_seconds': write_seconds, 'sample_bytes': peak / samples}
+
+def call_count(count, step_seconds, chunk_days):
+    """Number of body_positions calls for count samples, one per chunk or one for all."""
+    return 1 if chunk_days is None else -(-count // chunk_size(step_seconds, chunk_days))
+
+def probe_evaluations(start_date, end_date, step, chunk_days=None):
+    """(evaluations, calls) choose_step makes over the whole range before settling on step."""
+    evaluations = calls = 0
+    for candidate in CANDIDATE_STEPS:
+        if candidate >= step:
+            count = sample_count(start_date, end_date, candidate / 2) + 1
+            evaluations += count
+            calls += call_count(count, candidate / 2, chunk_days)
+    return evaluations, calls
+
+def estimate_positions(start_date, end_date, tolerance_au=None, tolerance_deg=DEFAULT_TOLERANCE_DEG,
+                       stream=False, chunk_days=CHUNK_DAYS, tiers=POSITION_TIERS):
+    """
+    Estimate the work of a data_generator run without computing the range.
+
+    Cadences are chosen on the first PROBE_DAYS only; a longer range can need a
+    finer one where a body moves faster, so the estimate is a lower bound there.
+    Tolerance tiers are chosen on the same window by the real run, so their
+    cadences and probes match it.
+
+    Returns:
+    - [{'body', 'step', 'probe', 'samples', 'tiers', 'calls', 'peak'}, ...] where
+      probe, samples and tiers count body-times, calls the body_positions calls
+      and peak is the largest vectorized call
+    """
+    probe_end = min(end_date, start_date + timedelta(days=PROBE_DAYS))
+    months = len(list(month_pieces(start_date, end_date)))
+    body_chunk_days = chunk_days if stream else None
+    rows = []
+    for name in PLANETS:
+        step, _, _ = choose_step(name, start_date, probe_end, tolerance_au, tolerance_deg)
+        probe, calls = probe_evaluations(start_date, end_date, step, body_chunk_days)
+        samples = sample_count(start_date, end_date, step)
+        calls += call_count(samples, step, body_chunk_days)
+
+        tier_samples = 0
+        previous = float('inf')
+        for level, (_, tier_step, tier_tolerance) in enumerate(tiers):
+            if tier_step is not None:
+                body_step = max(tier_step, step)
+            else:
+                body_step, _, _ = choose_step(name, start_date, probe_end, tolerance_deg=tier_tolerance)
+                tier_probe, tier_calls = probe_evaluations(start_date, probe_end, body_step)
+                probe += tier_probe
+                calls += tier_calls
+            if body_step < previous:
+                tier_samples += sample_count(start_date, end_date, body_step)
+                calls += 1 if level == 0 else months
+                previous = body_step
+
+        # The finest candidate tried is scanned at half its spacing in one call unless streaming
+        peak = sample_count(start_date, end_date, step / 2)
+        if stream:
+            peak = min(peak, chunk_size(step / 2, chunk_days) + 1)
+        rows.append({'body': name, 'step': step, 'probe': probe, 'samples': samples,
+                     'tiers': tier_samples, 'calls': calls, 'peak': peak})
+    return rows
+
+def print_position_estimate(rows, calibration, stream=False):
+    """Print evaluations, time and memory per body and in total; returns the estimated seconds."""
+    print(f"Calibration: {calibration['sample_seconds'] * 1e6:.2f} µs per evaluation, "
+          f"{calibration['call_seconds'] * 1e3:.2f} ms per call, "
+          f"{calibration['write_seconds'] * 1e6:.2f} µs per JSON sample, "
+          f"{calibration['sample_bytes']:.0f} bytes per evaluation")
+    print(f"{'body':<10}{'step':>16}{'probe':>12}{'samples':>12}{'tiers':>12}{'calls':>8}{'time':>10}")
+    total_seconds = 0
+    for row in rows:
+        seconds = ((row['probe'] + row['samples'] + row['tiers']) * calibration['sample_seconds']
+                   + row['calls'] * calibration['call_seconds'] + row['samples'] * calibration['write_seconds'])
+        total_seconds += seconds
+        print(f"{row['body']:<10}{str(timedelta(seconds=row['step'])):>16}{row['probe']:>12,}"
+              f"{row['samples']:>12,}{row['tiers']:>12,}{row['calls']:>8,}{seconds:>9.1f}s")
+
+    working = max(row['peak'] for row in rows) * calibration['sample_bytes']
+    held = 0 if stream else sum(row['samples'] for row in rows) * PYTHON_SAMPLE_BYTES
+    print(f"Total: {total_seconds:.1f}s of ephemeris work and serialization, "
+          f"peak working memory {working / 2**20:.1f} MB"
+          + ("" if stream else f" plus {held / 2**20:.0f} MB of positions held in memory"))
+    print("Orbit path simplification and event feed splitting are not included.")
+    return total_seconds
 
 if __name__ == '__main__':
-    start = datetime(2024, 1, 1, tzinfo=utc)
-    end = datetime(2024, 12, 31, 23, 59, 59, tzinfo=utc)
+    parser = argparse.ArgumentParser(description="Generate planetary positions and orbit paths for the visualizer.")
+    parser.add_argument('--start', default='2024-01-01', help="first day, YYYY-MM-DD (UTC)")
+    parser.add_argument('--end', default='2024-12-31', help="last day, YYYY-MM-DD (UTC), included")
+    parser.add_argument('--stream', action='store_true', help="write positions chunk by chunk with constant memory")
+    parser.add_argument('--chunk-days', type=int, default=CHUNK_DAYS, help="chunk length for --stream")
+    parser.add_argument('--dry-run', action='store_true', help="estimate evaluations, time and memory without generating")
+    parser.add_argument('--ephemeris', choices=EPHEMERIS_BACKENDS,
+                        help="position backend; 'analytic' needs no JPL kernel and is accurate to arcminutes")
+    args = parser.parse_args()
+    if args.ephemeris:
+        use_ephemeris(args.ephemeris)
+
+    start = datetime.strptime(args.start, '%Y-%m-%d').replace(tzinfo=utc)
+    end = datetime.strptime(args.end, '%Y-%m-%d').replace(hour=23, minute=59, second=59, tzinfo=utc)
+
+    if args.dry_run:
+        print_position_estimate(estimate_positions(start, end, stream=args.stream, chunk_days=args.chunk_days),
+                                benchmark_positions(), args.stream)
+        raise SystemExit
+
+    if args.stream:
+        manifest, orbit_arrays, orbit_levels = stream_positions(start, end, 'positions.json', 'positions.bin',
+                                                                chunk_days=args.chunk_days)
+    else:
+        position_data, manifest = generate_positions(start, end)
+
+        with open('positions.json', 'w') as f:
+            json.dump(position_data, f)
+        write_position_arrays('positions.bin', position_data, manifest)
+
+        orbit_arrays, orbit_levels = generate_orbit_paths(position_data, manifest)
+
+    orbit_index = write_binary_asset('orbits.bin', orbit_arrays)
+    for name, body_levels in orbit_levels.items():
+        for level in body_levels:
+            level.update(orbit_index[level.pop('key')])
+    manifest['orbits'] = {'file': 'orbits.bin', 'bodies': orbit_levels}
 
-    position_data = generate_positions(start, end)
+    generate_position_tiers(start, end, manifest)
+    generate_speed_profiles(start, end, manifest)
+    manifest['events'] = {'months': split_event_feeds()}
+    manifest['density'] = generate_event_density()
 
-    with open('positions.json', 'w') as f:
-        json.dump(position_data, f)
+    with open('positions_manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
 
-    print("\nSuccessfully saved positions to positions.json")
+    print("\nSuccessfully saved positions to positions.json, positions.bin, orbits.bin, speeds.bin, tiers/, events/, density/ and positions_manifest.json")
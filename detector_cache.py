@@ -0,0 +1,274 @@
+# detector_cache.py
+
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+import argparse
+import json
+import os
+import re
+import time
+
+from ephemeris import get_ephemeris
+from events import record_from_row, clip_records, parse_epoch, format_epoch
+
+# Bump when a detector changes its results, so older entries stop matching
+CACHE_VERSION = 3
+CACHE_DIR = '.detector_cache'
+CACHE_SIZE_LIMIT = 200 * 1024 * 1024  # Bytes
+
+# Segment files are named <start>_<end>.json in epoch seconds
+SEGMENT_NAME = re.compile(r'^(-?\d+)_(-?\d+)\.json$')
+
+class DetectorCache:
+    """
+    On-disk cache of detector results (EventRecords), content-addressed by the
+    detector, its bodies and parameters, the cache version and the ephemeris
+    file's hash (the backend's name when it has no file).
+
+    Every key is a directory of segments, each holding the records of one
+    computed [start, end) range. A request only computes the parts of its range
+    no segment covers. Segments are evicted least recently used first once the
+    cache grows past size_limit bytes.
+    """
+    def __init__(self, path=CACHE_DIR, size_limit=CACHE_SIZE_LIMIT, ephemeris_path=None):
+        self.path = path
+        self.size_limit = size_limit
+        os.makedirs(path, exist_ok=True)
+        backend = get_ephemeris()
+        if ephemeris_path or backend.path:
+            self.ephemeris = ephemeris_hash(ephemeris_path or backend.path, path)
+        else:
+            self.ephemeris = backend.name  # Analytic backends have no file to hash
+
+    def key(self, detector, bodies, params):
+        """Returns (key, description) of a detector configuration."""
+        description = {
+            'version': CACHE_VERSION,
+            'detector': detector,
+            'bodies': list(bodies),
+            'params': params,
+            'ephemeris': self.ephemeris
+        }
+        return sha256(json.dumps(description, sort_keys=True).encode()).hexdigest(), description
+
+    def fetch(self, detector, bodies, params, start_date, end_date, compute, padding=timedelta(0)):
+        """
+        Records of a detector for [start_date, end_date).
+
+        Parameters:
+        - detector, bodies, params: identify the results; params must be JSON serializable
+        - start_date, end_date: datetimes, strings or TT Julian dates
+        - compute: function (start datetime, end datetime) -> EventRecords, called for
+          every sub-range missing from the cache
+        - padding: how far compute runs past both ends of a sub-range; its results
+          are cut to the sub-range, so events a detector misplaces at the edges of
+          its range (aspects whose orb window is cut off) are dropped
+
+        Returns:
+        - EventRecords inside the range; periods are cut at segment boundaries
+        """
+        key, description = self.key(detector, bodies, params)
+        directory = os.path.join(self.path, key)
+        start, end = parse_epoch(start_date), parse_epoch(end_date)
+
+        records = []
+        covered = []
+        for segment_start, segment_end, path in list_segments(directory):
+            if segment_start < end and segment_end > start:
+                try:
+                    records.extend(read_segment(path))
+                except FileNotFoundError:
+                    continue  # Evicted by another process meanwhile
+                covered.append((segment_start, segment_end))
+
+        for gap_start, gap_end in uncovered(start, end, covered):
+            print(f"Computing {detector} for {', '.join(bodies)} from {format_epoch(gap_start)} to {format_epoch(gap_end)}")
+            computed = compute(epoch_datetime(gap_start) - padding, epoch_datetime(gap_end) + padding)
+            gap_records = clip_records(computed, gap_start, gap_end)
+            write_segment(directory, description, gap_start, gap_end, gap_records)
+            records.extend(gap_records)
+
+        evict(self.path, self.size_limit)
+        return clip_records(records, start, end)
+
+def epoch_datetime(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+def ephemeris_hash(path, cache_dir):
+    """
+    SHA-256 of the ephemeris file. Remembered in the cache directory per path,
+    size and modification time, so the file is only read again when it changes.
+    """
+    stat = os.stat(path)
+    known_path = os.path.join(cache_dir, 'ephemeris.json')
+    try:
+        with open(known_path) as f:
+            known = json.load(f)
+    except (FileNotFoundError, ValueError):
+        known = {}
+    entry = known.get(os.path.abspath(path))
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha256']
+
+    print(f"Hashing ephemeris {path}...")
+    digest = sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    known[os.path.abspath(path)] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest.hexdigest()}
+    write_json(known_path, known)
+    return digest.hexdigest()
+
+def write_json(path, data):
+    """Write through a temporary file so readers never see a partial file."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+def list_segments(directory):
+    """(start, end, path) of the segments in a key directory, by start."""
+    if not os.path.isdir(directory):
+        return []
+    segments = []
+    for name in os.listdir(directory):
+        match = SEGMENT_NAME.match(name)
+        if match:
+            segments.append((int(match.group(1)), int(match.group(2)), os.path.join(directory, name)))
+    return sorted(segments)
+
+def read_segment(path):
+    with open(path) as f:
+        rows = json.load(f)['records']
+    os.utime(path)  # The modification time is the last use for LRU eviction
+    return [record_from_row(row) for row in rows]
+
+def write_segment(directory, description, start, end, records):
+    os.makedirs(directory, exist_ok=True)
+    params_path = os.path.join(directory, 'params.json')
+    if not os.path.exists(params_path):
+        write_json(params_path, description)
+    write_json(os.path.join(directory, f"{start}_{end}.json"),
+               {'start': start, 'end': end, 'records': [record.to_row() for record in records]})
+
+def remove_segment(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path)
+    if not list_segments(directory):
+        # Last segment of the key: drop the key with its description
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+def evict(path, size_limit):
+    """Remove least recently used segments until the cache fits size_limit bytes; returns the number removed."""
+    segments = [segment for entry in cache_entries(path) for segment in entry['segments']]
+    total = sum(segment['size'] for segment in segments)
+    removed = 0
+    for segment in sorted(segments, key=lambda segment: segment['last_used']):
+        if total <= size_limit:
+            break
+        remove_segment(segment['path'])
+        total -= segment['size']
+        removed += 1
+    return removed
+
+def uncovered(start, end, covered):
+    """Sub-ranges of [start, end) not covered by any of the (start, end) ranges in covered."""
+    gaps = []
+    position = start
+    for covered_start, covered_end in sorted(covered):
+        if covered_start > position:
+            gaps.append((position, min(covered_start, end)))
+        position = max(position, covered_end)
+        if position >= end:
+            break
+    if position < end:
+        gaps.append((position, end))
+    return [(gap_start, gap_end) for gap_start, gap_end in gaps if gap_start < gap_end]
+
+def cache_entries(path=CACHE_DIR):
+    """
+    Describe the cache contents.
+
+    Returns:
+    - list of {'key', 'description', 'segments': [{'start', 'end', 'path', 'size', 'last_used'}]}
+    """
+    entries = []
+    if not os.path.isdir(path):
+        return entries
+    for key in sorted(os.listdir(path)):
+        directory = os.path.join(path, key)
+        if not os.path.isdir(directory):
+            continue
+        try:
+            with open(os.path.join(directory, 'params.json')) as f:
+                description = json.load(f)
+        except (FileNotFoundError, ValueError):
+            description = {}
+        segments = []
+        for start, end, segment_path in list_segments(directory):
+            try:
+                stat = os.stat(segment_path)
+            except FileNotFoundError:
+                continue
+            segments.append({'start': start, 'end': end, 'path': segment_path,
+                             'size': stat.st_size, 'last_used': stat.st_mtime})
+        entries.append({'key': key, 'description': description, 'segments': segments})
+    return entries
+
+def inspect(path=CACHE_DIR):
+    """Print every cached detector configuration with its ranges, size and last use."""
+    entries = cache_entries(path)
+    total = 0
+    for entry in entries:
+        description = entry['description']
+        size = sum(segment['size'] for segment in entry['segments'])
+        total += size
+        last_used = max((segment['last_used'] for segment in entry['segments']), default=0)
+        print(f"{entry['key'][:12]} {description.get('detector', '?')} {','.join(description.get('bodies', []))} "
+              f"{json.dumps(description.get('params', {}), sort_keys=True)}")
+        print(f"    {len(entry['segments'])} segments, {size / 1024:.1f} KB, "
+              f"last used {datetime.fromtimestamp(last_used):%Y-%m-%d %H:%M}")
+        for segment in entry['segments']:
+            print(f"    {format_epoch(segment['start'])} - {format_epoch(segment['end'])}")
+    print(f"{len(entries)} entries, {total / (1024 * 1024):.1f} MB in {path}")
+
+def prune(path=CACHE_DIR, max_size=None, older_than_days=None):
+    """
+    Remove segments not used for older_than_days, then the least recently used
+    ones until the cache fits max_size bytes. With neither, clear the cache.
+    """
+    segments = [segment for entry in cache_entries(path) for segment in entry['segments']]
+    if max_size is None and older_than_days is None:
+        stale = segments
+    elif older_than_days is not None:
+        cutoff = time.time() - older_than_days * 86400
+        stale = [segment for segment in segments if segment['last_used'] < cutoff]
+    else:
+        stale = []
+    for segment in stale:
+        remove_segment(segment['path'])
+    removed = len(stale)
+    if max_size is not None:
+        removed += evict(path, max_size)
+    print(f"Removed {removed} segments from {path}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inspect or prune the detector result cache.")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('inspect', help="list cached detectors, ranges and sizes")
+    prune_parser = commands.add_parser('prune', help="remove cached results; everything unless limits are given")
+    prune_parser.add_argument('--max-size', type=float, help="keep at most this many MB, least recently used removed first")
+    prune_parser.add_argument('--older-than', type=float, help="remove results not used for this many days")
+    args = parser.parse_args()
+
+    if args.command == 'inspect':
+        inspect(args.cache_dir)
+    else:
+        max_size = None if args.max_size is None else int(args.max_size * 1024 * 1024)
+        prune(args.cache_dir, max_size, args.older_than)
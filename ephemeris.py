@@ -0,0 +1,365 @@
+# ephemeris.py
+
+from contextlib import contextmanager
+from skyfield.api import load, load_file
+from skyfield.almanac import moon_phases, moon_phase
+from skyfield.framelib import ICRS, ecliptic_frame
+import os
+
+import numpy as np
+
+ts = load.timescale()
+
+JPL_KERNEL = 'de442.bsp'
+
+# Backend used by every detector and by data_generator.py, unless use_ephemeris() picks another
+EPHEMERIS_ENV = 'ASTRO_EPHEMERIS'
+DEFAULT_EPHEMERIS = 'jpl'
+
+# Kernel targets of the bodies; planets are their system barycenters
+JPL_TARGETS = {
+    'sun': 'sun',
+    'mercury': 'mercury barycenter',
+    'venus': 'venus barycenter',
+    'earth': 'earth',
+    'moon': 'moon',
+    'mars': 'mars barycenter',
+    'jupiter': 'jupiter barycenter',
+    'saturn': 'saturn barycenter',
+    'uranus': 'uranus barycenter',
+    'neptune': 'neptune barycenter',
+    'pluto': 'pluto barycenter'
+}
+
+J2000 = 2451545.0
+AU_KM = 149597870.7
+LIGHT_DAYS_PER_AU = 499.004783836 / 86400
+EARTH_MOON_MASS_RATIO = 81.30056
+
+# General precession in longitude, degrees per Julian century (and per century squared)
+PRECESSION = (5028.796195 / 3600, 1.1054348 / 3600)
+
+# Keplerian elements for 1800-2050 referred to the J2000 ecliptic and equinox
+# (Standish, "Approximate Positions of the Planets", table 1), as values at J2000
+# and rates per Julian century: a (AU), e, inclination, mean longitude,
+# longitude of perihelion, longitude of the ascending node (degrees).
+# 'earth' is the Earth-Moon barycenter.
+MEAN_ELEMENTS = {
+    'mercury': ((0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593),
+                (0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081)),
+    'venus': ((0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255),
+              (0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418)),
+    'earth': ((1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0),
+              (0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0)),
+    'mars': ((1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891),
+             (0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343)),
+    'jupiter': ((5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909),
+                (-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106)),
+    'saturn': ((9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448),
+               (-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794)),
+    'uranus': ((19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503),
+               (-0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589)),
+    'neptune': ((30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574),
+                (0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.00508664)),
+    'pluto': ((39.48211675, 0.24882730, 17.14001206, 238.92903833, 224.06891629, 110.30393684),
+              (-0.00031596, 0.00005170, 0.00004818, 145.20780515, -0.04062942, -0.01183482))
+}
+
+# Lunar fundamental arguments as polynomials in Julian centuries from J2000 (degrees), rows:
+# mean longitude L', elongation D, Sun's anomaly M, Moon's anomaly M', argument of latitude F
+MOON_ARGUMENTS = np.array([
+    (218.3164477, 481267.88123421, -0.0015786, 1 / 538841, -1 / 65194000),
+    (297.8501921, 445267.1114034, -0.0018819, 1 / 545868, -1 / 113065000),
+    (357.5291092, 35999.0502909, -0.0001536, 1 / 24490000, 0),
+    (134.9633964, 477198.8675055, 0.0087414, 1 / 69699, -1 / 14712000),
+    (93.2720950, 483202.0175233, -0.0036539, -1 / 3526000, 1 / 863310000)
+])
+
+# Largest periodic terms of the lunar theory (Meeus, Astronomical Algorithms, ch. 47):
+# multiples of D, M, M', F and the coefficients of sin (longitude, 1e-6 degrees)
+# and cos (distance, meters) for longitude and distance, and of sin for latitude
+MOON_LONGITUDE_DISTANCE = np.array([
+    (0, 0, 1, 0, 6288774, -20905355), (2, 0, -1, 0, 1274027, -3699111), (2, 0, 0, 0, 658314, -2955968),
+    (0, 0, 2, 0, 213618, -569925), (0, 1, 0, 0, -185116, 48888), (0, 0, 0, 2, -114332, -3149),
+    (2, 0, -2, 0, 58793, 246158), (2, -1, -1, 0, 57066, -152138), (2, 0, 1, 0, 53322, -170733),
+    (2, -1, 0, 0, 45758, -204586), (0, 1, -1, 0, -40923, -129620), (1, 0, 0, 0, -34720, 108743),
+    (0, 1, 1, 0, -30383, 104755), (2, 0, 0, -2, 15327, 10321), (0, 0, 1, 2, -12528, 0),
+    (0, 0, 1, -2, 10980, 79661), (4, 0, -1, 0, 10675, -34782), (0, 0, 3, 0, 10034, -23210),
+    (4, 0, -2, 0, 8548, -21636), (2, 1, -1, 0, -7888, 24208), (2, 1, 0, 0, -6766, 30824),
+    (1, 0, -1, 0, -5163, -8379), (1, 1, 0, 0, 4987, -16675), (2, -1, 1, 0, 4036, -12831),
+    (2, 0, 2, 0, 3994, -10445), (4, 0, 0, 0, 3861, -11650), (2, 0, -3, 0, 3665, 14403),
+    (0, 1, -2, 0, -2689, -7003), (2, 0, -1, 2, -2602, 0), (2, -1, -2, 0, 2390, 10056),
+    (1, 0, 1, 0, -2348, 6322), (2, -2, 0, 0, 2236, -9884)
+])
+MOON_LATITUDE = np.array([
+    (0, 0, 0, 1, 5128122), (0, 0, 1, 1, 280602), (0, 0, 1, -1, 277693), (2, 0, 0, -1, 173237),
+    (2, 0, -1, 1, 55413), (2, 0, -1, -1, 46271), (2, 0, 0, 1, 32573), (0, 0, 2, 1, 17198),
+    (2, 0, 1, -1, 9266), (0, 0, 2, -1, 8822), (2, -1, 0, -1, 8216), (2, 0, -2, -1, 4324),
+    (2, 0, 1, 1, 4200), (2, 1, 0, -1, -3359), (2, -1, -1, 1, 2463), (2, -1, 0, 1, 2211),
+    (2, -1, -1, -1, 2065)
+])
+
+# Step of the numerical rates of the analytic backend, in days
+RATE_STEP = 1 / 24
+
+class JPLEphemeris:
+    """
+    Astrometric positions from a JPL kernel through Skyfield's light-time solution.
+
+    Bodies are the kernel's segments. Longitudes are referred to the J2000
+    ecliptic; rates and Moon phases are apparent, referred to the ecliptic of date.
+    """
+    name = 'jpl'
+
+    def __init__(self, path=JPL_KERNEL):
+        self.path = path
+        self.kernel = load_file(path)
+        self.earth = self.kernel['earth']
+        self._quarter_at = moon_phases(self.kernel)
+
+    def body(self, name):
+        """Body handle for a lowercase name, or None for an unknown body."""
+        return self.kernel[JPL_TARGETS[name]] if name in JPL_TARGETS else None
+
+    def ecliptic_xyz(self, body, jd):
+        """Geocentric ecliptic [x, y, z] in AU, shape (3,) or (3, n)."""
+        return self.earth.at(ts.tt_jd(jd)).observe(body).ecliptic_xyz().au
+
+    def ecliptic_longitudes(self, bodies, jd):
+        """Geocentric ecliptic longitudes in degrees of several bodies, shape (bodies,) + shape of jd."""
+        observer = self.earth.at(ts.tt_jd(jd))
+        return np.array([observer.observe(body).ecliptic_latlon()[1].degrees for body in bodies])
+
+    def longitude_rate(self, body, jd):
+        """Rate of the apparent ecliptic longitude in degrees per day, positive when direct."""
+        position = self.earth.at(ts.tt_jd(jd)).observe(body).apparent()
+        return position.frame_latlon_and_rates(ecliptic_frame)[4].degrees.per_day
+
+    def angular_speed(self, body, jd):
+        """Apparent speed across the sky in degrees per day, regardless of direction."""
+        position = self.earth.at(ts.tt_jd(jd)).observe(body).apparent()
+        ra, dec, _, ra_rate, dec_rate, _ = position.frame_latlon_and_rates(ICRS)
+        return np.sqrt((ra_rate.degrees.per_day * np.cos(dec.radians))**2 + dec_rate.degrees.per_day**2)
+
+    def moon_phase(self, jd):
+        """Moon's longitude minus the Sun's in degrees, 0-360."""
+        return moon_phase(self.kernel, ts.tt_jd(jd)).degrees
+
+    def moon_quarter(self, jd):
+        """Phase quarter: 0 New Moon, 1 First Quarter, 2 Full Moon, 3 Last Quarter."""
+        return self._quarter_at(ts.tt_jd(jd))
+
+class AnalyticEphemeris:
+    """
+    Positions from mean orbital elements and a truncated lunar theory, in plain numpy.
+
+    No kernel file is needed and every evaluation is vectorized, which makes
+    draft calendars, previews, tests and benchmarks near-instant. Compared to
+    DE421 over 1900-2050 the geocentric longitudes are within about 1.5' for the
+    Sun, Moon, Mercury, Venus, Neptune and Pluto, 3' for Mars and Uranus and
+    14' for Jupiter and Saturn, whose mutual perturbations are not modelled.
+    The elements are fitted to 1800-2050 and degrade outside it.
+
+    Bodies are their lowercase names. Planets get a one-step light-time
+    correction; aberration and nutation are ignored, so apparent quantities
+    (rates, Moon phases) carry errors of up to about 20".
+    """
+    name = 'analytic'
+    path = None
+
+    def body(self, name):
+        """Body handle for a lowercase name, or None for an unknown body."""
+        return name if name in JPL_TARGETS else None
+
+    def ecliptic_xyz(self, body, jd):
+        """Geocentric ecliptic [x, y, z] in AU, shape (3,) or (3, n)."""
+        return self._positions([body], jd)[0]
+
+    def ecliptic_longitudes(self, bodies, jd):
+        """Geocentric ecliptic longitudes in degrees of several bodies, shape (bodies,) + shape of jd."""
+        xyz = self._positions(bodies, jd)
+        return np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0])) % 360
+
+    def longitude_rate(self, body, jd):
+        """Rate of the ecliptic longitude of date in degrees per day, positive when direct."""
+        jd = np.asarray(jd, dtype=float)
+        before, after = self.ecliptic_longitudes([body], np.stack([jd - RATE_STEP, jd + RATE_STEP]))[0]
+        change = (after - before + 180) % 360 - 180
+        return change / (2 * RATE_STEP) + PRECESSION[0] / 36525
+
+    def angular_speed(self, body, jd):
+        """Speed across the sky in degrees per day, regardless of direction."""
+        jd = np.asarray(jd, dtype=float)
+        before = self.ecliptic_xyz(body, jd - RATE_STEP)
+        after = self.ecliptic_xyz(body, jd + RATE_STEP)
+        cosine = (before * after).sum(axis=0) / np.linalg.norm(before, axis=0) / np.linalg.norm(after, axis=0)
+        return np.degrees(np.arccos(np.clip(cosine, -1, 1))) / (2 * RATE_STEP)
+
+    def moon_phase(self, jd):
+        """Moon's longitude minus the Sun's in degrees, 0-360."""
+        moon, sun = self.ecliptic_longitudes(['moon', 'sun'], jd)
+        return (moon - sun) % 360
+
+    def moon_quarter(self, jd):
+        """Phase quarter: 0 New Moon, 1 First Quarter, 2 Full Moon, 3 Last Quarter."""
+        return (self.moon_phase(jd) // 90).astype(int) % 4
+
+    def _positions(self, bodies, jd):
+        """Geocentric J2000 ecliptic [x, y, z] in AU of several bodies, shape (bodies, 3) + shape of jd."""
+        jd = np.asarray(jd, dtype=float)
+        times = jd.ravel()
+        planets = [body for body in bodies if body in MEAN_ELEMENTS and body != 'earth']
+        moon = analytic_moon(times)
+        heliocentric = heliocentric_xyz(['earth'] + planets, times)
+        earth = heliocentric[:, 0] - moon / (1 + EARTH_MOON_MASS_RATIO)
+        if planets:
+            # One light-time iteration: the planets where they were when the light left them
+            distance = np.linalg.norm(heliocentric[:, 1:] - earth[:, None], axis=0)
+            heliocentric = heliocentric_xyz(planets, times - distance * LIGHT_DAYS_PER_AU)
+
+        positions = np.zeros((len(bodies), 3, len(times)))
+        for row, body in enumerate(bodies):
+            if body == 'moon':
+                positions[row] = moon
+            elif body == 'sun':
+                positions[row] = -earth
+            elif body in planets:
+                positions[row] = heliocentric[:, planets.index(body)] - earth
+        return positions.reshape((len(bodies), 3) + jd.shape)
+
+def heliocentric_xyz(planets, jd):
+    """
+    Heliocentric J2000 ecliptic [x, y, z] in AU of planets from their mean elements.
+    jd is a 1-D array, or one row of times per planet; returns shape (3, planets, times).
+    """
+    T = (jd - J2000) / 36525
+    values, rates = (np.array([MEAN_ELEMENTS[planet][column] for planet in planets]).T[:, :, None] for column in (0, 1))
+    a, e, inclination, mean_longitude, perihelion, node = values + rates * T
+
+    mean_anomaly = np.radians((mean_longitude - perihelion + 180) % 360 - 180)
+    anomaly = mean_anomaly + e * np.sin(mean_anomaly)
+    for _ in range(3):  # Newton's method on Kepler's equation; for e <= 0.25 three steps reach float precision
+        anomaly -= (anomaly - e * np.sin(anomaly) - mean_anomaly) / (1 - e * np.cos(anomaly))
+    x = a * (np.cos(anomaly) - e)
+    y = a * np.sqrt(1 - e**2) * np.sin(anomaly)
+
+    w, n, i = np.radians(perihelion - node), np.radians(node), np.radians(inclination)
+    cw, sw, cn, sn, ci, si = np.cos(w), np.sin(w), np.cos(n), np.sin(n), np.cos(i), np.sin(i)
+    return np.stack([(cw * cn - sw * sn * ci) * x - (sw * cn + cw * sn * ci) * y,
+                     (cw * sn + sw * cn * ci) * x - (sw * sn - cw * cn * ci) * y,
+                     sw * si * x + cw * si * y])
+
+def analytic_moon(jd):
+    """Geocentric J2000 ecliptic [x, y, z] in AU of the Moon from the truncated lunar theory, jd a 1-D array."""
+    T = (jd - J2000) / 36525
+    arguments = np.radians(MOON_ARGUMENTS @ T ** np.arange(5)[:, None])
+    L, D, M, Mp, F = arguments
+    A1, A2, A3 = np.radians(119.75 + 131.849 * T), np.radians(53.09 + 479264.290 * T), np.radians(313.45 + 481266.484 * T)
+    arguments = arguments[1:]
+    # Terms with the Sun's anomaly shrink with the Earth's orbital eccentricity
+    eccentricity = 1 - 0.002516 * T - 0.0000074 * T**2
+
+    angle = MOON_LONGITUDE_DISTANCE[:, :4] @ arguments
+    factor = eccentricity ** np.abs(MOON_LONGITUDE_DISTANCE[:, 1:2])
+    longitude = (MOON_LONGITUDE_DISTANCE[:, 4:5] * factor * np.sin(angle)).sum(axis=0)
+    distance = (MOON_LONGITUDE_DISTANCE[:, 5:6] * factor * np.cos(angle)).sum(axis=0)
+    angle = MOON_LATITUDE[:, :4] @ arguments
+    factor = eccentricity ** np.abs(MOON_LATITUDE[:, 1:2])
+    latitude = (MOON_LATITUDE[:, 4:5] * factor * np.sin(angle)).sum(axis=0)
+
+    longitude += 3958 * np.sin(A1) + 1962 * np.sin(L - F) + 318 * np.sin(A2)
+    latitude += (-2235 * np.sin(L) + 382 * np.sin(A3) + 175 * np.sin(A1 - F) + 175 * np.sin(A1 + F)
+                 + 127 * np.sin(L - Mp) - 115 * np.sin(L + Mp))
+
+    # The theory gives the mean ecliptic of date; precession takes it back to J2000
+    lon = L + np.radians(longitude / 1e6 - (PRECESSION[0] + PRECESSION[1] * T) * T)
+    lat = np.radians(latitude / 1e6)
+    r = (385000.56 + distance / 1000) / AU_KM
+    return r * np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+EPHEMERIS_BACKENDS = {
+    'jpl': JPLEphemeris,
+    'analytic': AnalyticEphemeris
+}
+
+_ephemeris = None
+
+def get_ephemeris():
+    """The active backend, created on first use from $ASTRO_EPHEMERIS (default 'jpl')."""
+    global _ephemeris
+    if _ephemeris is None:
+        _ephemeris = EPHEMERIS_BACKENDS[os.environ.get(EPHEMERIS_ENV, DEFAULT_EPHEMERIS)]()
+    return _ephemeris
+
+def use_ephemeris(name):
+    """
+    Switch every detector and generator to a backend by name ('jpl' or 'analytic').
+    The choice is also put in the environment, so worker processes inherit it.
+    """
+    global _ephemeris
+    if name not in EPHEMERIS_BACKENDS:
+        raise ValueError(f"unknown ephemeris {name!r}, expected one of {', '.join(EPHEMERIS_BACKENDS)}")
+    os.environ[EPHEMERIS_ENV] = name
+    if _ephemeris is None or _ephemeris.name != name:
+        _ephemeris = EPHEMERIS_BACKENDS[name]()
+    return _ephemeris
+
+class CountingEphemeris:
+    """
+    Passes every call on to another backend and counts the work it asks for.
+
+    - calls: position-evaluating method calls
+    - evaluations: body-times evaluated; a call for 3 bodies at 100 times counts 300,
+      moon_phase and moon_quarter count the Moon and the Sun
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.path = backend.path
+        self.calls = 0
+        self.evaluations = 0
+
+    def _count(self, bodies, jd):
+        self.calls += 1
+        self.evaluations += bodies * int(np.size(jd))
+
+    def body(self, name):
+        return self.backend.body(name)
+
+    def ecliptic_xyz(self, body, jd):
+        self._count(1, jd)
+        return self.backend.ecliptic_xyz(body, jd)
+
+    def ecliptic_longitudes(self, bodies, jd):
+        self._count(len(bodies), jd)
+        return self.backend.ecliptic_longitudes(bodies, jd)
+
+    def longitude_rate(self, body, jd):
+        self._count(1, jd)
+        return self.backend.longitude_rate(body, jd)
+
+    def angular_speed(self, body, jd):
+        self._count(1, jd)
+        return self.backend.angular_speed(body, jd)
+
+    def moon_phase(self, jd):
+        self._count(2, jd)
+        return self.backend.moon_phase(jd)
+
+    def moon_quarter(self, jd):
+        self._count(2, jd)
+        return self.backend.moon_quarter(jd)
+
+@contextmanager
+def count_evaluations():
+    """
+    Count what the active backend evaluates inside the block, in this process only
+    (shards run on worker processes are not seen). Yields the CountingEphemeris.
+    """
+    global _ephemeris
+    backend = get_ephemeris()
+    _ephemeris = CountingEphemeris(backend)
+    try:
+        yield _ephemeris
+    finally:
+        _ephemeris = backend
@@ -0,0 +1,203 @@
+# event_converter.py
+
+from itertools import islice
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from events import EventRecord, record_from_feed, aspect_record, ingress_record, station_record, sort_records, ASPECT_CODES
+from event_store import EventStore
+
+# Records held in memory at once by every reader and writer
+CHUNK_RECORDS = 50000
+
+# Columnar binary format: MAGIC, then chunks of a little-endian uint64 record
+# count followed by one block per column, padded to 8 bytes. Periods have an
+# end; points store NO_END.
+COLUMNAR_MAGIC = b'ASTREVC1'
+COLUMNS = [('time', '<i8'), ('end', '<i8'), ('kind', 'i1'), ('body1', 'i1'), ('body2', 'i1'), ('code', '<i2')]
+NO_END = np.iinfo(np.int64).min
+
+# Formats by file extension; 'legacy' (astrological_calendar.json) must be named explicitly
+EXTENSIONS = {'.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.bin': 'columnar',
+              '.sqlite': 'sqlite', '.db': 'sqlite'}
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def chunks(records, size=CHUNK_RECORDS):
+    """Lists of up to size records from an iterable."""
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+def iter_json_array(f, read_size=1 << 16):
+    """Yield the items of a top-level JSON array (nothing for null) from a text file, read piece by piece."""
+    decoder = json.JSONDecoder()
+    buffer, pos, started, eof = '', 0, False, False
+    while True:
+        pos = JSON_WHITESPACE.match(buffer, pos).end()
+        if not eof and (pos == len(buffer) or not started and len(buffer) - pos < len('null')):
+            more = f.read(read_size)
+            buffer, pos, eof = buffer[pos:] + more, 0, not more
+            continue
+        if pos == len(buffer):
+            if started:
+                raise ValueError("truncated JSON array")
+            return
+        if not started:
+            if buffer.startswith('null', pos):
+                return
+            if buffer[pos] != '[':
+                raise ValueError("expected a JSON array of feed entries")
+            started, pos = True, pos + 1
+        elif buffer[pos] == ']':
+            return
+        elif buffer[pos] == ',':
+            pos += 1
+        else:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buffer)
+            if end == len(buffer) and not eof:
+                # The item may continue past the buffer; a number cut short decodes as its prefix
+                more = f.read(read_size)
+                buffer, pos, eof = buffer[pos:] + more, 0, not more
+                continue
+            pos = end
+            yield item
+
+def read_json(path):
+    with open(path) as f:
+        for entry in iter_json_array(f):
+            yield record_from_feed(entry)
+
+def write_json(records, path):
+    count = 0
+    with open(path, 'w') as f:
+        f.write('[')
+        for chunk in chunks(records):
+            f.write((',' if count else '') + ','.join(json.dumps(record.to_feed()) for record in chunk))
+            count += len(chunk)
+        f.write(']')
+    return count
+
+def read_ndjson(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield record_from_feed(json.loads(line))
+
+def write_ndjson(records, path):
+    count = 0
+    with open(path, 'w') as f:
+        for chunk in chunks(records):
+            f.writelines(json.dumps(record.to_feed()) + '\n' for record in chunk)
+            count += len(chunk)
+    return count
+
+def read_columnar(path):
+    with open(path, 'rb') as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar event file")
+        while header := f.read(8):
+            count = int(np.frombuffer(header, '<u8')[0])
+            columns = {}
+            for name, dtype in COLUMNS:
+                size = count * np.dtype(dtype).itemsize
+                columns[name] = np.frombuffer(f.read(size), dtype).tolist()
+                f.read(-size % 8)
+            for time, end, kind, body1, body2, code in zip(*columns.values()):
+                yield EventRecord(time, kind, body1, body2, code, None if end == NO_END else end)
+
+def write_columnar(records, path):
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(COLUMNAR_MAGIC)
+        for chunk in chunks(records):
+            f.write(np.array([len(chunk)], '<u8').tobytes())
+            values = {
+                'time': [record.time for record in chunk],
+                'end': [NO_END if record.end is None else record.end for record in chunk],
+                'kind': [record.kind for record in chunk],
+                'body1': [record.body1 for record in chunk],
+                'body2': [record.body2 for record in chunk],
+                'code': [record.code for record in chunk]
+            }
+            for name, dtype in COLUMNS:
+                data = np.array(values[name], dtype).tobytes()
+                f.write(data + b'\0' * (-len(data) % 8))
+            count += len(chunk)
+    return count
+
+def read_sqlite(path):
+    with EventStore(path) as store:
+        yield from store.records()
+
+def write_sqlite(records, path):
+    """
+    Upsert into an EventStore: events already stored are skipped and lunar days joined.
+    Returns the number of events stored, without the skipped ones.
+    """
+    count = 0
+    with EventStore(path) as store:
+        for chunk in chunks(records, store.batch_size):
+            count += store.upsert(chunk)
+    return count
+
+def read_legacy(path):
+    """
+    Records of the old astrological_calendar.json: a list of {"Retrograde": [...]},
+    {"Aspects": [...]} and {"Sign Changes": [...]} objects of detector results.
+    The file has no streaming layout and is loaded whole, so the records are
+    yielded in chronological order like every feed.
+    """
+    with open(path) as f:
+        sections = {key: events for section in json.load(f) for key, events in section.items()}
+    records = [station_record(event) for event in sections.get('Retrograde', []) if 'stationary_point' in event]
+    records += [aspect_record(event['planet1'], event['planet2'], ASPECT_CODES[event['aspect']], event['exact_time_utc'])
+                for event in sections.get('Aspects', [])]
+    records += [ingress_record(event['planet'], event['new_sign'], event['datetime'])
+                for event in sections.get('Sign Changes', [])]
+    yield from sort_records(records)
+
+READERS = {'json': read_json, 'ndjson': read_ndjson, 'columnar': read_columnar, 'sqlite': read_sqlite, 'legacy': read_legacy}
+WRITERS = {'json': write_json, 'ndjson': write_ndjson, 'columnar': write_columnar, 'sqlite': write_sqlite}
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"cannot tell the format of {path}; name it with --from/--to")
+    return EXTENSIONS[extension]
+
+def read_records(path, fmt=None):
+    """Stream EventRecords from a file in any READERS format (detected from the extension by default)."""
+    return READERS[fmt or detect_format(path)](path)
+
+def write_records(records, path, fmt=None):
+    """
+    Write EventRecords in any WRITERS format, CHUNK_RECORDS at a time; records keep
+    their order. Returns the number of records written.
+    """
+    return WRITERS[fmt or detect_format(path)](records, path)
+
+def convert(source, target, source_format=None, target_format=None):
+    """Convert an event file into another format with constant memory (except legacy input)."""
+    count = write_records(read_records(source, source_format), target, target_format)
+    print(f"Converted {count} events from {source} to {target}")
+    return count
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert event files between JSON feeds, NDJSON, columnar binary and SQLite.")
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--from', dest='source_format', choices=READERS, help="source format, from the extension by default")
+    parser.add_argument('--to', dest='target_format', choices=WRITERS, help="target format, from the extension by default")
+    args = parser.parse_args()
+
+    convert(args.source, args.target, args.source_format, args.target_format)
@@ -0,0 +1,211 @@
+# event_store.py
+
+from datetime import datetime, timedelta
+import argparse
+import json
+import sqlite3
+import time
+
+from events import EventRecord, BODIES, BODY_IDS, KIND_NAMES, parse_epoch
+
+EVENT_DB = 'events.sqlite'
+BATCH_SIZE = 5000  # Records per transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS kinds (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,                       -- Epoch seconds (UTC); the start of periods
+    kind INTEGER NOT NULL REFERENCES kinds(id),
+    body1 INTEGER NOT NULL REFERENCES bodies(id),
+    body2 INTEGER NOT NULL,                      -- -1 unless kind is aspect
+    code INTEGER NOT NULL,                       -- Aspect angle, sign, station, phase or lunar day number
+    UNIQUE (kind, body1, body2, code, time)
+);
+CREATE TABLE IF NOT EXISTS periods (
+    event_id INTEGER PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+    end_time INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS events_time ON events (time);
+CREATE INDEX IF NOT EXISTS events_kind_time ON events (kind, time);
+CREATE INDEX IF NOT EXISTS events_body1_time ON events (body1, time);
+CREATE INDEX IF NOT EXISTS events_body2_time ON events (body2, time);
+"""
+
+class EventStore:
+    """
+    EventRecords in a SQLite database, for range queries without loading the feeds.
+
+    Every event is a row of `events`; periods (lunar days) also have a row in
+    `periods` with their end. `bodies` and `kinds` name the ids for other
+    readers of the database, such as the website.
+
+        with EventStore('events.sqlite') as store:
+            store.upsert(calendar.events)
+            store.query('2025-01-06', '2025-01-13', kinds=['aspect'])
+    """
+    def __init__(self, path=EVENT_DB, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.executemany("INSERT OR IGNORE INTO bodies VALUES (?, ?)", enumerate(BODIES))
+            self.connection.executemany("INSERT OR IGNORE INTO kinds VALUES (?, ?)", enumerate(KIND_NAMES))
+            self.connection.execute("INSERT OR IGNORE INTO meta VALUES ('max_period', 0)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def upsert(self, records, start=None, end=None, scope=()):
+        """
+        Insert records, in transactions of batch_size.
+
+        Given the range a detector run covered and its scope, every stored event of
+        the scope in [start, end) is replaced by the records: points there are
+        removed and periods are cut at the range boundaries first. A re-run then
+        leaves the store as if only it had run over the range, even after a
+        detector change moved or dropped events. Without a range, points already
+        stored are skipped. Periods are joined with stored periods of the same
+        event they overlap or touch, so lunar days cut at the ends of earlier runs
+        are completed by later ones.
+
+        Parameters:
+        - records: EventRecords, inside [start, end) when a range is given
+        - start, end: optional range, as for query()
+        - scope: (kind, body1, body2) of every event the run can report
+
+        Returns:
+        - number of events inserted or merged; skipped duplicates are not counted
+        """
+        records = list(records)
+        count = 0
+        for first in range(0, len(records) or 1, self.batch_size):
+            with self.connection:
+                if first == 0 and start is not None:
+                    self._clear_range(scope, to_epoch_seconds(start), to_epoch_seconds(end))
+                batch = records[first:first + self.batch_size]
+                count += self.connection.executemany(
+                    "INSERT INTO events (time, kind, body1, body2, code) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT DO NOTHING",
+                    [(record.time, record.kind, record.body1, record.body2, record.code)
+                     for record in batch if record.end is None]).rowcount
+                for record in batch:
+                    if record.end is not None:
+                        self._upsert_period(record)
+                        count += 1
+        return count
+
+    def _clear_range(self, scope, start, end):
+        """Remove the stored events of scope in [start, end), keeping the parts of periods outside it."""
+        max_period, = self.connection.execute("SELECT value FROM meta WHERE key = 'max_period'").fetchone()
+        for kind, body1, body2 in scope:
+            rows = self.connection.execute(
+                "SELECT events.id, time, end_time, code FROM events LEFT JOIN periods ON periods.event_id = events.id "
+                "WHERE kind = ? AND body1 = ? AND body2 = ? AND time >= ? AND time < ? "
+                "AND (end_time IS NULL AND time >= ? OR end_time > ?)",
+                (kind, body1, body2, start - max_period, end, start, start)).fetchall()
+            self.connection.executemany("DELETE FROM events WHERE id = ?", [(row[0],) for row in rows])
+            for _, time, end_time, code in rows:
+                if end_time is not None and time < start:
+                    self._insert_period(kind, body1, body2, code, time, start)
+                if end_time is not None and end_time > end:
+                    self._insert_period(kind, body1, body2, code, end, end_time)
+
+    def _upsert_period(self, record):
+        """Store a period as the union of itself and the stored periods of the same event it meets."""
+        rows = self.connection.execute(
+            "SELECT events.id, events.time, periods.end_time FROM events JOIN periods ON periods.event_id = events.id "
+            "WHERE kind = ? AND body1 = ? AND body2 = ? AND code = ? AND time <= ? AND end_time >= ?",
+            (record.kind, record.body1, record.body2, record.code, record.end, record.time)).fetchall()
+        start = min([record.time] + [row[1] for row in rows])
+        end = max([record.end] + [row[2] for row in rows])
+        self.connection.executemany("DELETE FROM events WHERE id = ?", [(row[0],) for row in rows])
+        self._insert_period(record.kind, record.body1, record.body2, record.code, start, end)
+
+    def _insert_period(self, kind, body1, body2, code, start, end):
+        cursor = self.connection.execute(
+            "INSERT INTO events (time, kind, body1, body2, code) VALUES (?, ?, ?, ?, ?)", (start, kind, body1, body2, code))
+        self.connection.execute("INSERT INTO periods VALUES (?, ?)", (cursor.lastrowid, end))
+        self.connection.execute("UPDATE meta SET value = MAX(value, ?) WHERE key = 'max_period'", (end - start,))
+
+    def query(self, start, end, bodies=None, kinds=None):
+        """
+        Events of [start, end) in chronological order; periods are included when they overlap it.
+
+        Only the time index is scanned: periods start at most max_period before
+        the range, so the cost depends on the events in the range, not on the
+        size of the archive.
+
+        Parameters:
+        - start, end: datetimes, strings such as '2025-01-06' or epoch seconds
+        - bodies: body names; events involving any of them
+        - kinds: kind names from events.KIND_NAMES
+
+        Returns:
+        - list of EventRecords
+        """
+        start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+        max_period, = self.connection.execute("SELECT value FROM meta WHERE key = 'max_period'").fetchone()
+        sql = ("SELECT time, end_time, kind, body1, body2, code FROM events LEFT JOIN periods ON periods.event_id = events.id "
+               "WHERE time >= ? AND time < ? AND (end_time IS NULL AND time >= ? OR end_time > ?)")
+        params = [start - max_period, end, start, start]
+        if kinds is not None:
+            kind_ids = [KIND_NAMES.index(kind) for kind in kinds]
+            sql += f" AND kind IN ({', '.join('?' * len(kind_ids))})"
+            params += kind_ids
+        if bodies is not None:
+            body_ids = [BODY_IDS[body] for body in bodies]
+            marks = ', '.join('?' * len(body_ids))
+            sql += f" AND (body1 IN ({marks}) OR body2 IN ({marks}))"
+            params += body_ids + body_ids
+        sql += " ORDER BY time, kind, body1, body2"
+        return [EventRecord(time, kind, body1, body2, code, end_time)
+                for time, end_time, kind, body1, body2, code in self.connection.execute(sql, params)]
+
+    def records(self):
+        """Every stored event in chronological order, streamed from the database cursor."""
+        cursor = self.connection.execute(
+            "SELECT time, end_time, kind, body1, body2, code FROM events LEFT JOIN periods ON periods.event_id = events.id "
+            "ORDER BY time, kind, body1, body2")
+        for time, end_time, kind, body1, body2, code in cursor:
+            yield EventRecord(time, kind, body1, body2, code, end_time)
+
+    def count(self):
+        """Number of stored events."""
+        return self.connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+def to_epoch_seconds(value):
+    """Epoch seconds from epoch seconds, datetimes or date strings (dates are UTC midnight)."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return parse_epoch(value)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query the calendar event database.")
+    parser.add_argument('start', help="first day, YYYY-MM-DD")
+    parser.add_argument('end', help="last day, YYYY-MM-DD (inclusive)")
+    parser.add_argument('--db', default=EVENT_DB)
+    parser.add_argument('--bodies', help="comma-separated body names, e.g. mercury,mars")
+    parser.add_argument('--kinds', help=f"comma-separated kinds: {', '.join(KIND_NAMES)}")
+    args = parser.parse_args()
+
+    with EventStore(args.db) as store:
+        started = time.perf_counter()
+        events = store.query(args.start, datetime.fromisoformat(args.end) + timedelta(days=1),
+                             bodies=args.bodies.split(',') if args.bodies else None,
+                             kinds=args.kinds.split(',') if args.kinds else None)
+        elapsed = time.perf_counter() - started
+        for event in events:
+            print(json.dumps(event.to_feed()))
+        print(f"{len(events)} of {store.count()} events in {elapsed * 1000:.1f} ms")
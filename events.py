@@ -0,0 +1,251 @@
+# events.py
+
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+from zoneinfo import ZoneInfo
+import re
+
+import numpy as np
+
+from utility import jd_to_datetime
+from signs import SIGNS
+from aspects import get_aspect_name
+from moon import PHASE_NAMES
+
+# Body ids used in event records
+BODIES = ['sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto']
+BODY_IDS = {name: i for i, name in enumerate(BODIES)}
+NO_BODY = -1
+
+# Event kinds
+ASPECT = 0
+INGRESS = 1
+STATION = 2
+PHASE = 3
+LUNAR_DAY = 4
+KIND_NAMES = ['aspect', 'ingress', 'station', 'phase', 'lunar_day']
+
+# Station codes
+TURNS_RETROGRADE = 0
+TURNS_DIRECT = 1
+
+# Feed descriptions, as written by EventRecord.description
+ASPECT_CODES = {get_aspect_name(angle): angle for angle in (0, 60, 90, 120, 180)}
+FEED_DESCRIPTION = re.compile(r'^(?:(?P<aspect_body1>\w+) in (?P<aspect>\w+) with (?P<aspect_body2>\w+)'
+                              r'|(?P<ingress_body>\w+) enters (?P<sign>\w+)'
+                              r'|(?P<station_body>\w+) turns (?P<station>retrograde|direct)'
+                              r'|Moon is (?P<phase>.+)'
+                              r'|(?P<lunar_day>\d+) Moon day)$')
+
+class EventRecord:
+    """
+    A calendar event in compact form.
+
+    - time: int epoch seconds (UTC); the start for periods
+    - end: int epoch seconds for periods (lunar days), None for points
+    - kind: ASPECT, INGRESS, STATION, PHASE or LUNAR_DAY
+    - body1, body2: indices into BODIES (body2 is NO_BODY unless kind is ASPECT)
+    - code: aspect angle, sign index, station code, phase index or lunar day number
+    """
+    __slots__ = ('time', 'end', 'kind', 'body1', 'body2', 'code')
+
+    def __init__(self, time, kind, body1, body2=NO_BODY, code=0, end=None):
+        self.time = time
+        self.end = end
+        self.kind = kind
+        self.body1 = body1
+        self.body2 = body2
+        self.code = code
+
+    def __repr__(self):
+        return f"EventRecord({format_epoch(self.time)}, {self.description()!r})"
+
+    def description(self):
+        body1 = BODIES[self.body1].capitalize() if self.body1 != NO_BODY else None
+        if self.kind == ASPECT:
+            return f"{body1} in {get_aspect_name(self.code)} with {BODIES[self.body2].capitalize()}"
+        if self.kind == INGRESS:
+            return f"{body1} enters {SIGNS[self.code]}"
+        if self.kind == STATION:
+            return f"{body1} turns {'retrograde' if self.code == TURNS_RETROGRADE else 'direct'}"
+        if self.kind == PHASE:
+            return f"Moon is {PHASE_NAMES[self.code]}"
+        return f"{self.code} Moon day"
+
+    def to_row(self):
+        """Plain list form for storage, the inverse of record_from_row."""
+        return [self.time, self.end, self.kind, self.body1, self.body2, self.code]
+
+    def to_feed(self, tz=None):
+        """Serialize to the feed format consumed by the widget, with times in tz (a ZoneInfo) or UTC."""
+        if self.end is None:
+            return {
+                'type': 'point',
+                'datetime': format_epoch(self.time, tz),
+                'description': self.description()
+            }
+        return {
+            'type': 'period',
+            'datetime': format_epoch(self.time, tz),
+            'datetime_start': format_epoch(self.time, tz),
+            'datetime_end': format_epoch(self.end, tz),
+            'description': self.description()
+        }
+
+def parse_epoch(value):
+    """
+    Convert a detector time to int epoch seconds (UTC).
+    Accepts TT Julian dates, which are floored to the minute like the detectors'
+    precision, datetimes (naive ones are UTC) and strings such as '2024-12-01 06:17',
+    '2024-12-01 06:17:00' or '2024-12-01 06:17:00+00:00'.
+    """
+    if isinstance(value, (float, np.floating)):
+        seconds = int(jd_to_datetime(value).timestamp())
+        return seconds - seconds % 60
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def record_from_row(row):
+    time, end, kind, body1, body2, code = row
+    return EventRecord(time, kind, body1, body2, code, end)
+
+def record_from_feed(entry):
+    """EventRecord of a feed entry, the inverse of EventRecord.to_feed; ValueError for an unknown description."""
+    match = FEED_DESCRIPTION.match(entry['description'])
+    if match is None or (match['aspect'] and match['aspect'] not in ASPECT_CODES):
+        raise ValueError(f"unknown feed description {entry['description']!r}")
+    end = parse_epoch(entry['datetime_end']) if entry['type'] == 'period' else None
+    time = parse_epoch(entry['datetime_start'] if end is not None else entry['datetime'])
+    if match['aspect']:
+        return EventRecord(time, ASPECT, BODY_IDS[match['aspect_body1'].lower()],
+                           BODY_IDS[match['aspect_body2'].lower()], ASPECT_CODES[match['aspect']])
+    if match['sign']:
+        return EventRecord(time, INGRESS, BODY_IDS[match['ingress_body'].lower()], code=SIGNS.index(match['sign']))
+    if match['station']:
+        code = TURNS_RETROGRADE if match['station'] == 'retrograde' else TURNS_DIRECT
+        return EventRecord(time, STATION, BODY_IDS[match['station_body'].lower()], code=code)
+    if match['phase']:
+        return EventRecord(time, PHASE, BODY_IDS['moon'], code=PHASE_NAMES.index(match['phase']))
+    return EventRecord(time, LUNAR_DAY, BODY_IDS['moon'], code=int(match['lunar_day']), end=end)
+
+def format_epoch(seconds, tz=None):
+    """The only place event times are turned into text."""
+    return datetime.fromtimestamp(seconds, tz=tz or timezone.utc).isoformat(' ', 'seconds')
+
+def aspect_record(planet1, planet2, angle, exact_time):
+    return EventRecord(parse_epoch(exact_time), ASPECT, BODY_IDS[planet1], BODY_IDS[planet2], int(angle))
+
+def ingress_record(planet, new_sign, time):
+    return EventRecord(parse_epoch(time), INGRESS, BODY_IDS[planet], code=SIGNS.index(new_sign))
+
+def station_record(event):
+    code = TURNS_RETROGRADE if event['phase'] == 'S_R' else TURNS_DIRECT
+    return EventRecord(parse_epoch(event['stationary_point']), STATION, BODY_IDS[event['planet']], code=code)
+
+def phase_record(phase, time):
+    return EventRecord(parse_epoch(time), PHASE, BODY_IDS['moon'], code=PHASE_NAMES.index(phase))
+
+def lunar_day_record(lunar_day):
+    """Period record of a lunar day from calculate_lunar_day_periods."""
+    return EventRecord(parse_epoch(lunar_day['start']), LUNAR_DAY, BODY_IDS['moon'],
+                       code=lunar_day['number'], end=parse_epoch(lunar_day['end']))
+
+def sort_records(records):
+    """Chronological order; ties keep their insertion order."""
+    return sorted(records, key=attrgetter('time'))
+
+def clip_records(records, start, end):
+    """
+    Records inside [start, end) epoch seconds. Points are kept by time; periods
+    that overlap the range are cut at its boundaries (merge_periods joins the pieces again).
+    """
+    clipped = []
+    for record in records:
+        if record.end is None:
+            if start <= record.time < end:
+                clipped.append(record)
+        elif record.time < end and record.end > start:
+            clipped.append(EventRecord(int(max(record.time, start)), record.kind, record.body1, record.body2,
+                                       record.code, int(min(record.end, end))))
+    return clipped
+
+def local_midnights(start, end, zone):
+    """Epoch seconds of the local midnights in zone from the day containing start to the one after end."""
+    day = datetime.fromtimestamp(start, zone).date()
+    last = datetime.fromtimestamp(end, zone).date() + timedelta(days=1)
+    midnights = []
+    while day <= last:
+        midnights.append(int(datetime(day.year, day.month, day.day, tzinfo=zone).timestamp()))
+        day += timedelta(days=1)
+    return np.array(midnights)
+
+def split_local_days(records, zones):
+    """
+    Split timezone-neutral records into the local calendar days of several IANA timezones.
+
+    Points go to the day that contains them; periods are cut at every local
+    midnight they span. The records are computed once and shared by every zone;
+    days are found by searching each zone's midnights, so this is cheap.
+
+    Parameters:
+    - records: EventRecords, e.g. the continuous Moon events of a Calendar
+    - zones: IANA names such as 'Europe/Berlin'
+
+    Returns:
+    - {zone: [(date 'YYYY-MM-DD', [EventRecord, ...]), ...]} in chronological order, days without events left out
+    """
+    records = sort_records(records)
+    if not records:
+        return {zone: [] for zone in zones}
+    times = np.array([record.time for record in records])
+    ends = np.array([record.time if record.end is None else record.end for record in records])
+
+    local_days = {}
+    for zone in zones:
+        tz = ZoneInfo(zone)
+        midnights = local_midnights(times.min(), ends.max(), tz)
+        first_days = np.searchsorted(midnights, times, side='right') - 1
+        # A period ending exactly at midnight does not reach into the next day
+        last_days = np.maximum(np.searchsorted(midnights, ends, side='left') - 1, first_days)
+        days = {}
+        for record, first_day, last_day in zip(records, first_days, last_days):
+            if record.end is None:
+                days.setdefault(first_day, []).append(record)
+                continue
+            for day in range(first_day, last_day + 1):
+                days.setdefault(day, []).extend(clip_records([record], midnights[day], midnights[day + 1]))
+        local_days[zone] = [(datetime.fromtimestamp(midnights[day], tz).strftime('%Y-%m-%d'), days[day])
+                            for day in sorted(days)]
+    return local_days
+
+def local_day_feeds(records, zones):
+    """
+    Feeds bucketed by local day for several timezones, with local times.
+
+    Returns:
+    - {zone: [{"date": "YYYY-MM-DD", "events": [feed entries]}, ...]}
+    """
+    return {zone: [{'date': date, 'events': [record.to_feed(ZoneInfo(zone)) for record in day_records]}
+                   for date, day_records in days]
+            for zone, days in split_local_days(records, zones).items()}
+
+def merge_periods(records):
+    """
+    Join period records of the same kind and code where one ends exactly when the next starts.
+    Point records pass through unchanged.
+    """
+    points = [record for record in records if record.end is None]
+    periods = sorted((record for record in records if record.end is not None),
+                     key=attrgetter('kind', 'code', 'time'))
+    merged = []
+    for record in periods:
+        previous = merged[-1] if merged else None
+        if (previous is not None and previous.kind == record.kind and previous.code == record.code
+                and previous.end == record.time):
+            previous.end = record.end
+        else:
+            merged.append(EventRecord(record.time, record.kind, record.body1, record.body2, record.code, record.end))
+    return points + merged
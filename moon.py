@@ -0,0 +1,238 @@
+# moon.py
+
+import numpy as np
+
+from ephemeris import get_ephemeris
+from utility import get_planet_object, to_jd, utc_midnight, time_grid, MINUTE, HOUR
+from signs import get_sign_changes, sign_index, SIGNS
+from aspects import find_all_aspect_periods
+
+PHASE_NAMES = ['New Moon', 'First Quarter', 'Full Moon', 'Last Quarter']
+
+def get_lunar_day(jd):
+    """
+    Calculate the lunar day (1-30) at a TT Julian date or array of Julian dates.
+    Uses the phase angle to determine the correct lunar day.
+    """
+    # Get moon phase information
+    phase_angle = get_ephemeris().moon_phase(jd)
+    
+    # Phase angle increases from 0° to 180° (waxing) then decreases from 180° to 360° (waning)
+    # Days 1-15 run from New Moon to Full Moon, days 16-30 from Full Moon to New Moon
+    lunar_day = np.where(phase_angle <= 180,
+                         1 + ((phase_angle / 180) * 15).astype(int),
+                         16 + (((phase_angle - 180) / 180) * 15).astype(int))
+    
+    # Handle edge cases
+    return np.clip(lunar_day, 1, 30)
+
+def calculate_lunar_day_periods(start_date, end_date):
+    """
+    Calculate the lunar days of the given period as continuous periods.
+    
+    Parameters:
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    
+    Returns:
+    - List of dictionaries with number, start and end (TT Julian dates) of every
+      lunar day, the first and last cut at the ends of the period
+    """
+    print("Calculating lunar days...") # for debugging
+    start_jd = to_jd(start_date)
+    end_jd = to_jd(end_date)
+    
+    # Sample the whole period at hourly intervals to catch transitions, in one call
+    check_times = time_grid(start_jd, end_jd, HOUR)
+    check_days = get_lunar_day(check_times)
+    
+    # Each transition ends one lunar day and starts the next
+    lunar_days = []
+    period_start = start_jd
+    for i in np.nonzero(check_days[1:] != check_days[:-1])[0]:
+        # Found a transition, find the exact time
+        transition_time = find_lunar_day_transition(check_times[i], check_times[i + 1],
+                                                    check_days[i], check_days[i + 1])
+        lunar_days.append({"number": int(check_days[i]), "start": period_start, "end": transition_time})
+        period_start = transition_time
+    lunar_days.append({"number": int(check_days[-1]), "start": period_start, "end": end_jd})
+    
+    print("Done calculating lunar days.\n")
+    return lunar_days
+
+def find_lunar_day_transition(start_time, end_time, from_day, to_day, precision_minutes=1):
+    """
+    Find the precise time when the lunar day changes using binary search.
+    
+    Parameters:
+    - start_time: TT Julian date before transition
+    - end_time: TT Julian date after transition
+    - from_day: lunar day before transition
+    - to_day: lunar day after transition
+    - precision_minutes: precision of search in minutes
+    
+    Returns:
+    - TT Julian date of the transition
+    """
+    # Binary search for transition point
+    while end_time - start_time > precision_minutes * MINUTE:
+        mid_time = (start_time + end_time) / 2
+        
+        # Adjust search window
+        if get_lunar_day(mid_time) == from_day:
+            start_time = mid_time
+        else:
+            end_time = mid_time
+    
+    # Return the transition time
+    return float((start_time + end_time) / 2)
+
+def find_sign_change_time(planet, date, hour, old_sign, new_sign, precision_minutes=5):
+    """
+    Find the precise time when a planet changes signs.
+    
+    Parameters:
+    - planet: planet name
+    - date: base date, as a datetime or TT Julian date
+    - hour: approximate hour of transition
+    - old_sign: sign before transition
+    - new_sign: sign after transition
+    - precision_minutes: precision of search in minutes
+    
+    Returns:
+    - TT Julian date of the transition
+    """
+    planet_obj = get_planet_object(planet)
+    old_index = SIGNS.index(old_sign)
+    
+    # Set up search window
+    start_time = utc_midnight(date) + hour * HOUR
+    end_time = start_time + HOUR - 1 / 86400
+    
+    # Binary search for transition point
+    while end_time - start_time > precision_minutes * MINUTE:
+        mid_time = (start_time + end_time) / 2
+        
+        # Adjust search window
+        if sign_index(planet_obj, mid_time) == old_index:
+            start_time = mid_time
+        else:
+            end_time = mid_time
+    
+    # Return the transition time
+    return (start_time + end_time) / 2
+
+def get_moon_sign_changes(start_date, end_date):
+    """
+    Get moon sign changes for the given period.
+    
+    Parameters:
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    
+    Returns:
+    - List of dictionaries with the exact_time (TT Julian date) and new sign of every change
+    """
+    print("Calculating Moon sign changes...") # for debugging
+    
+    sign_changes_list = []
+    for sign_change in get_sign_changes('moon', start_date, end_date):
+        sign_changes_list.append({
+            "exact_time": sign_change['datetime'],
+            "new_sign": sign_change['new_sign'],
+            "description": sign_change['description']
+        })
+    
+    print("Done calculating Moon sign changes.\n")
+    return sign_changes_list
+
+def get_moon_aspects(start_date, end_date):
+    """
+    Get moon aspects with other planets for the given period.
+    
+    Parameters:
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    
+    Returns:
+    - List of aspect periods as from find_all_aspect_periods
+    """
+    print("Calculating Moon aspects...") # for debugging
+    
+    # Get list of planets (excluding moon)
+    planets = ['mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto', 'sun']
+    major_aspects = [0, 60, 90, 120, 180]  # Conjunction, Sextile, Square, Trine, Opposition
+    
+    # All aspects between moon and planets for the whole period in one pass
+    aspects = find_all_aspect_periods(['moon'] + planets, major_aspects, 2, start_date, end_date,
+                                      pairs=[('moon', planet) for planet in planets])
+    
+    print("Done calculating Moon aspects.\n")
+    return aspects
+
+def get_moon_phases(start_date, end_date):
+    """
+    Get moon phases for the given period.
+    
+    Parameters:
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    
+    Returns:
+    - List of dictionaries with the phase, its time (TT Julian date) and description
+    """
+    print("Calculating Moon phases...") # for debugging
+    start_jd = to_jd(start_date)
+    end_jd = to_jd(end_date)
+    
+    # Function that returns the phase quarter (0-3) at a given time
+    phase_at = get_ephemeris().moon_quarter
+    
+    # Phases on a 3-hour grid for better detection, in one call
+    time_array = time_grid(start_jd, end_jd, 3 * HOUR)
+    phases = phase_at(time_array)
+    
+    # Find phase changes
+    phases_list = []
+    for i in np.nonzero(phases[1:] != phases[:-1])[0]:
+        prev_phase = phases[i]
+        
+        # Binary search between the previous and current time, to 1 minute precision
+        t_start = time_array[i]
+        t_end = time_array[i + 1]
+        while t_end - t_start > MINUTE:
+            t_mid = (t_start + t_end) / 2
+            if phase_at(t_mid) == prev_phase:
+                t_start = t_mid
+            else:
+                t_end = t_mid
+        
+        phase = PHASE_NAMES[phases[i + 1]]
+        phases_list.append({
+            "phase": phase,
+            "time": float(t_end),
+            "description": f"Moon is {phase}"
+        })
+    
+    print("Done calculating Moon phases.\n")
+    return phases_list
+
+def get_moon_events(start_date, end_date):
+    """
+    Aggregate all moon-related events for the given period.
+    
+    The events are continuous and timezone-neutral: nothing is split at
+    calendar days. Bucketing into the local days of any timezone is done
+    afterwards on the records (events.split_local_days), without recalculation.
+    
+    Parameters:
+    - start_date, end_date: datetimes or TT Julian dates defining the period to check
+    
+    Returns:
+    - Dictionary with lunar_days, sign_changes, aspects and phases of the whole period
+    """
+    print("Aggregating Moon events...") # for debugging
+    moon_events = {
+        "lunar_days": calculate_lunar_day_periods(start_date, end_date),
+        "sign_changes": get_moon_sign_changes(start_date, end_date),
+        "aspects": get_moon_aspects(start_date, end_date),
+        "phases": get_moon_phases(start_date, end_date)
+    }
+    print("Done aggregating Moon events.\n")
+    return moon_events
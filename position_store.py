@@ -0,0 +1,132 @@
+# position_store.py
+
+"""
+Read generated positions back without reloading positions.json or the ephemeris.
+
+PositionStore maps positions.bin (written by data_generator.py) into memory
+read-only. Every process that opens the same file shares the operating
+system's page cache instead of holding its own copy, and slices are views
+into the mapping rather than copies.
+
+    store = PositionStore('positions_manifest.json')
+    xyz, velocity = store.state(['mars', 'moon'], times)    # (2, len(times), 3)
+    times, samples = store.slice('moon', start, end)
+"""
+
+from datetime import datetime, timezone
+import json
+import os
+
+import numpy as np
+
+class PositionStore:
+    """
+    Memory-mapped geocentric ecliptic positions (AU) of every generated body.
+
+    Times can be given as epoch seconds (UTC), datetimes (naive ones are UTC)
+    or numpy datetime64 values, as scalars or arrays.
+    """
+    def __init__(self, manifest_path='positions_manifest.json'):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if 'samples' not in manifest:
+            raise ValueError(f"{manifest_path} has no binary samples; regenerate it with data_generator.py")
+
+        path = os.path.join(os.path.dirname(manifest_path), manifest['samples']['file'])
+        self.manifest = manifest
+        self.start = to_epoch(manifest['start'])
+        self.end = to_epoch(manifest['end'])
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        self._samples = {}
+        self._steps = {}
+        for name, entry in manifest['samples']['bodies'].items():
+            self._samples[name] = np.ndarray(entry['shape'], dtype=np.dtype(entry['dtype']).newbyteorder('<'),
+                                             buffer=self._map, offset=entry['offset'])
+            self._steps[name] = float(manifest['bodies'][name]['step_seconds'])
+
+    @property
+    def bodies(self):
+        return list(self._samples)
+
+    def step(self, body):
+        """Sample spacing of a body in seconds."""
+        return self._steps[body]
+
+    def samples(self, body):
+        """All samples of a body as a read-only (n, 3) view of the mapping."""
+        return self._samples[body]
+
+    def times(self, body):
+        """Epoch seconds of every sample of a body."""
+        return self.start + np.arange(len(self._samples[body])) * self._steps[body]
+
+    def slice(self, body, start, end):
+        """
+        Samples of a body from start to end, including the samples just outside
+        the range so interpolation covers both ends.
+
+        Returns:
+        - times: epoch seconds of the samples
+        - samples: (n, 3) view of the mapping, no data is copied
+        """
+        samples = self._samples[body]
+        step = self._steps[body]
+        first = max(0, int(np.floor((to_epoch(start) - self.start) / step)))
+        last = min(len(samples), int(np.ceil((to_epoch(end) - self.start) / step)) + 1)
+        return self.start + np.arange(first, last) * step, samples[first:last]
+
+    def state(self, bodies, times):
+        """
+        Interpolated positions and velocities of several bodies at once.
+
+        Positions are interpolated linearly between samples, exactly as the
+        frontend does; velocities are the slope of the enclosing segment.
+
+        Parameters:
+        - bodies: body name or list of names
+        - times: scalar or array of times
+
+        Returns:
+        - positions in AU and velocities in AU per day, shape (bodies, times, 3),
+          without the bodies axis when a single name is given and without the
+          times axis for a scalar time
+        """
+        single = isinstance(bodies, str)
+        epochs = np.asarray(to_epoch(times), dtype=float)
+        t = np.atleast_1d(epochs)
+        if len(t) and (t.min() < self.start or t.max() > self.end):
+            raise ValueError("times outside the generated range "
+                             f"{self.manifest['start']} - {self.manifest['end']}")
+
+        positions = np.empty((1 if single else len(bodies), len(t), 3))
+        velocities = np.empty_like(positions)
+        for row, body in enumerate([bodies] if single else bodies):
+            samples = self._samples[body]
+            step = self._steps[body]
+            index = (t - self.start) / step
+            i0 = np.clip(np.floor(index).astype(np.int64), 0, len(samples) - 2)
+            fraction = (index - i0)[:, None]
+            p0 = samples[i0]
+            p1 = samples[i0 + 1]
+            positions[row] = p0 + (p1 - p0) * fraction
+            velocities[row] = (p1 - p0) * (86400 / step)
+        if epochs.ndim == 0:
+            positions, velocities = positions[:, 0], velocities[:, 0]
+        if single:
+            return positions[0], velocities[0]
+        return positions, velocities
+
+def to_epoch(value):
+    """Epoch seconds (UTC) as float or float array from seconds, datetimes, datetime64 or 'YYYY-MM-DD HH:MM:SS' strings."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    array = np.asarray(value)
+    if np.issubdtype(array.dtype, np.datetime64):
+        return (array - np.datetime64(0, 's')) / np.timedelta64(1, 's')
+    if array.dtype == object:
+        return np.array([to_epoch(item) for item in array.ravel()]).reshape(array.shape)
+    return array.astype(float)
@@ -0,0 +1,240 @@
+# retrograde.py
+
+import numpy as np
+
+from utility import (format_datetime, to_jd, utc_midnight, get_planet_object, calculate_velocity,
+                     calculate_ecliptic_velocity, ecliptic_longitude, time_grid, MINUTE, HOUR)
+
+PHASE_TRANSITIONS = {
+    'R': {'next': 'S_D', 'threshold': -0.1},
+    'S_D': {'next': 'D', 'threshold': 0.1},
+    'D': {'next': 'S_R', 'threshold': 0.1},
+    'S_R': {'next': 'R', 'threshold': -0.1}
+}
+
+PLANET_VELOCITY_THRESHOLDS = {
+    'mercury': {'stationary': 0.05, 'exact': 0.005},
+    'venus': {'stationary': 0.04, 'exact': 0.004},
+    'mars': {'stationary': 0.03, 'exact': 0.003},
+    'jupiter': {'stationary': 0.02, 'exact': 0.002},
+    'saturn': {'stationary': 0.015, 'exact': 0.0015},
+    'uranus': {'stationary': 0.01, 'exact': 0.001},
+    'neptune': {'stationary': 0.008, 'exact': 0.0008},
+    'pluto': {'stationary': 0.006, 'exact': 0.0006},
+    'moon': {'stationary': 0.3, 'exact': 0.03}
+}
+
+# Coarse scan step per planet, in days
+PLANET_STEP_SIZES = {
+    'mercury': 10,
+    'venus': 30,
+    'mars': 30,
+    'jupiter': 60,
+    'saturn': 90,
+    'uranus': 120,
+    'neptune': 150,
+    'pluto': 180,
+    'moon': 3  # Moon doesn't really go retrograde but included for completeness
+}
+
+def find_stationary_interpolation(planet_obj, start_date, end_date, sample_minutes=10):
+    """Find stationary point using polynomial interpolation; times are TT Julian dates"""
+    from numpy.polynomial import Polynomial
+    
+    # Sample velocities at regular intervals, in one call
+    sample_times = np.arange(start_date, end_date + MINUTE / 2, sample_minutes * MINUTE)
+    sample_times = sample_times[sample_times <= end_date]
+    
+    if len(sample_times) < 4:
+        return None, float('inf')
+    sample_velocities = calculate_ecliptic_velocity(planet_obj, sample_times)
+        
+    # Normalize times to avoid numerical issues
+    base_time = sample_times[0]
+    norm_times = sample_times - base_time
+    
+    try:
+        # Fit cubic polynomial to the velocity data
+        poly = Polynomial.fit(norm_times, sample_velocities, 3)
+        roots = poly.roots()
+        
+        # Filter for real roots within our time range
+        valid_roots = [r.real for r in roots if abs(r.imag) < 1e-10 and 
+                      norm_times[0] <= r.real <= norm_times[-1]]
+        
+        if valid_roots:
+            # Find root with velocity closest to zero
+            best_root = min(valid_roots, key=lambda r: abs(poly(r)))
+            interp_time = float(base_time + best_root)
+            velocity = calculate_ecliptic_velocity(planet_obj, interp_time)
+            return interp_time, abs(velocity)
+            
+    except Exception as e:
+        print(f"Interpolation failed: {e}")
+    
+    return None, float('inf')
+
+def find_stationary_binary(planet_obj, start_date, end_date, precision_minutes=1):
+    """Find stationary point using binary search; times are TT Julian dates"""
+    search_start = start_date
+    search_end = end_date
+    best_point = None
+    min_velocity = float('inf')
+    
+    while search_end - search_start > precision_minutes * MINUTE:
+        mid_time = (search_start + search_end) / 2
+        before_velocity, mid_velocity, after_velocity = calculate_ecliptic_velocity(
+            planet_obj, np.array([search_start, mid_time, search_end]))
+        
+        # Track point with minimum absolute velocity
+        if abs(mid_velocity) < min_velocity:
+            min_velocity = abs(mid_velocity)
+            best_point = mid_time
+        
+        # If we found a sign change, narrow the search to that interval
+        if before_velocity * mid_velocity <= 0:
+            search_end = mid_time
+            continue
+        elif mid_velocity * after_velocity <= 0:
+            search_start = mid_time
+            continue
+        
+        # Otherwise, move in the direction of decreasing velocity
+        if abs(before_velocity) < abs(after_velocity):
+            search_end = mid_time
+        else:
+            search_start = mid_time
+    
+    return best_point, min_velocity
+
+def find_stationary_point(planet, start_date, end_date, precision_minutes=1):
+    """
+    Find the exact moment when a planet's apparent motion becomes zero using multiple methods.
+    First uses binary search to find an approximate point, then refines with interpolation.
+    Returns a TT Julian date, or None.
+    """
+    planet_obj = get_planet_object(planet)
+    start_date = to_jd(start_date)
+    end_date = to_jd(end_date)
+    
+    print(f"Searching for stationary point between {format_datetime(start_date)} and {format_datetime(end_date)}")
+    
+    # First use binary search to find an approximate stationary point
+    binary_point, binary_velocity = find_stationary_binary(planet_obj, start_date, end_date, precision_minutes)
+    
+    if binary_point:
+        print(f"Binary search found point at {format_datetime(binary_point)} with velocity {binary_velocity}")
+        
+        # Now use interpolation in a narrow window around the binary search result
+        # Use a window of 6 hours before and after the binary point,
+        # staying within the original search range
+        interp_start = max(binary_point - 6 * HOUR, start_date)
+        interp_end = min(binary_point + 6 * HOUR, end_date)
+        
+        # Run interpolation with a finer sampling interval
+        interp_point, interp_velocity = find_stationary_interpolation(
+            planet_obj, interp_start, interp_end, sample_minutes=5
+        )
+        
+        if interp_point and abs(interp_velocity) < abs(binary_velocity):
+            print(f"Interpolation refined result: velocity = {interp_velocity}")
+            return interp_point
+        else:
+            print(f"Using binary search result: velocity = {binary_velocity}")
+            return float(binary_point)
+    else:
+        print("Binary search failed")
+    # If binary search failed, try interpolation on the full range as a fallback
+    interp_point, interp_velocity = find_stationary_interpolation(planet_obj, start_date, end_date)
+    if interp_point:
+        print(f"Using interpolation result: velocity = {interp_velocity}")
+        return interp_point
+    
+    print("No stationary point found")
+    return None
+
+# Function to calculate retrograde motion of the planet
+def is_retrograde(planet, date):
+    # Get ecliptic longitude at the start of the day and of the next day
+    pos1, pos2 = ecliptic_longitude(get_planet_object(planet), utc_midnight(date) + np.array([0, 1]))
+    
+    # If longitude is decreasing, planet is retrograde
+    # (Need to handle cases where it crosses 0/360 degrees)
+    if pos1 > pos2 and abs(pos1 - pos2) < 350:
+        return True
+    return False
+
+# Function to find retrograde periods
+def find_retrograde_periods(planet, start_date, end_date):
+    """
+    Find stationary points for a planet within a date range.
+    Returns a list of events with stationary points (TT Julian dates).
+    """
+    planet_obj = get_planet_object(planet)
+    periods = []
+    
+    # Skip Sun as it doesn't have retrograde motion from Earth's perspective
+    if planet.lower() == 'sun':
+        return periods
+    
+    # Get planet-specific thresholds
+    thresholds = PLANET_VELOCITY_THRESHOLDS.get(
+        planet.lower(), 
+        {'stationary': 0.1, 'exact': 0.01}  # Default values
+    )
+    stationary_threshold = thresholds['stationary']
+    
+    # Adapt step size based on planet
+    step_size = PLANET_STEP_SIZES.get(planet.lower(), 30)
+    
+    # Scan through the date range with large steps to find velocity sign changes;
+    # the last step is cut short at the end of the range
+    start_date = to_jd(start_date)
+    end_date = to_jd(end_date)
+    scan_times = time_grid(start_date, end_date, step_size)
+    velocities = calculate_ecliptic_velocity(planet_obj, scan_times)
+    
+    print(f"Starting search for {planet} stationary points from {format_datetime(start_date)} to {format_datetime(end_date)}")
+    print(f"Initial velocity: {velocities[0]}")
+    
+    for i in range(len(scan_times) - 1):
+        current_date, next_date = scan_times[i], scan_times[i + 1]
+        last_velocity, velocity = velocities[i], velocities[i + 1]
+        
+        # Check if velocity changed sign - indicates a stationary point between
+        if last_velocity * velocity <= 0 and last_velocity != 0:
+            print(f"Velocity sign change detected between {format_datetime(current_date)} ({last_velocity}) and {format_datetime(next_date)} ({velocity})")
+            
+            # Find the exact stationary point in this interval, looking a bit before
+            # and after but within the original range
+            search_start = max(current_date - step_size / 4, start_date)
+            search_end = min(next_date + step_size / 4, end_date)
+            
+            stationary_point = find_stationary_point(planet, search_start, search_end)
+            
+            if stationary_point:
+                # Determine if this is turning retrograde or direct
+                before_vel, after_vel = calculate_ecliptic_velocity(planet_obj, stationary_point + np.array([-1, 1]))
+                
+                phase = 'S_R' if before_vel > after_vel else 'S_D'
+                description = 'turns retrograde' if phase == 'S_R' else 'turns direct'
+                
+                periods.append({
+                    'planet': planet,
+                    'phase': phase,
+                    'stationary_point': stationary_point,
+                    'description': f"{planet.capitalize()} {description}"
+                })
+    
+    print(f"Finished search for {planet} stationary points.")
+    return periods
+
+# Function to get phase description
+def get_phase_description(phase):
+    descriptions = {
+        'D': 'Direct Motion',
+        'S_R': 'Stationary Retrograde',
+        'R': 'Retrograde Motion',
+        'S_D': 'Stationary Direct'
+    }
+    return descriptions.get(phase, 'Unknown Phase')
@@ -0,0 +1,360 @@
+# server.py
+
+"""
+Local calculation server for the visualizer.
+
+Serves the widget like `python -m http.server` and adds two endpoints that
+compute data on demand instead of relying on a batch run:
+
+    GET /positions?from=YYYY-MM-DD&to=YYYY-MM-DD&bodies=moon,mars
+    GET /events?from=YYYY-MM-DD&to=YYYY-MM-DD&kinds=aspects,moon&orb=5
+
+Ranges are split into calendar months. Each month is computed once in a worker
+process, kept in an LRU cache and shared between concurrent requests. Responses
+are streamed as newline-delimited JSON while the months complete. Events are
+those in [from, to + 1 day). A positions line covers one body and month at that
+month's own step_seconds, with the samples just outside the range so it can be
+interpolated up to both ends; consecutive lines of a body never repeat a sample.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, parse_qs, unquote
+import argparse
+import asyncio
+import json
+import math
+import mimetypes
+import os
+
+from skyfield.api import utc
+
+from build_assets import write_glyph_atlas, GLYPH_JSON
+
+ROOT = os.path.dirname(os.path.realpath(__file__))
+
+# Months kept in the result cache, across all endpoints
+CACHE_SIZE = 256
+
+# Longest range a request may ask for; every month of it is submitted to the pool at once
+MAX_RANGE_DAYS = 3660
+
+# Calendar stages that can be requested with kinds=
+EVENT_STAGES = {
+    'aspects': 'add_aspects',
+    'sign_changes': 'add_sign_changes',
+    'retrogrades': 'add_retrogrades',
+    'moon': 'add_moon_events'
+}
+
+# Generated positions are read from here when they cover a requested piece
+POSITIONS_MANIFEST = os.path.join(ROOT, 'positions_manifest.json')
+
+# --- Worker functions (run in the process pool) ---
+
+_position_store = None
+
+def open_position_store():
+    """The worker's PositionStore, or None without generated binary positions; all workers share its pages."""
+    global _position_store
+    if _position_store is None:
+        from position_store import PositionStore
+        try:
+            _position_store = PositionStore(POSITIONS_MANIFEST)
+        except (OSError, ValueError):
+            _position_store = False
+    return _position_store or None
+
+def compute_positions(body, start_date, end_date):
+    """
+    Positions of one body from start_date to end_date (inclusive) at its adaptive cadence.
+    Read from the generated positions when they cover the range, computed otherwise.
+
+    Returns:
+    - dict with body, start, step_seconds and positions [[x, y, z], ...]
+    """
+    store = open_position_store()
+    if store and body in store.bodies and store.start <= start_date.timestamp() and end_date.timestamp() <= store.end:
+        times, samples = store.slice(body, start_date, end_date)
+        return {
+            'body': body,
+            'start': datetime.fromtimestamp(times[0], tz=utc).strftime('%Y-%m-%d %H:%M:%S'),
+            'step_seconds': store.step(body),
+            'positions': samples.tolist()
+        }
+
+    import data_generator
+    step, _, _ = data_generator.choose_step(body, start_date, end_date, tolerance_deg=data_generator.DEFAULT_TOLERANCE_DEG)
+    count = data_generator.sample_count(start_date, end_date, step)
+    _, xyz = next(data_generator.iter_position_chunks(body, start_date, step, count))
+    return {
+        'body': body,
+        'start': start_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'step_seconds': step,
+        'positions': xyz.tolist()
+    }
+
+def compute_events(stage, start_date, end_date, orb):
+    """
+    Run one Calendar stage for [start_date, end_date).
+
+    Returns:
+    - list of EventRecords whose time falls inside the range
+    """
+    from astro_calendar import Calendar
+    calendar = Calendar(start_date, end_date - timedelta(minutes=1), orb=orb)
+    getattr(calendar, EVENT_STAGES[stage])()
+    start, end = int(start_date.timestamp()), int(end_date.timestamp())
+    return [event for event in calendar.events + calendar.moon_events if start <= event.time < end]
+
+# --- Cache ---
+
+class ResultCache:
+    """
+    LRU cache of computed pieces with deduplication of in-flight computations.
+
+    A piece requested while it is still being computed awaits the same future
+    instead of being submitted to the pool again.
+    """
+    def __init__(self, pool, size=CACHE_SIZE):
+        self.pool = pool
+        self.size = size
+        self.results = OrderedDict()
+        self.inflight = {}
+
+    def get(self, key, func, *args):
+        """Return an awaitable for the result of func(*args), computing it at most once."""
+        if key in self.results:
+            self.results.move_to_end(key)
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(self.results[key])
+            return future
+        if key not in self.inflight:
+            future = asyncio.ensure_future(self._compute(key, func, *args))
+            # A request that fails early leaves its other pieces unawaited; their errors are not news
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self.inflight[key] = future
+        return self.inflight[key]
+
+    async def _compute(self, key, func, *args):
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+        finally:
+            del self.inflight[key]
+        self.results[key] = result
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+        return result
+
+# --- Request handling ---
+
+class BadRequest(Exception):
+    pass
+
+def month_pieces(start_date, end_date):
+    """Calendar-month pieces [piece_start, piece_end) covering [start_date, end_date)."""
+    piece_start = start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while piece_start < end_date:
+        year, month = divmod(piece_start.month, 12)
+        piece_end = piece_start.replace(year=piece_start.year + year, month=month + 1)
+        yield piece_start, piece_end
+        piece_start = piece_end
+
+def parse_range(query):
+    """The from/to query parameters as [start, end) datetimes; 'to' is an inclusive day."""
+    try:
+        start = datetime.strptime(query['from'][0], '%Y-%m-%d').replace(tzinfo=utc)
+        end = datetime.strptime(query['to'][0], '%Y-%m-%d').replace(tzinfo=utc) + timedelta(days=1)
+    except (KeyError, ValueError, OverflowError):
+        raise BadRequest("from and to must be dates in YYYY-MM-DD format")
+    if end <= start:
+        raise BadRequest("to must not be before from")
+    if end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise BadRequest(f"ranges are limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+def parse_list(query, name, allowed):
+    values = query[name][0].split(',') if name in query else list(allowed)
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        raise BadRequest(f"unknown {name}: {', '.join(unknown)}")
+    return values
+
+def clip_positions(piece, start, end, after=None):
+    """
+    The samples of a computed piece covering [start, end), including the samples
+    just outside it so the range can be interpolated up to both ends, as
+    PositionStore.slice does. Samples at or before `after`, the last sample
+    already sent for the body, are dropped, so consecutive months do not repeat
+    the sample they share at their boundary.
+    """
+    first_time = datetime.strptime(piece['start'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=utc)
+    step = piece['step_seconds']
+    first = max(0, math.floor((start - first_time).total_seconds() / step))
+    if after is not None:
+        first = max(first, math.floor((after - first_time).total_seconds() / step) + 1)
+    last = max(first, min(len(piece['positions']), math.ceil((end - first_time).total_seconds() / step) + 1))
+    return dict(piece, start=(first_time + timedelta(seconds=first * step)).strftime('%Y-%m-%d %H:%M:%S'),
+                positions=piece['positions'][first:last])
+
+async def positions_lines(cache, query):
+    """Yield one JSON line per body and month, in chronological order per body, clipped to the range."""
+    from data_generator import PLANETS
+    start, end = parse_range(query)
+    bodies = parse_list(query, 'bodies', PLANETS)
+    pieces = [(body, piece_start, piece_end) for body in bodies for piece_start, piece_end in month_pieces(start, end)]
+    # Submit everything first so the pool works on all pieces while we stream;
+    # whole months are cached, so overlapping requests share them
+    futures = [cache.get(('positions',) + piece, compute_positions, *piece) for piece in pieces]
+    last_sent = {}
+    for (body, piece_start, piece_end), future in zip(pieces, futures):
+        line = clip_positions(await future, max(start, piece_start), min(end, piece_end), last_sent.get(body))
+        if line['positions']:
+            last_sent[body] = (datetime.strptime(line['start'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=utc)
+                               + timedelta(seconds=(len(line['positions']) - 1) * line['step_seconds']))
+        yield json.dumps(line)
+
+async def events_lines(cache, query):
+    """
+    Yield one JSON line per event in chronological order.
+
+    Lunar days are split at piece boundaries, so periods still open at the end of
+    a month are held back, together with anything after them, until they are merged.
+    """
+    from events import merge_periods, sort_records
+    start, end = parse_range(query)
+    stages = parse_list(query, 'kinds', EVENT_STAGES)
+    try:
+        orb = float(query.get('orb', ['5'])[0])
+    except ValueError:
+        raise BadRequest("orb must be a number")
+    range_start, range_end = int(start.timestamp()), int(end.timestamp())
+
+    months = list(month_pieces(start, end))
+    futures = [[cache.get(('events', stage, orb, piece_start, piece_end), compute_events, stage, piece_start, piece_end, orb)
+                for stage in stages] for piece_start, piece_end in months]
+    pending = []
+    for (piece_start, piece_end), piece_futures in zip(months, futures):
+        records = list(pending)
+        for future in piece_futures:
+            records.extend(await future)
+        records = sort_records(merge_periods(records))
+        piece_end = int(piece_end.timestamp())
+        cutoff = min((event.time for event in records if event.end is not None and event.end >= piece_end), default=piece_end)
+        pending = [event for event in records if event.time >= cutoff]
+        for event in records:
+            if event.time < cutoff and range_start <= (event.end or event.time) and event.time < range_end:
+                yield json.dumps(event.to_feed())
+    for event in pending:
+        if range_start <= (event.end or event.time) and event.time < range_end:
+            yield json.dumps(event.to_feed())
+
+ENDPOINTS = {
+    '/positions': positions_lines,
+    '/events': events_lines
+}
+
+async def write_head(writer, status, content_type, headers=()):
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}[status]
+    lines = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}", "Connection: close"]
+    lines.extend(headers)
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+
+async def send_error(writer, status, message):
+    body = json.dumps({'error': message}).encode()
+    await write_head(writer, status, 'application/json', [f"Content-Length: {len(body)}"])
+    writer.write(body)
+
+async def send_stream(writer, lines):
+    """
+    Send lines with chunked transfer encoding as they are produced.
+
+    A calculation that fails before the first line gets a 500; one that fails
+    later ends the stream without its final chunk, so clients see it is incomplete.
+    """
+    try:
+        line = await anext(lines, None)  # Parameter errors surface here, before the headers
+    except (BadRequest, ConnectionError):
+        raise
+    except Exception as e:
+        print(f"Calculation failed: {e!r}")
+        await send_error(writer, 500, f"calculation failed: {e}")
+        return
+    await write_head(writer, 200, 'application/x-ndjson', ["Transfer-Encoding: chunked", "Cache-Control: no-cache"])
+    while line is not None:
+        data = (line + "\n").encode()
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        await writer.drain()
+        try:
+            line = await anext(lines, None)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            print(f"Calculation failed mid-stream: {e!r}")
+            return
+    writer.write(b"0\r\n\r\n")
+
+async def send_file(writer, path):
+    """Serve a file from the project directory, like python -m http.server."""
+    full_path = os.path.realpath(os.path.join(ROOT, unquote(path).lstrip('/')))
+    if os.path.isdir(full_path):
+        full_path = os.path.join(full_path, 'index.html')
+    if not full_path.startswith(ROOT + os.sep) or not os.path.isfile(full_path):
+        await send_error(writer, 404, f"{path} not found")
+        return
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    await write_head(writer, 200, content_type, [f"Content-Length: {os.path.getsize(full_path)}"])
+    with open(full_path, 'rb') as f:
+        while chunk := f.read(1 << 16):
+            writer.write(chunk)
+            await writer.drain()
+
+async def handle(cache, reader, writer):
+    try:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass  # Headers are not needed
+        if len(request_line) < 2:
+            return
+        method, target = request_line[0], request_line[1]
+        url = urlsplit(target)
+        print(f"{method} {target}")
+        if method != 'GET':
+            await send_error(writer, 405, "only GET is supported")
+        elif url.path in ENDPOINTS:
+            try:
+                await send_stream(writer, ENDPOINTS[url.path](cache, parse_qs(url.query)))
+            except BadRequest as e:
+                await send_error(writer, 400, str(e))
+        else:
+            await send_file(writer, url.path)
+        await writer.drain()
+    except ConnectionError:
+        pass
+    except Exception as e:
+        print(f"Request failed: {e!r}")
+    finally:
+        writer.close()
+
+async def serve(host, port, workers, cache_size):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        cache = ResultCache(pool, cache_size)
+        server = await asyncio.start_server(lambda r, w: handle(cache, r, w), host, port)
+        print(f"Serving on http://{host}:{port}/templates/")
+        async with server:
+            await server.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the visualizer and compute positions and events on demand.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes for calculations")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="computed months kept in memory")
+    args = parser.parse_args()
+
+    # The glyph atlas is build output, not checked in
+    if not os.path.exists(os.path.join(ROOT, GLYPH_JSON)):
+        write_glyph_atlas(ROOT)
+    asyncio.run(serve(args.host, args.port, args.workers, args.cache_size))
@@ -0,0 +1,73 @@
+# shards.py
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from utility import to_jd
+from events import clip_records, merge_periods, sort_records, parse_epoch
+
+SHARD_DAYS = 365
+SHARD_OVERLAP = timedelta(days=1)
+
+def shard_plan(start_date, end_date, shard_days=SHARD_DAYS, overlap=SHARD_OVERLAP):
+    """
+    Split a range into consecutive time shards.
+
+    Parameters:
+    - start_date, end_date: datetimes or TT Julian dates
+    - shard_days: length of every shard but the last
+    - overlap: how far each shard is computed past its ends; it must cover how far
+      a detector looks around an event (its scan step, the window of an aspect),
+      so an event is found the same way in the shard that owns it as in a serial run
+
+    Returns:
+    - list of (start, end, compute_start, compute_end) TT Julian dates; the shard owns
+      the events in [start, end) and is computed over [compute_start, compute_end),
+      which never reaches outside the range
+    """
+    start_jd, end_jd = to_jd(start_date), to_jd(end_date)
+    overlap_days = overlap.total_seconds() / 86400
+    plan = []
+    shard_start = start_jd
+    while shard_start < end_jd:
+        shard_end = min(shard_start + shard_days, end_jd)
+        plan.append((shard_start, shard_end, max(shard_start - overlap_days, start_jd), min(shard_end + overlap_days, end_jd)))
+        shard_start = shard_end
+    return plan
+
+def compute_shard(compute, shard):
+    """Run compute(start, end) over a shard and keep the records it owns; runs in a worker process."""
+    start, end, compute_start, compute_end = shard
+    return clip_records(compute(compute_start, compute_end), parse_epoch(start), parse_epoch(end))
+
+def stitch(shard_records):
+    """
+    Join the records of consecutive shards into one chronological list.
+
+    Every point event belongs to the one shard whose range contains it, so events
+    found in both overlaps appear once; periods (lunar days) cut at a shard edge
+    are joined with their continuation in the next shard.
+    """
+    return sort_records(merge_periods([record for records in shard_records for record in records]))
+
+def run_sharded(compute, start_date, end_date, shard_days=SHARD_DAYS, overlap=SHARD_OVERLAP, workers=None):
+    """
+    Run a detector over a long range as parallel time shards.
+
+    Parameters:
+    - compute: function (start, end) -> EventRecords taking TT Julian dates; it is sent
+      to worker processes, so it must be picklable (a module-level function or a
+      functools.partial of one, not a lambda)
+    - start_date, end_date: datetimes or TT Julian dates
+    - shard_days, overlap: see shard_plan
+    - workers: worker processes, all CPUs by default; 1 runs the shards in this process
+
+    Returns:
+    - EventRecords of [start_date, end_date), the same as a serial run clipped to the range
+    """
+    plan = shard_plan(start_date, end_date, shard_days, overlap)
+    print(f"Running {len(plan)} shards of {shard_days} days")
+    if len(plan) <= 1 or workers == 1:
+        return stitch(compute_shard(compute, shard) for shard in plan)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return stitch(pool.map(compute_shard, [compute] * len(plan), plan))
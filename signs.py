@@ -0,0 +1,92 @@
+# signs.py
+
+import numpy as np
+
+from utility import to_jd, ecliptic_longitude, time_grid, MINUTE, HOUR
+
+# Coarse scan step per planet, in days
+PLANET_STEP_SIZES = {
+        'mercury': 1,
+        'venus': 2,
+        'mars': 5,
+        'jupiter': 30,
+        'saturn': 60,
+        'uranus': 120,
+        'neptune': 180,
+        'pluto': 240,
+        'sun': 1,
+        'moon': 6 * HOUR  # Moon changes signs every 2-3 days
+    }
+SIGNS = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", 
+             "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+
+# Import utility functions after initializing skyfield
+from utility import get_planet_object
+
+def sign_index(planet_obj, jd):
+    """Zodiac sign number (0-11) at a Julian date or array of Julian dates; each sign is 30 degrees"""
+    return (ecliptic_longitude(planet_obj, jd) // 30).astype(int)
+
+# Function to calculate the current sign of the planet
+def get_planet_sign(planet, date):
+    """Sign of the planet at a datetime or TT Julian date"""
+    return SIGNS[sign_index(get_planet_object(planet), to_jd(date))]
+
+# Function to get precise sign changes for a planet within a date range
+def get_sign_changes(planet, start_date, end_date):
+    """
+    Find all sign changes for a planet within the given date range with minute precision.
+    
+    Args:
+        planet (str): Name of the planet
+        start_date (datetime or float): Start of the search, datetime or TT Julian date
+        end_date (datetime or float): End of the search, datetime or TT Julian date
+        
+    Returns:
+        list: List of dictionaries containing datetime (TT Julian date), old_sign, new_sign, and description for each sign change
+    """
+    sign_changes = []
+    planet_obj = get_planet_object(planet)
+    start_jd = to_jd(start_date)
+    end_jd = to_jd(end_date)
+    
+    # Get appropriate step size for the planet
+    initial_step = PLANET_STEP_SIZES.get(planet.lower(), 1)
+    
+    # First pass: signs on the whole step grid in one call, to find the steps with a sign change
+    grid = time_grid(start_jd, end_jd, initial_step)
+    signs = sign_index(planet_obj, grid)
+    
+    # Second pass: For each step with a change, narrow down to minute precision
+    for i in np.nonzero(signs[1:] != signs[:-1])[0]:
+        start_sign = signs[i]
+        end_sign = signs[i + 1]
+            
+        # Binary search to find the exact transition point
+        search_start = grid[i]
+        search_end = grid[i + 1]
+        
+        # Continue narrowing down until we reach minute precision
+        while search_end - search_start > MINUTE:
+            mid_time = (search_start + search_end) / 2
+            
+            if sign_index(planet_obj, mid_time) == start_sign:
+                search_start = mid_time
+            else:
+                search_end = mid_time
+        
+        # At this point, search_start has the last time with start_sign
+        # and search_end has the first time with end_sign (within 1 minute)
+        transition_time = float(search_end)
+        old_sign = SIGNS[start_sign]
+        new_sign = SIGNS[end_sign]
+        
+        sign_changes.append({
+            'planet': planet,
+            'datetime': transition_time,
+            'old_sign': old_sign,
+            'new_sign': new_sign,
+            'description': f"{planet.capitalize()} enters {new_sign}"
+        })
+    
+    return sign_changes
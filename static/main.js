@@ -2,40 +2,401 @@
 
 console.log("main.js loaded");
 
-// Basic Three.js setup
-const scene = new THREE.Scene();
-const camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
-camera.position.set(0, 50, 0);
-camera.lookAt(0, 0, 0);
+// Scene units per astronomical unit
+const AU_TO_SCENE = 1;
 
-const renderer = new THREE.WebGLRenderer({ antialias: true });
-renderer.setSize(window.innerWidth, window.innerHeight);
-document.body.appendChild(renderer.domElement);
+// Orbit path level of detail: allowed error on screen and vertex budget per body
+const ORBIT_MAX_PIXEL_ERROR = 1;
+const ORBIT_VERTEX_BUDGET = 2000;
 
-// Placeholder for data
-let positionsData = {};
-let eventsData = {};
-let moonEventsData = {};
+// Playback: frame budget while playing and simulated seconds per real second
+const PLAYBACK_FRAME_BUDGET_MS = 1000 / 30;
+const PLAYBACK_RATE = 86400;
+
+// Progressive loading: Three.js is fetched only when the widget comes near the
+// viewport; finer position tiers and event months follow the timeline
+const THREE_URL = 'https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js';
+const BOOT_ROOT_MARGIN = '200px';
+const SCRUB_LOAD_DELAY_MS = 150;
+const EVENT_PREFETCH_MONTHS = 1;  // Months loaded on each side of the current one
+
+// Orbit shading from the speed profiles: paths are tinted while a body is
+// retrograde and fade towards the station colour as it slows below
+// STATION_SHADE_FACTOR times its stationary speed
+const ORBIT_COLOR = 0x444466;
+const RETROGRADE_COLOR = 0x884455;
+const STATION_COLOR = 0xddaa44;
+const STATION_SHADE_FACTOR = 10;
+
+// Event density strip under the timeline slider, drawn from the finest level of
+// the density pyramid whose buckets over the whole range fit in its width
+const DENSITY_HEIGHT = 24;
+const DENSITY_COLORS = { aspect: '#33cc66', ingress: '#ffdd33', station: '#ff4488', phase: '#cccccc', lunar_day: '#555577' };
+const DAY_MS = 86400000;
+
+// Performance overlay, enabled by ?perf in the page URL; the same numbers are
+// returned as JSON by window.astroVizPerf()
+const PERF_PARAM = 'perf';
+const PERF_FRAME_WINDOW = 300;  // Frames kept for FPS and percentiles
+const PERF_OVERLAY_INTERVAL_MS = 500;
+const PERF_SECTIONS = ['interpolation', 'events', 'orbits', 'render'];
+
+// Event layer: an event is drawn while the timeline is within EVENT_ACTIVE_SECONDS of it.
+// Aspect lines and station/ingress markers live in fixed-capacity pools that are
+// rewritten in place, so scrubbing allocates nothing and costs two draw calls;
+// events beyond the capacity are skipped for the frame.
+const EVENT_ACTIVE_SECONDS = 86400;
+const ASPECT_LINE_CAPACITY = 256;
+const EVENT_MARKER_CAPACITY = 128;
+const EVENT_MARKER_PIXELS = 6;  // Marker radius on screen
+const EVENT_STYLES = {
+    Conjunction: 0xffffff,
+    Sextile: 0x3399ff,
+    Square: 0xff3333,
+    Trine: 0x33cc66,
+    Opposition: 0xff9933,
+    retrograde: 0xff4488,
+    direct: 0x44ddff,
+    ingress: 0xffdd33
+};
+const ASPECT_PATTERN = /^(\w+) in (\w+) with (\w+)$/;
+const STATION_PATTERN = /^(\w+) turns (retrograde|direct)$/;
+const INGRESS_PATTERN = /^(\w+) enters (\w+)$/;
+
+// Event labels: glyphs from the atlas written by build_assets.py, drawn by one
+// instanced mesh; each glyph fades out towards the edge of the active window
+const GLYPH_ATLAS = 'glyphs.json';
+const GLYPH_CAPACITY = 1024;
+const GLYPH_PIXELS = 16;  // Glyph size on screen
+const GLYPH_ATTRIBUTES = { anchor: 3, glyph: 1, slot: 1, opacity: 1 };  // Per-instance attributes and their sizes
+
+const GLYPH_VERTEX_SHADER = `
+uniform vec4 rects[GLYPH_COUNT];
+uniform float scale;  // World size of a glyph per unit of view depth
+attribute vec3 anchor;
+attribute float glyph;
+attribute float slot;  // Horizontal offset from the anchor, in glyphs
+attribute float opacity;
+varying vec2 vUv;
+varying float vOpacity;
+void main() {
+    vec4 rect = rects[int(glyph)];
+    vUv = mix(rect.xy, rect.zw, uv);
+    vOpacity = opacity;
+    vec4 view = modelViewMatrix * vec4(anchor, 1.0);
+    view.xy += (position.xy + vec2(slot, 0.0)) * scale * -view.z;
+    gl_Position = projectionMatrix * view;
+}`;
+const GLYPH_FRAGMENT_SHADER = `
+uniform sampler2D atlas;
+varying vec2 vUv;
+varying float vOpacity;
+void main() {
+    vec4 texel = texture2D(atlas, vUv);
+    gl_FragColor = vec4(texel.rgb, texel.a * vOpacity);
+}`;
+
+// Built assets are resolved through asset-manifest.json next to this script
+const SCRIPT_URL = document.currentScript ? document.currentScript.src : window.location.href;
+let assetManifest = null;
+
+// Three.js objects, created once the library is loaded
+let scene = null;
+let camera = null;
+let renderer = null;
+const container = document.getElementById('solar-system');
+
+// Loaded data
+let positionsManifest = {};
+const positionPieces = {};  // body -> loaded tier pieces, finest tier first
+let eventsData = {};        // 'YYYY-MM' -> events of the month
+let moonEventsData = {};    // 'YYYY-MM' -> moon events of the month
+let drawableEvents = [];    // {time, body, other, style} of the loaded months, sorted by time
+let drawableTimes = new Float64Array(0);  // Their times, for binary search
+const speedProfiles = {};   // body -> {rates: Float32Array of degrees per day, stationary}
+const requestedFiles = new Set();
+let scrubLoadTimer = null;
 
 // Placeholder for planets
 const planets = {};
 
+// Orbit lines: one THREE.Line per body, geometries cached per level of detail
+const orbits = {};
+
+// Pooled event geometry and the scratch objects its updates reuse
+const eventLayer = {
+    lines: null,    // THREE.LineSegments, two vertices per aspect
+    markers: null,  // THREE.InstancedMesh, one instance per station or ingress
+    labels: null,   // THREE.Mesh over an InstancedBufferGeometry, one instance per glyph; null until the atlas is in
+    glyphs: {},     // Glyph name -> index in the atlas
+    colors: {},     // Style -> THREE.Color
+    matrix: null,
+    from: [0, 0, 0],
+    to: [0, 0, 0],
+    anchor: [0, 0, 0]
+};
+
+// Timeline state in seconds since the start of the position data
+const timeline = {
+    start: 0,       // Epoch milliseconds of the first sample
+    current: 0,
+    duration: 0,
+    span: Infinity,  // Length of the orbit trail shown around the current time
+    playing: false
+};
+
+// Render scheduler: a frame is drawn only when something marked it dirty or
+// playback is running, and never while the canvas is off-screen or the tab hidden
+const renderLoop = {
+    dirty: true,
+    frame: null,  // Pending requestAnimationFrame id
+    lastFrame: 0,
+    onScreen: true,
+    pageVisible: !document.hidden
+};
+
+// Frame-cost instrumentation, null unless the URL flag is set
+const perf = new URLSearchParams(window.location.search).has(PERF_PARAM) ? {
+    frames: [],     // {time, duration, sections} of the last PERF_FRAME_WINDOW frames
+    pending: {},    // Section times measured since the last frame, e.g. while scrubbing
+    loads: [],      // {file, fetch, decode, bytes} per loaded file, in ms and bytes
+    marks: {},      // Milliseconds since navigation start of boot milestones
+    info: null,     // renderer.info after the last frame
+    overlay: null,
+    lastOverlay: 0
+} : null;
+
 // UI Elements
 const dateDisplay = document.getElementById('date-display');
 const timelineSlider = document.getElementById('timeline-slider');
+const playButton = document.getElementById('play-button');
 
 // --- Main execution ---
+
+// Nothing but this script is loaded until the widget approaches the viewport
+function boot() {
+    if (!('IntersectionObserver' in window)) {
+        main().catch(err => console.error(err));
+        return;
+    }
+    const observer = new IntersectionObserver(entries => {
+        if (!entries.some(entry => entry.isIntersecting)) return;
+        observer.disconnect();
+        main().catch(err => console.error(err));
+    }, { rootMargin: BOOT_ROOT_MARGIN });
+    observer.observe(container);
+}
+
 async function main() {
     console.log("Fetching data...");
-    // We can't use fetch with file:// protocol. We'll need a local server.
-    // For now, we will assume the data is loaded.
-    console.log("Data loading will be implemented in the next step.");
+    perfMark('boot');
+    const [, manifest] = await Promise.all([
+        loadThree().then(() => perfMark('three')),
+        loadAssetManifest().then(() => fetchJSON(assetUrl('positions_manifest.json')))
+    ]);
+    positionsManifest = manifest;
+    setupPerfOverlay();
 
     // Setup the scene
+    setupRenderer();
     setupScene();
+    setupEventLayer();
+    setupTimeline();
+    setupZoom();
+    setupPlayback();
+    setupRenderScheduling();
+
+    // Render as soon as the coarse tier and the current month are in
+    await Promise.all([
+        loadPositionPiece(0, positionsManifest.tiers[0].pieces[0]),
+        loadEventsAround(timeline.current)
+    ]);
+    requestRender();
+
+    // Orbit paths and the finer tiers follow the first frame
+    loadDataAround(timeline.current);
+    loadOnce(GLYPH_ATLAS, loadGlyphAtlas);
+    const [orbitBuffer] = await Promise.all([
+        fetchBinary(assetUrl(positionsManifest.orbits.file)),
+        positionsManifest.speeds && loadSpeedProfiles()  // Data generated before the profiles has no shading
+    ]);
+    setupOrbits(orbitBuffer);
+    updateOrbits();
+    requestRender();
+    if (positionsManifest.density) await setupDensityStrip();
+}
+
+function loadThree() {
+    if (window.THREE) return Promise.resolve();
+    return new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = THREE_URL;
+        script.onload = resolve;
+        script.onerror = () => reject(new Error(`Failed to load ${THREE_URL}`));
+        document.head.appendChild(script);
+    });
+}
+
+async function loadAssetManifest() {
+    const response = await fetch(new URL('asset-manifest.json', SCRIPT_URL));
+    if (response.ok) assetManifest = await response.json();
+}
+
+// Content-hashed URL of a data or static file
+function assetUrl(name) {
+    if (!assetManifest) return '/' + name;  // Unbuilt tree served from the project root
+    return new URL(assetManifest[name] || name, SCRIPT_URL).href;
+}
+
+async function fetchJSON(url) {
+    const started = performance.now();
+    const response = await fetch(url);
+    if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+    const text = await response.text();
+    const fetched = performance.now();
+    const data = JSON.parse(text);
+    perfLoad(url, fetched - started, performance.now() - fetched, text.length);
+    return data;
+}
+
+async function fetchBinary(url) {
+    const started = performance.now();
+    const response = await fetch(url);
+    if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+    const buffer = await response.arrayBuffer();
+    perfLoad(url, performance.now() - started, 0, buffer.byteLength);
+    return buffer;
+}
+
+// Runs load() once per file; a failed load can be retried later
+async function loadOnce(file, load) {
+    if (requestedFiles.has(file)) return;
+    requestedFiles.add(file);
+    try {
+        await load();
+    } catch (err) {
+        requestedFiles.delete(file);
+        console.error(err);
+    }
+}
+
+// --- Progressive data ---
+
+function loadPositionPiece(level, piece) {
+    return loadOnce(piece.file, async () => {
+        const buffer = await fetchBinary(assetUrl(piece.file));
+        const decodeStarted = performance.now();
+        const steps = positionsManifest.tiers[level].steps;
+        for (const [name, block] of Object.entries(piece.bodies)) {
+            const pieces = positionPieces[name] || (positionPieces[name] = []);
+            pieces.push({
+                level,
+                start: piece.start,
+                end: piece.end,
+                step: steps[name],
+                first: block.first,
+                samples: new Float32Array(buffer, block.offset, block.shape[0] * block.shape[1])
+            });
+            pieces.sort((a, b) => b.level - a.level);
+        }
+        perfDecode(assetUrl(piece.file), performance.now() - decodeStarted);
+        requestRender();
+    });
+}
 
-    // Start the animation loop
-    animate();
+// Ecliptic [x, y, z] of a body in AU at a timeline time, from the finest loaded piece covering it.
+// Written into out, so per-frame callers can reuse an array; null while no piece covers the time.
+function positionAt(name, seconds, out = [0, 0, 0]) {
+    const started = perf && performance.now();
+    let position = null;
+    for (const piece of positionPieces[name] || []) {
+        if (seconds < piece.start || seconds > piece.end) continue;
+        const samples = piece.samples;
+        const index = seconds / piece.step - piece.first;
+        const i = Math.min(Math.max(Math.floor(index), 0), samples.length / 3 - 2);
+        const fraction = index - i;
+        for (let k = 0; k < 3; k++) out[k] = samples[i * 3 + k] + (samples[(i + 1) * 3 + k] - samples[i * 3 + k]) * fraction;
+        position = out;
+        break;
+    }
+    perfSection('interpolation', started);
+    return position;
+}
+
+async function loadSpeedProfiles() {
+    const buffer = await fetchBinary(assetUrl(positionsManifest.speeds.file));
+    for (const [name, block] of Object.entries(positionsManifest.speeds.bodies)) {
+        speedProfiles[name] = { rates: new Float32Array(buffer, block.offset, block.shape[0]), stationary: block.stationary };
+    }
+}
+
+// Ecliptic longitude rate of a body in degrees per day at a timeline time, or null without a profile
+function speedAt(name, seconds) {
+    const profile = speedProfiles[name];
+    if (!profile) return null;
+    const rates = profile.rates;
+    const index = Math.min(Math.max(seconds / positionsManifest.speeds.step_seconds, 0), rates.length - 1);
+    const i = Math.min(Math.floor(index), rates.length - 2);
+    return rates[i] + (rates[i + 1] - rates[i]) * (index - i);
+}
+
+// 'YYYY-MM' of the month offset months away from a timeline time
+function monthKey(seconds, offset = 0) {
+    const date = new Date(timeline.start + seconds * 1000);
+    return new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth() + offset, 1)).toISOString().slice(0, 7);
+}
+
+function loadEventsAround(seconds) {
+    const months = positionsManifest.events ? positionsManifest.events.months : [];
+    const loads = [];
+    for (let offset = -EVENT_PREFETCH_MONTHS; offset <= EVENT_PREFETCH_MONTHS; offset++) {
+        const entry = months.find(month => month.month === monthKey(seconds, offset));
+        if (!entry) continue;
+        loads.push(loadOnce(entry.file, async () => {
+            const data = await fetchJSON(assetUrl(entry.file));
+            eventsData[entry.month] = data.events;
+            moonEventsData[entry.month] = data.moon_events;
+            addDrawableEvents(data.events.concat(data.moon_events));
+            requestRender();
+        }));
+    }
+    return Promise.all(loads);
+}
+
+// Streams the finer tiers and the event months around a timeline time
+function loadDataAround(seconds) {
+    positionsManifest.tiers.forEach((tier, level) => {
+        const piece = tier.pieces.find(piece => piece.start <= seconds && seconds <= piece.end);
+        if (piece) loadPositionPiece(level, piece);
+    });
+    loadEventsAround(seconds);
+}
+
+// Ecliptic coordinates (z towards the ecliptic north) to scene coordinates (y up)
+function toScene(x, y, z) {
+    return [x * AU_TO_SCENE, z * AU_TO_SCENE, -y * AU_TO_SCENE];
+}
+
+// Writes the scene coordinates of an ecliptic position into a flat array
+function setScenePosition(array, offset, [x, y, z]) {
+    array[offset] = x * AU_TO_SCENE;
+    array[offset + 1] = z * AU_TO_SCENE;
+    array[offset + 2] = -y * AU_TO_SCENE;
+}
+
+function parseUTC(text) {
+    return new Date(text.replace(' ', 'T').replace(/(\+00:00)?$/, 'Z'));
+}
+
+function setupRenderer() {
+    scene = new THREE.Scene();
+    camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
+    camera.position.set(0, 50, 0);
+    camera.lookAt(0, 0, 0);
+
+    renderer = new THREE.WebGLRenderer({ antialias: true });
+    renderer.setSize(window.innerWidth, window.innerHeight);
+    container.appendChild(renderer.domElement);
 }
 
 function setupScene() {
@@ -56,9 +417,561 @@ function setupScene() {
     console.log("Scene setup complete.");
 }
 
-function animate() {
-    requestAnimationFrame(animate);
-    renderer.render(scene, camera);
+// --- Event layer ---
+
+function setupEventLayer() {
+    const geometry = new THREE.BufferGeometry();
+    for (const name of ['position', 'color']) {
+        const attribute = new THREE.BufferAttribute(new Float32Array(ASPECT_LINE_CAPACITY * 6), 3);
+        geometry.setAttribute(name, attribute.setUsage(THREE.DynamicDrawUsage));
+    }
+    geometry.setDrawRange(0, 0);
+    eventLayer.lines = new THREE.LineSegments(geometry, new THREE.LineBasicMaterial({ vertexColors: true }));
+
+    const marker = new THREE.OctahedronGeometry(1);
+    eventLayer.markers = new THREE.InstancedMesh(marker, new THREE.MeshBasicMaterial(), EVENT_MARKER_CAPACITY);
+    eventLayer.markers.instanceMatrix.setUsage(THREE.DynamicDrawUsage);
+    eventLayer.markers.count = 0;
+
+    for (const object of [eventLayer.lines, eventLayer.markers]) {
+        object.frustumCulled = false;  // Bounds change every frame
+        scene.add(object);
+    }
+    for (const [style, color] of Object.entries(EVENT_STYLES)) eventLayer.colors[style] = new THREE.Color(color);
+    eventLayer.matrix = new THREE.Matrix4();
+}
+
+// Creates the label mesh: a quad instanced per glyph, with the atlas rectangles as uniforms
+async function loadGlyphAtlas() {
+    const atlas = await fetchJSON(assetUrl(GLYPH_ATLAS));
+    const texture = await new THREE.TextureLoader().loadAsync(assetUrl(atlas.file));
+    const quad = new THREE.PlaneGeometry(1, 1);
+    const geometry = new THREE.InstancedBufferGeometry();
+    geometry.setIndex(quad.index);
+    geometry.setAttribute('position', quad.attributes.position);
+    geometry.setAttribute('uv', quad.attributes.uv);
+    for (const [name, size] of Object.entries(GLYPH_ATTRIBUTES)) {
+        const attribute = new THREE.InstancedBufferAttribute(new Float32Array(GLYPH_CAPACITY * size), size);
+        geometry.setAttribute(name, attribute.setUsage(THREE.DynamicDrawUsage));
+    }
+    geometry.instanceCount = 0;
+
+    const material = new THREE.ShaderMaterial({
+        defines: { GLYPH_COUNT: atlas.names.length },
+        uniforms: {
+            atlas: { value: texture },
+            rects: { value: atlas.rects.map(rect => new THREE.Vector4(...rect)) },
+            scale: { value: 0 }
+        },
+        vertexShader: GLYPH_VERTEX_SHADER,
+        fragmentShader: GLYPH_FRAGMENT_SHADER,
+        transparent: true,
+        depthTest: false
+    });
+    atlas.names.forEach((name, index) => { eventLayer.glyphs[name] = index; });
+    eventLayer.labels = new THREE.Mesh(geometry, material);
+    eventLayer.labels.frustumCulled = false;
+    eventLayer.labels.renderOrder = 1;  // Over the lines and markers
+    scene.add(eventLayer.labels);
+    requestRender();
+}
+
+// A feed event as {time, body, other, style} for the event layer, or null if it is not drawn
+function drawableEvent(event) {
+    if (event.type !== 'point') return null;
+    const time = (parseUTC(event.datetime).getTime() - timeline.start) / 1000;
+    let match = ASPECT_PATTERN.exec(event.description);
+    if (match) {
+        const [body, aspect, other] = match.slice(1).map(name => name.toLowerCase());
+        return { time, body, other, style: match[2], label: [body, aspect, other] };
+    }
+    match = STATION_PATTERN.exec(event.description);
+    if (match) return { time, body: match[1].toLowerCase(), other: null, style: match[2], label: [match[1].toLowerCase(), match[2]] };
+    match = INGRESS_PATTERN.exec(event.description);
+    if (match) return { time, body: match[1].toLowerCase(), other: null, style: 'ingress', label: [match[1].toLowerCase(), match[2].toLowerCase()] };
+    return null;
+}
+
+// Point events belong to a single month, so every loaded month adds its own events only
+function addDrawableEvents(events) {
+    for (const event of events) {
+        const drawable = drawableEvent(event);
+        if (drawable && drawable.style in EVENT_STYLES) drawableEvents.push(drawable);
+    }
+    drawableEvents.sort((a, b) => a.time - b.time);
+    drawableTimes = Float64Array.from(drawableEvents, event => event.time);
+}
+
+// Writes an event's glyphs centred on (aspects) or beside (markers) an ecliptic position; returns the new glyph count
+function writeLabel(labels, count, event, position, centred, opacity) {
+    const { anchor, glyph, slot, opacity: alpha } = labels.geometry.attributes;
+    const first = centred ? (1 - event.label.length) / 2 : 1;
+    for (let i = 0; i < event.label.length && count < GLYPH_CAPACITY; i++) {
+        const index = eventLayer.glyphs[event.label[i]];
+        if (index === undefined) continue;
+        setScenePosition(anchor.array, count * 3, position);
+        glyph.array[count] = index;
+        slot.array[count] = first + i;
+        alpha.array[count] = opacity;
+        count++;
+    }
+    return count;
+}
+
+// Rewrites the pools with the events active at the current time
+function updateEvents() {
+    const started = perf && performance.now();
+    const { lines, markers, labels, colors, matrix, from, to, anchor } = eventLayer;
+    const positions = lines.geometry.attributes.position;
+    const vertexColors = lines.geometry.attributes.color;
+    const size = unitsPerPixel() * EVENT_MARKER_PIXELS;
+    const now = timeline.current;
+    let lineCount = 0;
+    let markerCount = 0;
+    let glyphCount = 0;
+    for (let i = lowerBound(drawableTimes, now - EVENT_ACTIVE_SECONDS); i < drawableTimes.length && drawableTimes[i] <= now + EVENT_ACTIVE_SECONDS; i++) {
+        const event = drawableEvents[i];
+        const opacity = 1 - Math.abs(event.time - now) / EVENT_ACTIVE_SECONDS;
+        if (!positionAt(event.body, now, from)) continue;
+        if (event.other) {
+            if (lineCount === ASPECT_LINE_CAPACITY || !positionAt(event.other, now, to)) continue;
+            setScenePosition(positions.array, lineCount * 6, from);
+            setScenePosition(positions.array, lineCount * 6 + 3, to);
+            colors[event.style].toArray(vertexColors.array, lineCount * 6);
+            colors[event.style].toArray(vertexColors.array, lineCount * 6 + 3);
+            lineCount++;
+            if (labels) {
+                for (let k = 0; k < 3; k++) anchor[k] = (from[k] + to[k]) / 2;
+                glyphCount = writeLabel(labels, glyphCount, event, anchor, true, opacity);
+            }
+        } else if (markerCount < EVENT_MARKER_CAPACITY) {
+            matrix.makeScale(size, size, size).setPosition(from[0] * AU_TO_SCENE, from[2] * AU_TO_SCENE, -from[1] * AU_TO_SCENE);
+            markers.setMatrixAt(markerCount, matrix);
+            markers.setColorAt(markerCount, colors[event.style]);
+            markerCount++;
+            if (labels) glyphCount = writeLabel(labels, glyphCount, event, from, false, opacity);
+        }
+    }
+
+    // Upload only the part of the pools in use
+    positions.updateRange.count = vertexColors.updateRange.count = lineCount * 6;
+    positions.needsUpdate = vertexColors.needsUpdate = true;
+    lines.geometry.setDrawRange(0, lineCount * 2);
+    markers.instanceMatrix.updateRange.count = markerCount * 16;
+    markers.instanceMatrix.needsUpdate = true;
+    if (markers.instanceColor) markers.instanceColor.needsUpdate = true;
+    markers.count = markerCount;
+    if (labels) {
+        for (const name in GLYPH_ATTRIBUTES) {
+            const attribute = labels.geometry.attributes[name];
+            attribute.updateRange.count = glyphCount * attribute.itemSize;
+            attribute.needsUpdate = true;
+        }
+        labels.geometry.instanceCount = glyphCount;
+        labels.material.uniforms.scale.value = GLYPH_PIXELS * 2 * Math.tan(THREE.MathUtils.degToRad(camera.fov / 2)) / renderer.domElement.clientHeight;
+    }
+    perfSection('events', started);
+}
+
+function setupTimeline() {
+    timeline.start = parseUTC(positionsManifest.start).getTime();
+    timeline.duration = (parseUTC(positionsManifest.end).getTime() - timeline.start) / 1000;
+    timelineSlider.max = timeline.duration;
+    timelineSlider.step = 60;  // Minute resolution
+    timelineSlider.value = 0;
+
+    timelineSlider.addEventListener('input', () => setTime(Number(timelineSlider.value)));
+    dateDisplay.textContent = positionsManifest.start;
+}
+
+// Moves the timeline; everything that depends on the time is updated from here
+function setTime(seconds) {
+    timeline.current = Math.min(Math.max(seconds, 0), timeline.duration);
+    timelineSlider.value = timeline.current;
+    dateDisplay.textContent = new Date(timeline.start + timeline.current * 1000).toISOString().slice(0, 16).replace('T', ' ');
+    updateOrbits();
+    requestRender();
+
+    // Fetch the finer data around the new time, at most every SCRUB_LOAD_DELAY_MS while scrubbing or playing
+    if (scrubLoadTimer === null) {
+        scrubLoadTimer = setTimeout(() => {
+            scrubLoadTimer = null;
+            loadDataAround(timeline.current);
+        }, SCRUB_LOAD_DELAY_MS);
+    }
+}
+
+// --- Density strip ---
+
+// Global bucket number of epoch milliseconds at a density level, as numbered by data_generator.py
+function densityBucket(ms, level) {
+    if (level === 'day') return Math.floor(ms / DAY_MS);
+    if (level === 'week') return Math.floor((ms - 4 * DAY_MS) / (7 * DAY_MS));  // Weeks from Monday 1970-01-05
+    const date = new Date(ms);
+    return (date.getUTCFullYear() - 1970) * 12 + date.getUTCMonth();
+}
+
+function densityBucketStart(bucket, level) {
+    if (level === 'day') return bucket * DAY_MS;
+    if (level === 'week') return (bucket * 7 + 4) * DAY_MS;
+    return Date.UTC(1970, bucket);
+}
+
+async function setupDensityStrip() {
+    const density = positionsManifest.density;
+    const width = timelineSlider.clientWidth;
+    const start = timeline.start;
+    const end = timeline.start + timeline.duration * 1000;
+    const level = density.levels.find(level => densityBucket(end, level.name) - densityBucket(start, level.name) < width)
+        || density.levels[density.levels.length - 1];
+    const first = densityBucket(start, level.name);
+    const last = densityBucket(end, level.name);
+
+    // Usually a single tile covers the range
+    const tiles = level.tiles.filter(tile => tile.index >= Math.floor(first / density.tile_buckets)
+                                          && tile.index <= Math.floor(last / density.tile_buckets));
+    const buffers = await Promise.all(tiles.map(tile => fetchBinary(assetUrl(tile.file))));
+    const counts = {};  // Tile index -> Uint16Array of (tile_buckets, kinds)
+    tiles.forEach((tile, i) => { counts[tile.index] = new Uint16Array(buffers[i]); });
+    const max = Math.max(1, ...tiles.map(tile => tile.max));
+
+    const canvas = document.createElement('canvas');
+    canvas.width = width;
+    canvas.height = DENSITY_HEIGHT;
+    canvas.style.display = 'block';
+    timelineSlider.insertAdjacentElement('afterend', canvas);
+    const context = canvas.getContext('2d');
+    const kinds = density.kinds.length;
+    const scale = width / (end - start);
+    for (let bucket = first; bucket <= last; bucket++) {
+        const tile = counts[Math.floor(bucket / density.tile_buckets)];
+        if (!tile) continue;
+        const row = (bucket - Math.floor(bucket / density.tile_buckets) * density.tile_buckets) * kinds;
+        const x = (densityBucketStart(bucket, level.name) - start) * scale;
+        const barWidth = Math.max(1, (densityBucketStart(bucket + 1, level.name) - start) * scale - x);
+        // Kinds stacked from the bottom, heights relative to the busiest bucket
+        let y = DENSITY_HEIGHT;
+        for (let kind = 0; kind < kinds; kind++) {
+            const height = tile[row + kind] / max * DENSITY_HEIGHT;
+            context.fillStyle = DENSITY_COLORS[density.kinds[kind]];
+            context.fillRect(x, y - height, barWidth, height);
+            y -= height;
+        }
+    }
+}
+
+function setupPlayback() {
+    playButton.addEventListener('click', () => setPlaying(!timeline.playing));
+}
+
+function setPlaying(playing) {
+    if (playing && timeline.current >= timeline.duration) setTime(0);
+    timeline.playing = playing;
+    playButton.textContent = playing ? 'Pause' : 'Play';
+    renderLoop.lastFrame = 0;  // The first playing frame does not advance the time
+    scheduleFrame();
+}
+
+function setupOrbits(buffer) {
+    for (const [name, levels] of Object.entries(positionsManifest.orbits.bodies)) {
+        // Vertices are [x, y, z, t]; t stays on the CPU for draw range lookups
+        const material = new THREE.LineBasicMaterial({ vertexColors: true });
+        const line = new THREE.Line(new THREE.BufferGeometry(), material);
+        line.frustumCulled = false;
+        scene.add(line);
+        orbits[name] = {
+            line,
+            levels: levels.map(level => ({
+                ...level,
+                body: name,
+                vertices: new Float32Array(buffer, level.offset, level.shape[0] * level.shape[1]),
+                geometry: null
+            })),
+            level: null
+        };
+    }
+    console.log("Orbit paths loaded.");
+}
+
+// Builds the static geometry of a level once; later switches only swap the reference
+function orbitGeometry(level) {
+    if (level.geometry) return level.geometry;
+    const count = level.shape[0];
+    const positions = new Float32Array(count * 3);
+    const times = new Float32Array(count);
+    for (let i = 0; i < count; i++) {
+        const [x, y, z] = toScene(level.vertices[i * 4], level.vertices[i * 4 + 1], level.vertices[i * 4 + 2]);
+        positions.set([x, y, z], i * 3);
+        times[i] = level.vertices[i * 4 + 3];
+    }
+    level.geometry = new THREE.BufferGeometry();
+    level.geometry.setAttribute('position', new THREE.BufferAttribute(positions, 3));
+    level.geometry.setAttribute('color', new THREE.BufferAttribute(orbitColors(level.body, times), 3));
+    level.times = times;
+    return level.geometry;
+}
+
+// Vertex colours of an orbit path from the body's speed at each vertex time
+function orbitColors(name, times) {
+    const colors = new Float32Array(times.length * 3);
+    const direct = new THREE.Color(ORBIT_COLOR);
+    const retrograde = new THREE.Color(RETROGRADE_COLOR);
+    const station = new THREE.Color(STATION_COLOR);
+    const color = new THREE.Color();
+    const stationary = speedProfiles[name] && speedProfiles[name].stationary;
+    for (let i = 0; i < times.length; i++) {
+        const rate = speedAt(name, times[i]);
+        color.copy(rate !== null && rate < 0 ? retrograde : direct);
+        if (rate !== null && stationary) {
+            color.lerp(station, Math.max(0, 1 - Math.abs(rate) / (STATION_SHADE_FACTOR * stationary)));
+        }
+        color.toArray(colors, i * 3);
+    }
+    return colors;
+}
+
+// World units covered by one pixel at the camera's distance from the origin
+function unitsPerPixel() {
+    const distance = camera.position.length();
+    const height = 2 * distance * Math.tan(THREE.MathUtils.degToRad(camera.fov / 2));
+    return height / renderer.domElement.clientHeight;
+}
+
+// Coarsest level that stays within the pixel error, then coarser while the span is over budget
+function pickOrbitLevel(levels, pixelSize, span) {
+    let index = 0;
+    for (let i = 0; i < levels.length; i++) {
+        if (levels[i].tolerance_au * AU_TO_SCENE <= pixelSize * ORBIT_MAX_PIXEL_ERROR) index = i;
+    }
+    const spanFraction = Math.min(1, span / timeline.duration);
+    while (index < levels.length - 1 && levels[index].count * spanFraction > ORBIT_VERTEX_BUDGET) index++;
+    return levels[index];
+}
+
+// First vertex index with time >= t
+function lowerBound(times, t) {
+    let lo = 0;
+    let hi = times.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (times[mid] < t) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+}
+
+function updateOrbits() {
+    const started = perf && performance.now();
+    const pixelSize = unitsPerPixel();
+    const from = timeline.current - timeline.span / 2;
+    const to = timeline.current + timeline.span / 2;
+    for (const orbit of Object.values(orbits)) {
+        const level = pickOrbitLevel(orbit.levels, pixelSize, timeline.span);
+        if (orbit.level !== level) {
+            orbit.line.geometry = orbitGeometry(level);
+            orbit.level = level;
+        }
+        // Include the vertices just outside the span so the trail reaches its ends
+        const first = Math.max(0, lowerBound(level.times, from) - 1);
+        const last = Math.min(level.times.length, lowerBound(level.times, to) + 1);
+        orbit.line.geometry.setDrawRange(first, last - first);
+    }
+    perfSection('orbits', started);
+}
+
+function setupZoom() {
+    renderer.domElement.addEventListener('wheel', event => {
+        event.preventDefault();
+        const factor = Math.exp(event.deltaY * 0.001);
+        camera.position.multiplyScalar(factor);
+        camera.position.clampLength(camera.near * 2, camera.far / 2);
+        updateOrbits();
+        requestRender();
+    }, { passive: false });
+}
+
+// --- Render scheduling ---
+
+function setupRenderScheduling() {
+    window.addEventListener('resize', () => {
+        camera.aspect = window.innerWidth / window.innerHeight;
+        camera.updateProjectionMatrix();
+        renderer.setSize(window.innerWidth, window.innerHeight);
+        updateOrbits();
+        requestRender();
+    });
+
+    document.addEventListener('visibilitychange', () => {
+        renderLoop.pageVisible = !document.hidden;
+        resumeRendering();
+    });
+
+    // Without IntersectionObserver the canvas is treated as always on-screen
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            renderLoop.onScreen = entries[entries.length - 1].isIntersecting;
+            resumeRendering();
+        });
+        observer.observe(renderer.domElement);
+    }
+}
+
+function canRender() {
+    return renderLoop.onScreen && renderLoop.pageVisible;
+}
+
+// Marks the scene as changed; call after anything that alters the picture (time, camera, hover)
+function requestRender() {
+    renderLoop.dirty = true;
+    scheduleFrame();
+}
+
+function scheduleFrame() {
+    if (renderLoop.frame === null && canRender() && (renderLoop.dirty || timeline.playing)) {
+        renderLoop.frame = requestAnimationFrame(renderFrame);
+    }
+}
+
+// Called when the canvas may have become visible again; changes made meanwhile are still dirty
+function resumeRendering() {
+    if (!canRender()) {
+        if (renderLoop.frame !== null) cancelAnimationFrame(renderLoop.frame);
+        renderLoop.frame = null;
+        return;
+    }
+    renderLoop.lastFrame = 0;  // Playback does not jump over the time spent hidden
+    scheduleFrame();
+}
+
+function renderFrame(now) {
+    const frameStarted = performance.now();
+    renderLoop.frame = null;
+    if (timeline.playing) {
+        // Throttle playback to the frame budget
+        if (renderLoop.lastFrame && now - renderLoop.lastFrame < PLAYBACK_FRAME_BUDGET_MS) {
+            scheduleFrame();
+            return;
+        }
+        if (renderLoop.lastFrame) {
+            setTime(timeline.current + (now - renderLoop.lastFrame) / 1000 * PLAYBACK_RATE);
+            if (timeline.current >= timeline.duration) setPlaying(false);
+        }
+        renderLoop.lastFrame = now;
+    }
+    if (renderLoop.dirty) {
+        updateEvents();  // Follows the time, the camera and newly loaded events or positions
+        const renderStarted = perf && performance.now();
+        renderer.render(scene, camera);
+        perfSection('render', renderStarted);
+        renderLoop.dirty = false;
+        perfFrame(now, frameStarted);
+    }
+    scheduleFrame();
+}
+
+// --- Performance overlay ---
+
+// Adds the time since started (from performance.now()) to a section of the next frame
+function perfSection(name, started) {
+    if (!perf) return;
+    perf.pending[name] = (perf.pending[name] || 0) + performance.now() - started;
+}
+
+function perfMark(name) {
+    if (perf) perf.marks[name] = performance.now();
+}
+
+function perfLoad(file, fetchMs, decodeMs, bytes) {
+    if (perf) perf.loads.push({ file, fetch: fetchMs, decode: decodeMs, bytes });
+}
+
+function perfDecode(file, decodeMs) {
+    if (!perf) return;
+    const load = perf.loads.find(load => load.file === file);
+    if (load) load.decode += decodeMs;
+}
+
+// Closes the frame drawn at now: its sections are everything measured since the previous one
+function perfFrame(now, started) {
+    if (!perf) return;
+    if (!perf.marks.firstFrame) perfMark('firstFrame');
+    perf.frames.push({ time: now, duration: performance.now() - started, sections: perf.pending });
+    if (perf.frames.length > PERF_FRAME_WINDOW) perf.frames.shift();
+    perf.pending = {};
+    const info = renderer.info;
+    perf.info = {
+        calls: info.render.calls,
+        triangles: info.render.triangles,
+        lines: info.render.lines,
+        points: info.render.points,
+        geometries: info.memory.geometries,
+        textures: info.memory.textures
+    };
+    if (now - perf.lastOverlay >= PERF_OVERLAY_INTERVAL_MS) {
+        perf.lastOverlay = now;
+        updatePerfOverlay();
+    }
+}
+
+function percentile(sorted, p) {
+    if (!sorted.length) return null;
+    return sorted[Math.min(sorted.length - 1, Math.floor(p / 100 * sorted.length))];
+}
+
+function summarize(values) {
+    const sorted = [...values].sort((a, b) => a - b);
+    return { p50: percentile(sorted, 50), p95: percentile(sorted, 95), p99: percentile(sorted, 99), max: percentile(sorted, 100) };
+}
+
+// Everything the overlay shows, as plain JSON
+function perfReport() {
+    if (!perf) return null;
+    const frames = perf.frames;
+    const last = frames.length ? frames[frames.length - 1].time : 0;
+    const sections = {};
+    for (const name of PERF_SECTIONS) sections[name] = summarize(frames.map(frame => frame.sections[name] || 0));
+    return {
+        url: window.location.href,
+        userAgent: navigator.userAgent,
+        canvas: renderer ? [renderer.domElement.width, renderer.domElement.height] : null,
+        fps: frames.filter(frame => last - frame.time < 1000).length,
+        frames: frames.length,
+        frameMs: summarize(frames.map(frame => frame.duration)),
+        sectionMs: sections,
+        renderer: perf.info,
+        marksMs: { ...perf.marks },
+        loads: perf.loads.map(load => ({ ...load }))
+    };
+}
+
+function setupPerfOverlay() {
+    if (!perf) return;
+    window.astroVizPerf = perfReport;
+    perf.overlay = document.createElement('pre');
+    perf.overlay.style.cssText = 'position:absolute;top:0;left:0;margin:0;padding:6px;z-index:10;' +
+        'background:rgba(0,0,0,0.7);color:#9f9;font:11px monospace;pointer-events:none;';
+    container.style.position = container.style.position || 'relative';
+    container.appendChild(perf.overlay);
+}
+
+function updatePerfOverlay() {
+    const report = perfReport();
+    const ms = value => value === null ? '-' : value.toFixed(2);
+    const stats = summary => `p50 ${ms(summary.p50)}  p95 ${ms(summary.p95)}  p99 ${ms(summary.p99)}`;
+    const lines = [`${report.fps} fps   frame ${stats(report.frameMs)} ms`];
+    for (const [name, summary] of Object.entries(report.sectionMs)) lines.push(`${name.padEnd(13)} ${stats(summary)}`);
+    if (report.renderer) {
+        const info = report.renderer;
+        lines.push(`calls ${info.calls}  tris ${info.triangles}  lines ${info.lines}  geometries ${info.geometries}  textures ${info.textures}`);
+    }
+    const marks = Object.entries(report.marksMs).map(([name, time]) => `${name} ${time.toFixed(0)}`);
+    lines.push(`boot ms: ${marks.join('  ')}`);
+    const loads = report.loads;
+    const bytes = loads.reduce((total, load) => total + load.bytes, 0);
+    const slowest = loads.reduce((worst, load) => (!worst || load.fetch + load.decode > worst.fetch + worst.decode) ? load : worst, null);
+    lines.push(`${loads.length} loads, ${(bytes / 1024).toFixed(0)} KB, fetch ${ms(loads.reduce((total, load) => total + load.fetch, 0))} ms, ` +
+               `decode ${ms(loads.reduce((total, load) => total + load.decode, 0))} ms`);
+    if (slowest) lines.push(`slowest ${slowest.file.split('/').pop()}: ${ms(slowest.fetch)} + ${ms(slowest.decode)} ms`);
+    perf.overlay.textContent = lines.join('\n');
 }
 
-main().catch(err => console.error(err));
+boot();
@@ -0,0 +1,9 @@
+# Tests run on the analytic backend, so they need no JPL kernel or network access.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ephemeris import use_ephemeris
+
+use_ephemeris('analytic')
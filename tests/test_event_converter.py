@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from event_converter import convert, iter_json_array, read_records, write_records
+from events import record_from_feed, sort_records
+
+FEED = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'events_feed.json')
+
+def row(record):
+    return (record.time, record.end, record.kind, record.body1, record.body2, record.code)
+
+def feed_records():
+    with open(FEED) as f:
+        return sort_records(record_from_feed(entry) for entry in json.load(f))
+
+@pytest.mark.parametrize('extension', ['.json', '.ndjson', '.bin'])
+def test_round_trip_keeps_every_record(tmp_path, extension):
+    records = feed_records()
+    path = str(tmp_path / f"events{extension}")
+    assert write_records(records, path) == len(records)
+    assert [row(record) for record in read_records(path)] == [row(record) for record in records]
+
+def test_sqlite_round_trip_stores_each_event_once(tmp_path):
+    # The feed lists "Pluto turns retrograde" twice
+    unique = sorted({row(record) for record in feed_records()}, key=repr)
+    path = str(tmp_path / 'events.sqlite')
+    assert convert(FEED, path) == len(unique)
+    assert convert(FEED, path) == 0
+    assert sorted((row(record) for record in read_records(path)), key=repr) == unique
+
+def test_json_array_items_split_across_reads(tmp_path):
+    text = '[1, 23, 456, "ab", {"a": [1, 2]}, null]'
+    for read_size in (1, 2, 3, 64):
+        with open(tmp_path / 'items.json', 'w') as f:
+            f.write(text)
+        with open(tmp_path / 'items.json') as f:
+            assert list(iter_json_array(f, read_size)) == json.loads(text)
+
+def test_legacy_records_are_chronological(tmp_path):
+    legacy = [{"Retrograde": [{"planet": "mars", "phase": "S_R", "stationary_point": "2025-12-01 10:00"}]},
+              {"Aspects": [{"planet1": "sun", "planet2": "mars", "aspect": "Trine", "exact_time_utc": "2025-01-01 10:00"}]},
+              {"Sign Changes": [{"planet": "venus", "new_sign": "Aries", "datetime": "2025-06-01 10:00"}]}]
+    with open(tmp_path / 'astrological_calendar.json', 'w') as f:
+        json.dump(legacy, f)
+    records = list(read_records(str(tmp_path / 'astrological_calendar.json'), 'legacy'))
+    assert [record.time for record in records] == sorted(record.time for record in records)
+    assert [record.description() for record in records] == ["Sun in Trine with Mars", "Venus enters Aries", "Mars turns retrograde"]
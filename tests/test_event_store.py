@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from astro_calendar import Calendar, detector_scope
+from event_store import EventStore
+from events import EventRecord, ASPECT, STATION, LUNAR_DAY, BODY_IDS, NO_BODY, merge_periods
+
+MARS, SATURN, MOON = BODY_IDS['mars'], BODY_IDS['saturn'], BODY_IDS['moon']
+STATIONS = [(STATION, MARS, NO_BODY)]
+LUNAR_DAYS = [(LUNAR_DAY, MOON, NO_BODY)]
+
+def row(record):
+    return (record.time, record.end, record.kind, record.body1, record.body2, record.code)
+
+def stored(store):
+    return [row(record) for record in store.records()]
+
+def test_upsert_without_range_skips_stored_events(tmp_path):
+    records = [EventRecord(100, STATION, MARS, code=0), EventRecord(100, STATION, MARS, code=0),
+               EventRecord(200, ASPECT, MARS, SATURN, 90)]
+    with EventStore(tmp_path / 'events.sqlite') as store:
+        assert store.upsert(records) == 2
+        assert store.upsert(records) == 0
+        assert store.count() == 2
+
+def test_rerun_replaces_moved_and_dropped_points(tmp_path):
+    with EventStore(tmp_path / 'events.sqlite') as store:
+        store.upsert([EventRecord(100, STATION, MARS, code=0), EventRecord(500, STATION, MARS, code=1),
+                      EventRecord(5000, STATION, MARS, code=0)], 0, 1000, STATIONS)
+        # The first station moved by a minute and the second one is gone
+        store.upsert([EventRecord(160, STATION, MARS, code=0)], 0, 1000, STATIONS)
+        assert stored(store) == [(160, None, STATION, MARS, NO_BODY, 0), (5000, None, STATION, MARS, NO_BODY, 0)]
+
+def test_rerun_leaves_events_outside_its_scope(tmp_path):
+    with EventStore(tmp_path / 'events.sqlite') as store:
+        store.upsert([EventRecord(100, STATION, MARS, code=0), EventRecord(200, ASPECT, MARS, SATURN, 90)])
+        store.upsert([], 0, 1000, STATIONS)
+        assert stored(store) == [(200, None, ASPECT, MARS, SATURN, 90)]
+
+def test_rerun_shortens_periods_inside_its_range(tmp_path):
+    with EventStore(tmp_path / 'events.sqlite') as store:
+        store.upsert([EventRecord(0, LUNAR_DAY, MOON, code=1, end=1000),
+                      EventRecord(1000, LUNAR_DAY, MOON, code=2, end=2000)])
+        store.upsert([EventRecord(500, LUNAR_DAY, MOON, code=1, end=800),
+                      EventRecord(800, LUNAR_DAY, MOON, code=2, end=1500)], 500, 1500, LUNAR_DAYS)
+        assert stored(store) == [(0, 800, LUNAR_DAY, MOON, NO_BODY, 1), (800, 2000, LUNAR_DAY, MOON, NO_BODY, 2)]
+
+def test_periods_cut_by_runs_are_joined(tmp_path):
+    with EventStore(tmp_path / 'events.sqlite') as store:
+        store.upsert([EventRecord(0, LUNAR_DAY, MOON, code=1, end=600)], 0, 600, LUNAR_DAYS)
+        store.upsert([EventRecord(600, LUNAR_DAY, MOON, code=1, end=1000)], 600, 1200, LUNAR_DAYS)
+        assert stored(store) == [(0, 1000, LUNAR_DAY, MOON, NO_BODY, 1)]
+
+def test_detector_scopes_do_not_overlap():
+    planets = ['mercury', 'venus', 'mars', 'sun']
+    scopes = [detector_scope('aspects', planets), detector_scope('moon', ['moon'])]
+    scopes += [detector_scope(detector, [planet]) for detector in ('stations', 'ingresses') for planet in planets]
+    keys = [key for scope in scopes for key in scope]
+    assert len(keys) == len(set(keys))
+
+def test_calendar_rerun_matches_the_latest_run(tmp_path):
+    with EventStore(tmp_path / 'events.sqlite') as store:
+        for orb in (8, 2):
+            calendar = Calendar(datetime(2024, 3, 1), datetime(2024, 4, 1), orb=orb, store=store)
+            calendar.add_aspects()
+            calendar.add_moon_events()
+        latest = [row(record) for record in merge_periods(calendar.events + calendar.moon_events)]
+        assert sorted(stored(store), key=repr) == sorted(latest, key=repr)
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+import json
+
+import numpy as np
+import pytest
+
+from data_generator import write_position_arrays
+from position_store import PositionStore
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+STEPS = {'mars': 7200, 'moon': 3600}
+
+@pytest.fixture
+def store(tmp_path):
+    """One day of samples that move linearly: x is the hours since START, y = 2x, z = -x."""
+    positions = {}
+    manifest = {'start': '2024-01-01 00:00:00', 'end': '2024-01-02 00:00:00', 'bodies': {}}
+    for name, step in STEPS.items():
+        hours = np.arange(0, 86400 + step, step) / 3600
+        positions[name] = np.stack([hours, 2 * hours, -hours], axis=1)
+        manifest['bodies'][name] = {'step_seconds': step, 'count': len(hours)}
+    write_position_arrays(tmp_path / 'positions.bin', positions, manifest)
+    with open(tmp_path / 'positions_manifest.json', 'w') as f:
+        json.dump(manifest, f)
+    return PositionStore(str(tmp_path / 'positions_manifest.json'))
+
+def test_state_interpolates_between_samples(store):
+    times = [START + timedelta(minutes=30), START + timedelta(hours=5)]
+    positions, velocities = store.state(['mars', 'moon'], times)
+    assert positions.shape == velocities.shape == (2, 2, 3)
+    np.testing.assert_allclose(positions[:, :, 0], [[0.5, 5], [0.5, 5]])
+    np.testing.assert_allclose(velocities[0, 0], [24, 48, -24])
+
+def test_state_of_a_scalar_time_has_no_times_axis(store):
+    positions, velocities = store.state('moon', START + timedelta(hours=3))
+    assert positions.shape == velocities.shape == (3,)
+    np.testing.assert_allclose(positions, [3, 6, -3])
+    assert store.state(['mars', 'moon'], START)[0].shape == (2, 3)
+
+def test_state_of_no_times_is_empty(store):
+    assert store.state('mars', [])[0].shape == (0, 3)
+    assert store.state(['mars', 'moon'], np.array([]))[1].shape == (2, 0, 3)
+
+def test_state_outside_the_range_fails(store):
+    with pytest.raises(ValueError):
+        store.state('mars', START - timedelta(seconds=1))
+
+def test_slice_includes_the_samples_around_the_range(store):
+    times, samples = store.slice('mars', START + timedelta(hours=3), START + timedelta(hours=7))
+    assert list((times - START.timestamp()) / 3600) == [2, 4, 6, 8]
+    np.testing.assert_allclose(samples[:, 0], [2, 4, 6, 8])
+    assert not samples.flags.writeable
+
+def test_slice_is_clamped_to_the_samples(store):
+    times, samples = store.slice('moon', START - timedelta(days=1), START + timedelta(days=2))
+    assert len(times) == len(samples) == 25
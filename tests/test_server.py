@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from server import clip_positions
+
+def piece(start, step, count):
+    return {'body': 'mars', 'start': start, 'step_seconds': step, 'positions': [[i, 0, 0] for i in range(count)]}
+
+def day(value):
+    return datetime.strptime(value, '%Y-%m-%d %H:%M').replace(tzinfo=timezone.utc)
+
+def test_samples_around_a_short_range_are_kept():
+    # 2-day samples from Dec 1: a request for Dec 2 gets Dec 1 and Dec 3
+    line = clip_positions(piece('2024-12-01 00:00:00', 172800, 16), day('2024-12-02 00:00'), day('2024-12-03 00:00'))
+    assert line['start'] == '2024-12-01 00:00:00'
+    assert line['positions'] == [[0, 0, 0], [1, 0, 0]]
+
+def test_a_range_starting_on_a_sample_reaches_the_next_one():
+    line = clip_positions(piece('2024-12-01 00:00:00', 86400, 32), day('2024-12-05 00:00'), day('2024-12-06 00:00'))
+    assert line['start'] == '2024-12-05 00:00:00'
+    assert line['positions'] == [[4, 0, 0], [5, 0, 0]]
+
+def test_samples_already_sent_are_dropped():
+    line = clip_positions(piece('2024-12-01 00:00:00', 86400, 32), day('2024-12-01 00:00'), day('2024-12-03 00:00'),
+                          after=day('2024-12-01 00:00'))
+    assert line['start'] == '2024-12-02 00:00:00'
+    assert line['positions'] == [[1, 0, 0], [2, 0, 0]]
+
+def test_clipping_stays_inside_the_piece():
+    line = clip_positions(piece('2024-12-01 00:00:00', 86400, 3), day('2024-11-20 00:00'), day('2024-12-20 00:00'))
+    assert line['start'] == '2024-12-01 00:00:00'
+    assert len(line['positions']) == 3
+    assert clip_positions(piece('2024-12-01 00:00:00', 86400, 3), day('2024-12-01 00:00'), day('2024-12-03 00:00'),
+                          after=day('2024-12-05 00:00'))['positions'] == []
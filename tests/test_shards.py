@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pytest
+
+from astro_calendar import Calendar
+
+def run_calendar(shard_days):
+    calendar = Calendar(datetime(2024, 1, 1), datetime(2024, 7, 1), shard_days=shard_days, workers=1)
+    calendar.add_retrogrades()
+    calendar.add_sign_changes()
+    calendar.add_aspects()
+    calendar.add_moon_events()
+    return calendar.events_feed(), calendar.moon_events_feed()
+
+@pytest.mark.parametrize('shard_days', [30, 45])
+def test_sharded_run_equals_serial_run(shard_days):
+    assert run_calendar(shard_days) == run_calendar(None)
+
+def test_serial_run_stays_inside_the_range():
+    events, moon_events = run_calendar(None)
+    for entry in events + moon_events:
+        assert '2024-01-01' <= entry.get('datetime', entry.get('start'))[:10] < '2024-07-01'
@@ -0,0 +1,101 @@
+# utility.py
+
+from datetime import datetime, timedelta, time
+from skyfield.api import load, utc
+import numpy as np
+
+from ephemeris import get_ephemeris
+
+ts = load.timescale()
+
+# Time arithmetic is done on TT Julian dates (floats or numpy arrays of them)
+MINUTE = 1 / 1440
+HOUR = 1 / 24
+
+def format_datetime(dt):
+    """Ensure consistent datetime formatting; Julian dates are converted to UTC"""
+    if isinstance(dt, str):
+        return dt
+    if isinstance(dt, (float, np.floating)):
+        dt = jd_to_datetime(dt)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=utc)
+    return dt.strftime('%Y-%m-%d %H:%M')
+
+def ensure_datetime(dt):
+    """Convert string to datetime if needed and ensure UTC timezone"""
+    if isinstance(dt, str):
+        dt = datetime.strptime(dt, '%Y-%m-%d %H:%M')
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=utc)
+    return dt
+
+def to_jd(value):
+    """Convert a datetime or 'YYYY-MM-DD HH:MM' string to a TT Julian date; Julian dates pass through"""
+    if isinstance(value, (datetime, str)):
+        return ts.from_datetime(ensure_datetime(value)).tt
+    return value
+
+def jd_to_datetime(jd):
+    """Convert a TT Julian date to a UTC datetime, rounded to the millisecond"""
+    # Rounding absorbs the float error of the Julian date, so midnight stays on its own day
+    dt = ts.tt_jd(jd).utc_datetime()
+    return datetime.fromtimestamp(round(dt.timestamp(), 3), tz=utc)
+
+# Scan grids are anchored to J2000 (TT), so a part of a range is sampled at the
+# same times as the whole range and detectors give the same results on either
+GRID_EPOCH = 2451545.0
+
+def time_grid(start_jd, end_jd, step):
+    """
+    Sample times for a scan: start_jd, every multiple of step from GRID_EPOCH
+    strictly between start_jd and end_jd, and end_jd.
+    """
+    if end_jd <= start_jd:
+        return np.array([start_jd])
+    first = np.floor((start_jd - GRID_EPOCH) / step) + 1
+    last = np.ceil((end_jd - GRID_EPOCH) / step) - 1
+    return np.concatenate(([start_jd], GRID_EPOCH + np.arange(first, last + 1) * step, [end_jd]))
+
+def utc_midnight(value):
+    """TT Julian date of the UTC midnight that starts the day of a datetime or Julian date"""
+    dt = ensure_datetime(value) if isinstance(value, (datetime, str)) else jd_to_datetime(value)
+    return to_jd(dt.replace(hour=0, minute=0, second=0, microsecond=0))
+
+def ecliptic_longitude(planet_obj, jd):
+    """Geocentric ecliptic longitude in degrees at a Julian date or array of Julian dates"""
+    return get_ephemeris().ecliptic_longitudes([planet_obj], jd)[0]
+
+def calculate_ecliptic_velocity(planet_obj, date):
+    """Calculate planet's instantaneous ecliptic angular velocity in degrees per day."""
+    # Accepts a datetime, a Julian date or an array of Julian dates.
+    # The rate is positive if the ecliptic longitude is increasing, negative if decreasing.
+    return get_ephemeris().longitude_rate(planet_obj, to_jd(date))
+
+def calculate_velocity(planet_obj, date, time_window=30):
+    """Calculate planet's apparent velocity in degrees per day"""
+    jd = to_jd(date)
+    velocity_magnitude = get_ephemeris().angular_speed(planet_obj, jd)
+    
+    # Determine sign based on ecliptic longitude change
+    # Check position 12 hours before and after to determine direction
+    pos1, pos2 = ecliptic_longitude(planet_obj, np.array([jd - 12 * HOUR, jd + 12 * HOUR]))
+    
+    # Handle cases where longitude crosses 0/360 degrees
+    if pos1 > 270 and pos2 < 90:
+        # Crossed from 360 to 0
+        pos2 += 360
+    elif pos1 < 90 and pos2 > 270:
+        # Crossed from 0 to 360
+        pos1 += 360
+    
+    # If longitude is decreasing, planet is retrograde (negative velocity)
+    if pos1 > pos2:
+        return -velocity_magnitude
+    else:
+        return velocity_magnitude
+
+# Planet mapping
+def get_planet_object(planet_name):
+    # Map from names to the active ephemeris backend's bodies
+    return get_ephemeris().body(planet_name.lower())